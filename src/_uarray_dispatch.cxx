@@ -1,43 +1,32 @@
 #include <Python.h>
 
 #include "small_dynamic_array.h"
+#include "uarray_api.h"
 
 #include <algorithm>
+#include <atomic>
 #include <cstddef>
+#include <cstdint>
+#include <iterator>
+#include <limits>
+#include <memory>
+#include <mutex>
 #include <new>
 #include <stdexcept>
 #include <string>
 #include <unordered_map>
+#include <unordered_set>
 #include <utility>
 #include <vector>
 
+#if PY_VERSION_HEX < 0x030C0000
+#  include <structmember.h>
+#  define Py_T_PYSSIZET T_PYSSIZET
+#  define Py_READONLY READONLY
+#endif
 
-namespace {
-
-template <typename T>
-class immortal {
-  alignas(T) std::byte storage[sizeof(T)];
-
-public:
-  template <typename... Args>
-  immortal(Args &&... args) {
-    // Construct new T in storage
-    new (&storage) T(std::forward<Args>(args)...);
-  }
-  ~immortal() {
-    // Intentionally don't call destructor
-  }
-
-  T * get() { return reinterpret_cast<T *>(&storage); }
-  const T * get() const { return reinterpret_cast<const T *>(&storage); }
-  const T * get_const() const { return reinterpret_cast<const T *>(&storage); }
-
-  const T * operator->() const { return get(); }
-  T * operator->() { return get(); }
 
-  T & operator*() { return *get(); }
-  const T & operator*() const { return *get(); }
-};
+namespace {
 
 /** Handle to a python object that automatically DECREFs */
 class py_ref {
@@ -101,6 +90,7 @@ private:
 };
 
 PyObject * py_get(const py_ref & ref) { return ref.get(); }
+PyObject * py_get(PyObject * obj) { return obj; }
 
 /** Make tuple from variadic set of PyObjects */
 template <typename... Ts>
@@ -145,44 +135,363 @@ struct local_backends {
 using global_state_t = std::unordered_map<std::string, global_backends>;
 using local_state_t = std::unordered_map<std::string, local_backends>;
 
-static py_ref BackendNotImplementedError;
-static immortal<global_state_t> global_domain_map;
-thread_local global_state_t * current_global_state = global_domain_map.get();
-thread_local global_state_t thread_local_domain_map;
-thread_local local_state_t local_domain_map;
+/** The global backends, as frozen by freeze_backends
+ *
+ * Never modified once published, so it is read without synchronization.
+ */
+struct frozen_state {
+  global_state_t globals;
+};
+
+/** The domains dispatch walks for a multimethod, with their frozen globals */
+struct frozen_route {
+  struct entry {
+    std::string domain;
+    const global_backends * globals; // Never null
+  };
+  std::vector<entry> chain;
+};
+
+const global_backends no_global_backends;
+
+/** How multimethods choose among the backends they may call */
+enum class SelectionMode {
+  Order, // The first backend, in order, that implements the call
+  Cost,  // The backend estimating the lowest cost, see order_by_cost
+};
 
 /** Constant Python string identifiers
 
 Using these with PyObject_GetAttr is faster than PyObject_GetAttrString which
 has to create a new python string internally.
  */
-struct {
-  immortal<py_ref> ua_convert;
-  immortal<py_ref> ua_domain;
-  immortal<py_ref> ua_function;
+struct identifier_table {
+  py_ref ua_convert;
+  py_ref ua_domain;
+  py_ref ua_function;
+  py_ref ua_implementations;
+  py_ref ua_vectorcall;
+  py_ref ua_convert_group;
+  py_ref value;
+  py_ref type;
+  py_ref coercible;
+  py_ref ua_sequence;
+  py_ref convert;
+  py_ref ua_cost;
+  py_ref nbytes;
 
   bool init() {
-    *ua_convert = py_ref::steal(PyUnicode_InternFromString("__ua_convert__"));
-    if (!*ua_convert)
+    ua_convert = py_ref::steal(PyUnicode_InternFromString("__ua_convert__"));
+    if (!ua_convert)
+      return false;
+
+    ua_domain = py_ref::steal(PyUnicode_InternFromString("__ua_domain__"));
+    if (!ua_domain)
+      return false;
+
+    ua_function = py_ref::steal(PyUnicode_InternFromString("__ua_function__"));
+    if (!ua_function)
+      return false;
+
+    ua_implementations =
+        py_ref::steal(PyUnicode_InternFromString("__ua_implementations__"));
+    if (!ua_implementations)
+      return false;
+
+    ua_vectorcall =
+        py_ref::steal(PyUnicode_InternFromString("__ua_vectorcall__"));
+    if (!ua_vectorcall)
+      return false;
+
+    ua_convert_group =
+        py_ref::steal(PyUnicode_InternFromString("__ua_convert_group__"));
+    if (!ua_convert_group)
+      return false;
+
+    value = py_ref::steal(PyUnicode_InternFromString("value"));
+    if (!value)
+      return false;
+
+    type = py_ref::steal(PyUnicode_InternFromString("type"));
+    if (!type)
+      return false;
+
+    coercible = py_ref::steal(PyUnicode_InternFromString("coercible"));
+    if (!coercible)
+      return false;
+
+    ua_sequence = py_ref::steal(PyUnicode_InternFromString("__ua_sequence__"));
+    if (!ua_sequence)
+      return false;
+
+    convert = py_ref::steal(PyUnicode_InternFromString("convert"));
+    if (!convert)
       return false;
 
-    *ua_domain = py_ref::steal(PyUnicode_InternFromString("__ua_domain__"));
-    if (!*ua_domain)
+    ua_cost = py_ref::steal(PyUnicode_InternFromString("__ua_cost__"));
+    if (!ua_cost)
       return false;
 
-    *ua_function = py_ref::steal(PyUnicode_InternFromString("__ua_function__"));
-    if (!*ua_function)
+    nbytes = py_ref::steal(PyUnicode_InternFromString("nbytes"));
+    if (!nbytes)
       return false;
 
     return true;
   }
 
   void clear() {
-    ua_convert->reset();
-    ua_domain->reset();
-    ua_function->reset();
+    ua_convert.reset();
+    ua_domain.reset();
+    ua_function.reset();
+    ua_implementations.reset();
+    ua_vectorcall.reset();
+    ua_convert_group.reset();
+    value.reset();
+    type.reset();
+    coercible.reset();
+    ua_sequence.reset();
+    convert.reset();
+    ua_cost.reset();
+    nbytes.reset();
+  }
+};
+
+struct thread_state;
+
+/** State of one instance of the module
+ *
+ * Every interpreter imports its own instance, so that interpreters with their
+ * own GIL (PEP 684) don't share any Python objects.
+ */
+struct module_state {
+  identifier_table identifiers;
+  py_ref BackendNotImplementedError;
+  py_ref FunctionType;
+  py_ref SetBackendContextType;
+  py_ref SkipBackendContextType;
+  py_ref BackendStateType;
+  py_ref NativeBackendType;
+  py_ref conversion_cache; // Set through set_conversion_cache
+  py_ref dispatch_routes;  // Set through set_dispatch_routes
+  py_ref dispatch_hook;    // Set through set_dispatch_hook
+  py_ref async_runner;     // uarray._async._acall, imported on first use
+  py_ref thread_state_key; // Key of the thread_state in thread state dicts
+  uint64_t generation = 0; // Distinguishes instances, see get_thread_state
+  std::atomic<SelectionMode> selection_mode{SelectionMode::Order};
+  global_state_t global_domain_map;
+  UArray_API capi; // Exported as the _C_API capsule
+  std::unordered_set<thread_state *> thread_states; // Of live threads
+  // Versions of the backend state, see get_state_version
+  std::atomic<uint64_t> last_local_version{0};
+  std::atomic<uint64_t> global_version{0};
+  // Set by freeze_backends, global_domain_map doesn't change afterwards
+  std::unique_ptr<frozen_state> frozen_owner;
+  std::atomic<const frozen_state *> frozen{nullptr};
+  std::mutex freeze_mutex; // Guards frozen_owner
+
+  /** A local state version that wasn't used before */
+  uint64_t new_local_version() { return ++last_local_version; }
+};
+
+/** A context entered by a thread, see context_helper */
+struct entered_context {
+  const void * context;
+  uint64_t saved_version;   // Local state version before entering
+  uint64_t entered_version; // Local state version after entering
+};
+
+/** Backends set in one thread, in one interpreter */
+struct thread_state {
+  local_state_t local_domain_map;
+  global_state_t thread_local_domain_map;
+  global_state_t * current_global_state = nullptr;
+  module_state * ms = nullptr; // Unset once the module is freed
+  int dispatch_depth = 0;      // See dispatch_guard
+  bool needs_compaction = false;
+  uint64_t local_version = 0; // See get_state_version
+  // Versions before and after entering each context this thread is in
+  std::vector<entered_context> entered_contexts;
+
+  /** Erase an entry of local_domain_map if its lists are empty again
+   *
+   * While dispatching, references to the entries are held, so the entry is
+   * only erased once the outermost dispatch returns.
+   */
+  void release(local_state_t::iterator itr) {
+    if (!itr->second.preferred.empty() || !itr->second.skipped.empty())
+      return;
+
+    if (dispatch_depth > 0) {
+      needs_compaction = true;
+      return;
+    }
+    local_domain_map.erase(itr);
+  }
+
+  /** Erase all entries of local_domain_map with empty lists */
+  void compact() {
+    // Erasing empty entries releases no Python objects, so no code can run
+    // and modify the map meanwhile
+    for (auto itr = local_domain_map.begin(); itr != local_domain_map.end();) {
+      if (itr->second.preferred.empty() && itr->second.skipped.empty())
+        itr = local_domain_map.erase(itr);
+      else
+        ++itr;
+    }
+    needs_compaction = false;
+  }
+};
+
+/** Marks a dispatch in progress in a thread, see thread_state::release */
+class dispatch_guard {
+  thread_state & ts_;
+
+public:
+  explicit dispatch_guard(thread_state & ts): ts_(ts) { ++ts_.dispatch_depth; }
+
+  ~dispatch_guard() {
+    if (--ts_.dispatch_depth == 0 && ts_.needs_compaction)
+      ts_.compact();
+  }
+
+  dispatch_guard(const dispatch_guard &) = delete;
+  dispatch_guard & operator=(const dispatch_guard &) = delete;
+};
+
+/** Guards module_state::thread_states, and thread_state::ms
+ *
+ * Thread states may be freed after the module, or in other threads.
+ */
+std::mutex thread_states_mutex;
+
+/** Last thread state looked up by this OS thread, see get_thread_state */
+struct thread_state_cache_entry {
+  PyThreadState * tstate = nullptr;
+  uint64_t generation = 0;
+  thread_state * state = nullptr;
+};
+thread_local thread_state_cache_entry thread_state_cache;
+
+std::atomic<uint64_t> module_generation{0};
+
+constexpr const char * thread_state_capsule_name = "uarray._thread_state";
+
+void thread_state_capsule_destructor(PyObject * capsule) {
+  auto state = static_cast<thread_state *>(
+      PyCapsule_GetPointer(capsule, thread_state_capsule_name));
+  if (thread_state_cache.state == state)
+    thread_state_cache = {};
+  {
+    std::lock_guard<std::mutex> lock(thread_states_mutex);
+    if (state->ms)
+      state->ms->thread_states.erase(state);
+  }
+  delete state;
+}
+
+/** The backends set in the current thread, for this module instance
+ *
+ * They are kept in the dict of the current Python thread state, which is
+ * specific to both the OS thread and the interpreter, and is cleared along
+ * with the thread state. The last lookup is cached. Returns nullptr on error.
+ */
+thread_state * get_thread_state(module_state & ms) {
+  auto tstate = PyThreadState_Get();
+  auto & cache = thread_state_cache;
+  if (cache.tstate == tstate && cache.generation == ms.generation)
+    return cache.state;
+
+  auto dict = PyThreadState_GetDict();
+  if (!dict) {
+    PyErr_SetString(PyExc_RuntimeError, "uarray: no thread state dict");
+    return nullptr;
+  }
+
+  thread_state * state;
+  auto capsule = PyDict_GetItemWithError(dict, ms.thread_state_key.get());
+  if (capsule) {
+    state = static_cast<thread_state *>(
+        PyCapsule_GetPointer(capsule, thread_state_capsule_name));
+    if (!state)
+      return nullptr;
+  } else {
+    if (PyErr_Occurred())
+      return nullptr;
+
+    state = new (std::nothrow) thread_state;
+    if (!state) {
+      PyErr_NoMemory();
+      return nullptr;
+    }
+    state->current_global_state = &ms.global_domain_map;
+
+    auto new_capsule = py_ref::steal(PyCapsule_New(
+        state, thread_state_capsule_name, thread_state_capsule_destructor));
+    if (!new_capsule) {
+      delete state;
+      return nullptr;
+    }
+    try {
+      std::lock_guard<std::mutex> lock(thread_states_mutex);
+      ms.thread_states.insert(state);
+      state->ms = &ms;
+    } catch (std::bad_alloc &) {
+      PyErr_NoMemory();
+      return nullptr;
+    }
+    if (PyDict_SetItem(dict, ms.thread_state_key.get(), new_capsule.get()) < 0)
+      return nullptr;
   }
-} identifiers;
+
+  cache = {tstate, ms.generation, state};
+  return state;
+}
+
+extern PyModuleDef uarray_module;
+
+/** The state of the module instance ``module`` */
+module_state & get_module_state(PyObject * module) {
+  return **static_cast<module_state **>(PyModule_GetState(module));
+}
+
+/** The state of the module instance that defines ``type`` or its base */
+module_state & get_module_state(PyTypeObject * type) {
+  return get_module_state(PyType_GetModuleByDef(type, &uarray_module));
+}
+
+/** Attribute lookup that doesn't raise AttributeError if it's missing
+ *
+ * Returns 1 and sets result if found, 0 if not found and -1 on error.
+ */
+int get_optional_attr(PyObject * obj, PyObject * name, PyObject ** result) {
+#if PY_VERSION_HEX >= 0x030D0000
+  return PyObject_GetOptionalAttr(obj, name, result);
+#else
+  return _PyObject_LookupAttr(obj, name, result);
+#endif
+}
+
+/** Enable deferred reference counting on a long-lived, shared object
+ *
+ * On free-threaded builds, references to it from the interpreter's stack then
+ * don't touch its reference count, so threads calling the same multimethod or
+ * using the same backend don't contend on it. A no-op elsewhere.
+ */
+void enable_deferred_refcount(PyObject * obj) {
+#if defined(Py_GIL_DISABLED) && PY_VERSION_HEX >= 0x030E0000
+  PyUnstable_Object_EnableDeferredRefcount(obj);
+#else
+  (void)obj;
+#endif
+}
+
+/** hasattr that doesn't swallow errors. Returns -1 on error. */
+int has_attr(PyObject * obj, PyObject * name) {
+  PyObject * result;
+  auto found = get_optional_attr(obj, name, &result);
+  Py_XDECREF(result);
+  return found;
+}
 
 bool domain_validate(PyObject * domain) {
   if (!PyUnicode_Check(domain)) {
@@ -217,9 +526,9 @@ std::string domain_to_string(PyObject * domain) {
   return std::string(str, size);
 }
 
-Py_ssize_t backend_get_num_domains(PyObject * backend) {
+Py_ssize_t backend_get_num_domains(module_state & ms, PyObject * backend) {
   auto domain =
-      py_ref::steal(PyObject_GetAttr(backend, identifiers.ua_domain->get()));
+      py_ref::steal(PyObject_GetAttr(backend, ms.identifiers.ua_domain.get()));
   if (!domain)
     return -1;
 
@@ -240,9 +549,10 @@ Py_ssize_t backend_get_num_domains(PyObject * backend) {
 enum class LoopReturn { Continue, Break, Error };
 
 template <typename Func>
-LoopReturn backend_for_each_domain(PyObject * backend, Func f) {
+LoopReturn backend_for_each_domain(
+    module_state & ms, PyObject * backend, Func f) {
   auto domain =
-      py_ref::steal(PyObject_GetAttr(backend, identifiers.ua_domain->get()));
+      py_ref::steal(PyObject_GetAttr(backend, ms.identifiers.ua_domain.get()));
   if (!domain)
     return LoopReturn::Error;
 
@@ -279,8 +589,9 @@ LoopReturn backend_for_each_domain(PyObject * backend, Func f) {
 }
 
 template <typename Func>
-LoopReturn backend_for_each_domain_string(PyObject * backend, Func f) {
-  return backend_for_each_domain(backend, [&](PyObject * domain) {
+LoopReturn backend_for_each_domain_string(
+    module_state & ms, PyObject * backend, Func f) {
+  return backend_for_each_domain(ms, backend, [&](PyObject * domain) {
     auto domain_string = domain_to_string(domain);
     if (domain_string.empty()) {
       return LoopReturn::Error;
@@ -289,8 +600,8 @@ LoopReturn backend_for_each_domain_string(PyObject * backend, Func f) {
   });
 }
 
-bool backend_validate_ua_domain(PyObject * backend) {
-  const auto res = backend_for_each_domain(backend, [&](PyObject * domain) {
+bool backend_validate_ua_domain(module_state & ms, PyObject * backend) {
+  const auto res = backend_for_each_domain(ms, backend, [&](PyObject * domain) {
     return domain_validate(domain) ? LoopReturn::Continue : LoopReturn::Error;
   });
   return (res != LoopReturn::Error);
@@ -303,9 +614,11 @@ struct BackendState {
   bool use_thread_local_globals = true;
 
   static void dealloc(BackendState * self) {
-    auto tp_free = Py_TYPE(self)->tp_free;
+    auto type = Py_TYPE(self);
+    auto tp_free = type->tp_free;
     self->~BackendState();
     tp_free(self);
+    Py_DECREF(type);
   }
 
   static PyObject * new_(
@@ -333,6 +646,19 @@ struct BackendState {
     }
   }
 
+  static PyObject * reduce_(BackendState * self, PyObject * /* args */) {
+    auto unpickle = py_ref::steal(PyObject_GetAttrString(
+        reinterpret_cast<PyObject *>(Py_TYPE(self)), "_unpickle"));
+    if (!unpickle)
+      return nullptr;
+
+    auto state = py_ref::steal(pickle_(self));
+    if (!state)
+      return nullptr;
+
+    return py_make_tuple(unpickle, state).release();
+  }
+
   static PyObject * unpickle_(PyObject * cls, PyObject * args) {
     try {
       PyObject *py_locals, *py_global;
@@ -552,11 +878,17 @@ struct BackendState {
   }
 };
 
-/** Clean up global python references when the module is finalized. */
-void globals_free(void * /* self */) {
-  global_domain_map->clear();
-  BackendNotImplementedError.reset();
-  identifiers.clear();
+/** Clean up python references when the module is finalized. */
+void module_free(void * self) {
+  auto module = static_cast<PyObject *>(self);
+  auto & ms = *static_cast<module_state **>(PyModule_GetState(module));
+  if (ms) {
+    std::lock_guard<std::mutex> lock(thread_states_mutex);
+    for (auto state : ms->thread_states)
+      state->ms = nullptr;
+  }
+  delete ms;
+  ms = nullptr;
 }
 
 /** Allow GC to break reference cycles between the module and global backends.
@@ -566,46 +898,111 @@ void globals_free(void * /* self */) {
  * set through context managers they should always be unset before module
  * cleanup.
  */
-int globals_traverse(PyObject * self, visitproc visit, void * arg) {
-  for (const auto & kv : *global_domain_map) {
-    const auto & globals = kv.second;
-    PyObject * backend = globals.global.backend.get();
-    Py_VISIT(backend);
-    for (const auto & reg : globals.registered) {
-      backend = reg.get();
+int module_traverse(PyObject * self, visitproc visit, void * arg) {
+  auto ms = *static_cast<module_state **>(PyModule_GetState(self));
+  if (!ms)
+    return 0;
+
+  for (const auto * state :
+       {&ms->global_domain_map,
+        ms->frozen_owner ? &ms->frozen_owner->globals : nullptr}) {
+    if (!state)
+      continue;
+    for (const auto & kv : *state) {
+      const auto & globals = kv.second;
+      PyObject * backend = globals.global.backend.get();
       Py_VISIT(backend);
+      for (const auto & reg : globals.registered) {
+        backend = reg.get();
+        Py_VISIT(backend);
+      }
     }
   }
+  Py_VISIT(ms->BackendNotImplementedError.get());
+  Py_VISIT(ms->FunctionType.get());
+  Py_VISIT(ms->SetBackendContextType.get());
+  Py_VISIT(ms->SkipBackendContextType.get());
+  Py_VISIT(ms->BackendStateType.get());
+  Py_VISIT(ms->NativeBackendType.get());
+  Py_VISIT(ms->conversion_cache.get());
+  Py_VISIT(ms->dispatch_routes.get());
+  Py_VISIT(ms->dispatch_hook.get());
+  Py_VISIT(ms->async_runner.get());
   return 0;
 }
 
-int globals_clear(PyObject * /* self */) {
-  global_domain_map->clear();
+int module_clear(PyObject * self) {
+  auto ms = *static_cast<module_state **>(PyModule_GetState(self));
+  if (!ms)
+    return 0;
+
+  ms->global_domain_map.clear();
+  if (ms->frozen_owner) {
+    // Multimethods may still point to the entries, so only their contents
+    // are cleared
+    for (auto & kv : ms->frozen_owner->globals) {
+      kv.second.global.backend.reset();
+      kv.second.registered.clear();
+    }
+  }
+  ms->BackendNotImplementedError.reset();
+  ms->FunctionType.reset();
+  ms->SetBackendContextType.reset();
+  ms->SkipBackendContextType.reset();
+  ms->BackendStateType.reset();
+  ms->NativeBackendType.reset();
+  ms->conversion_cache.reset();
+  ms->dispatch_routes.reset();
+  ms->dispatch_hook.reset();
+  ms->async_runner.reset();
   return 0;
 }
 
-PyObject * set_global_backend(PyObject * /* self */, PyObject * args) {
+/** Raise if the global backends seen by the thread are frozen
+ *
+ * Returns false on error. Threads using their own global backends, e.g.
+ * within set_state, may still change them.
+ */
+bool check_not_frozen(module_state & ms, const thread_state & ts) {
+  if (ts.current_global_state == &ms.global_domain_map &&
+      ms.frozen.load(std::memory_order_acquire)) {
+    PyErr_SetString(
+        PyExc_RuntimeError,
+        "The global backends are frozen, see uarray.freeze_backends.");
+    return false;
+  }
+  return true;
+}
+
+PyObject * set_global_backend(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
   PyObject * backend;
   int only = false, coerce = false, try_last = false;
   if (!PyArg_ParseTuple(args, "O|ppp", &backend, &coerce, &only, &try_last))
     return nullptr;
 
-  if (!backend_validate_ua_domain(backend)) {
+  if (!backend_validate_ua_domain(ms, backend)) {
     return nullptr;
   }
 
-  const auto res =
-      backend_for_each_domain_string(backend, [&](const std::string & domain) {
+  auto ts = get_thread_state(ms);
+  if (!ts || !check_not_frozen(ms, *ts))
+    return nullptr;
+
+  enable_deferred_refcount(backend);
+  const auto res = backend_for_each_domain_string(
+      ms, backend, [&](const std::string & domain) {
         backend_options options;
         options.backend = py_ref::ref(backend);
         options.coerce = coerce;
         options.only = only;
 
-        auto & domain_globals = (*current_global_state)[domain];
+        auto & domain_globals = (*ts->current_global_state)[domain];
         domain_globals.global = options;
         domain_globals.try_global_backend_last = try_last;
         return LoopReturn::Continue;
       });
+  ++ms.global_version;
 
   if (res == LoopReturn::Error)
     return nullptr;
@@ -613,34 +1010,74 @@ PyObject * set_global_backend(PyObject * /* self */, PyObject * args) {
   Py_RETURN_NONE;
 }
 
-PyObject * register_backend(PyObject * /* self */, PyObject * args) {
+bool register_backend_impl(module_state & ms, PyObject * backend) {
+  if (!backend_validate_ua_domain(ms, backend)) {
+    return false;
+  }
+
+  auto ts = get_thread_state(ms);
+  if (!ts || !check_not_frozen(ms, *ts))
+    return false;
+
+  enable_deferred_refcount(backend);
+  const auto ret = backend_for_each_domain_string(
+      ms, backend, [&](const std::string & domain) {
+        (*ts->current_global_state)[domain].registered.push_back(
+            py_ref::ref(backend));
+        return LoopReturn::Continue;
+      });
+  ++ms.global_version;
+  return (ret != LoopReturn::Error);
+}
+
+PyObject * register_backend(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
   PyObject * backend;
   if (!PyArg_ParseTuple(args, "O", &backend))
     return nullptr;
 
-  if (!backend_validate_ua_domain(backend)) {
+  if (!register_backend_impl(ms, backend))
     return nullptr;
-  }
 
-  const auto ret =
-      backend_for_each_domain_string(backend, [&](const std::string & domain) {
-        (*current_global_state)[domain].registered.push_back(
-            py_ref::ref(backend));
-        return LoopReturn::Continue;
-      });
-  if (ret == LoopReturn::Error)
+  Py_RETURN_NONE;
+}
+
+/** Replace a backend in the global state, keeping its position */
+PyObject * replace_backend(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
+  PyObject *old_backend, *new_backend;
+  if (!PyArg_ParseTuple(args, "OO", &old_backend, &new_backend))
     return nullptr;
 
+  auto ts = get_thread_state(ms);
+  if (!ts || !check_not_frozen(ms, *ts))
+    return nullptr;
+
+  // Entries are replaced in place, so that dispatch iterating over the
+  // registered backends right now continues with the next one.
+  enable_deferred_refcount(new_backend);
+  ++ms.global_version;
+  for (auto & item : *ts->current_global_state) {
+    auto & domain_globals = item.second;
+    if (domain_globals.global.backend.get() == old_backend)
+      domain_globals.global.backend = py_ref::ref(new_backend);
+    for (auto & backend : domain_globals.registered) {
+      if (backend.get() == old_backend)
+        backend = py_ref::ref(new_backend);
+    }
+  }
   Py_RETURN_NONE;
 }
 
-void clear_single(const std::string & domain, bool registered, bool global) {
-  auto domain_globals = current_global_state->find(domain);
-  if (domain_globals == current_global_state->end())
+void clear_single(
+    global_state_t & globals, const std::string & domain, bool registered,
+    bool global) {
+  auto domain_globals = globals.find(domain);
+  if (domain_globals == globals.end())
     return;
 
   if (registered && global) {
-    current_global_state->erase(domain_globals);
+    globals.erase(domain_globals);
     return;
   }
 
@@ -654,47 +1091,59 @@ void clear_single(const std::string & domain, bool registered, bool global) {
   }
 }
 
-PyObject * clear_backends(PyObject * /* self */, PyObject * args) {
+PyObject * clear_backends(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
   PyObject * domain = nullptr;
   int registered = true, global = false;
   if (!PyArg_ParseTuple(args, "O|pp", &domain, &registered, &global))
     return nullptr;
 
+  auto ts = get_thread_state(ms);
+  if (!ts || !check_not_frozen(ms, *ts))
+    return nullptr;
+
+  ++ms.global_version;
   if (domain == Py_None && registered && global) {
-    current_global_state->clear();
+    ts->current_global_state->clear();
     Py_RETURN_NONE;
   }
 
   auto domain_str = domain_to_string(domain);
-  clear_single(domain_str, registered, global);
+  clear_single(*ts->current_global_state, domain_str, registered, global);
   Py_RETURN_NONE;
 }
 
-/** Common functionality of set_backend and skip_backend */
-template <typename T>
+/** Common functionality of set_backend and skip_backend
+ *
+ * Member selects the list of local_backends the backend is pushed to. The
+ * domains are kept by name and looked up in the state of the thread entering
+ * or exiting the context, so that entries of local_domain_map can be erased
+ * once their lists are empty again (see thread_state::release).
+ */
+template <typename T, std::vector<T> local_backends::* Member>
 class context_helper {
 public:
-  using BackendLists = SmallDynamicArray<std::vector<T> *>;
-  // using BackendLists = std::vector<std::vector<T> *>;
+  using DomainList = std::vector<std::string>;
+
 private:
   T new_backend_;
-  BackendLists backend_lists_;
+  DomainList domains_;
 
 public:
   const T & get_backend() const { return new_backend_; }
 
   context_helper() {}
 
-  bool init(BackendLists && backend_lists, T new_backend) {
-    static_assert(std::is_nothrow_move_assignable<BackendLists>::value, "");
-    backend_lists_ = std::move(backend_lists);
+  bool init(DomainList && domains, T new_backend) {
+    static_assert(std::is_nothrow_move_assignable<DomainList>::value, "");
+    domains_ = std::move(domains);
     new_backend_ = std::move(new_backend);
     return true;
   }
 
-  bool init(std::vector<T> & backends, T new_backend) {
+  bool init(const std::string & domain, T new_backend) {
     try {
-      backend_lists_ = BackendLists(1, &backends);
+      domains_ = DomainList(1, domain);
     } catch (std::bad_alloc &) {
       PyErr_NoMemory();
       return false;
@@ -703,36 +1152,53 @@ public:
     return true;
   }
 
-  bool enter() {
-    auto first = backend_lists_.begin();
-    auto last = backend_lists_.end();
+  bool enter(module_state & ms) {
+    auto ts = get_thread_state(ms);
+    if (!ts)
+      return false;
+
+    auto first = domains_.begin();
+    auto last = domains_.end();
     auto cur = first;
     try {
       for (; cur < last; ++cur) {
-        (*cur)->push_back(new_backend_);
+        (ts->local_domain_map[*cur].*Member).push_back(new_backend_);
       }
+      // Kept per thread, since threads may share a context object
+      ts->entered_contexts.push_back(
+          {this, ts->local_version, ms.new_local_version()});
     } catch (std::bad_alloc &) {
       for (; first < cur; ++first) {
-        (*first)->pop_back();
+        auto itr = ts->local_domain_map.find(*first);
+        (itr->second.*Member).pop_back();
+        ts->release(itr);
       }
       PyErr_NoMemory();
       return false;
     }
+
+    ts->local_version = ts->entered_contexts.back().entered_version;
     return true;
   }
 
-  bool exit() {
+  bool exit(module_state & ms) {
+    auto ts = get_thread_state(ms);
+    if (!ts)
+      return false;
+
     bool success = true;
 
-    for (auto * backends : backend_lists_) {
-      if (backends->empty()) {
+    for (const auto & domain : domains_) {
+      auto itr = ts->local_domain_map.find(domain);
+      if (itr == ts->local_domain_map.end() || (itr->second.*Member).empty()) {
         PyErr_SetString(
             PyExc_SystemExit, "__exit__ call has no matching __enter__");
         success = false;
         continue;
       }
 
-      if (backends->back() != new_backend_) {
+      auto & backends = itr->second.*Member;
+      if (backends.back() != new_backend_) {
         PyErr_SetString(
             PyExc_RuntimeError,
             "Found invalid context state while in __exit__. "
@@ -740,9 +1206,22 @@ public:
         success = false;
       }
 
-      backends->pop_back();
+      backends.pop_back();
+      ts->release(itr);
     }
 
+    // The state is back to what it was before entering, unless other
+    // contexts were left entered or exited meanwhile
+    auto & entered = ts->entered_contexts;
+    auto itr = std::find_if(
+        entered.rbegin(), entered.rend(),
+        [this](const entered_context & e) { return e.context == this; });
+    bool restore = success && itr != entered.rend() &&
+                   itr == entered.rbegin() &&
+                   ts->local_version == itr->entered_version;
+    ts->local_version = restore ? itr->saved_version : ms.new_local_version();
+    if (itr != entered.rend())
+      entered.erase(std::next(itr).base());
     return success;
   }
 };
@@ -751,13 +1230,15 @@ public:
 struct SetBackendContext {
   PyObject_HEAD
 
-  context_helper<backend_options> ctx_;
+  module_state * ms_;
+  context_helper<backend_options, &local_backends::preferred> ctx_;
 
   static void dealloc(SetBackendContext * self) {
     PyObject_GC_UnTrack(self);
-    auto tp_free = Py_TYPE(self)->tp_free;
+    auto type = Py_TYPE(self);
     self->~SetBackendContext();
-    tp_free(self);
+    type->tp_free(self);
+    Py_DECREF(type);
   }
 
   static PyObject * new_(
@@ -768,11 +1249,13 @@ struct SetBackendContext {
 
     // Placement new
     self = new (self) SetBackendContext;
+    self->ms_ = &get_module_state(type);
     return reinterpret_cast<PyObject *>(self);
   }
 
   static int init(
       SetBackendContext * self, PyObject * args, PyObject * kwargs) {
+    auto & ms = *self->ms_;
     static const char * kwlist[] = {"backend", "coerce", "only", nullptr};
     PyObject * backend = nullptr;
     int coerce = false;
@@ -782,22 +1265,22 @@ struct SetBackendContext {
             args, kwargs, "O|pp", (char **)kwlist, &backend, &coerce, &only))
       return -1;
 
-    if (!backend_validate_ua_domain(backend)) {
+    if (!backend_validate_ua_domain(ms, backend)) {
       return -1;
     }
 
-    auto num_domains = backend_get_num_domains(backend);
+    auto num_domains = backend_get_num_domains(ms, backend);
     if (num_domains < 0) {
       return -1;
     }
 
     try {
-      decltype(ctx_)::BackendLists backend_lists(num_domains);
+      decltype(ctx_)::DomainList domains(num_domains);
       int idx = 0;
 
       const auto ret = backend_for_each_domain_string(
-          backend, [&](const std::string & domain) {
-            backend_lists[idx] = &local_domain_map[domain].preferred;
+          ms, backend, [&](const std::string & domain) {
+            domains[idx] = domain;
             ++idx;
             return LoopReturn::Continue;
           });
@@ -811,7 +1294,7 @@ struct SetBackendContext {
       opt.coerce = coerce;
       opt.only = only;
 
-      if (!self->ctx_.init(std::move(backend_lists), opt)) {
+      if (!self->ctx_.init(std::move(domains), opt)) {
         return -1;
       }
     } catch (std::bad_alloc &) {
@@ -823,18 +1306,19 @@ struct SetBackendContext {
   }
 
   static PyObject * enter__(SetBackendContext * self, PyObject * /* args */) {
-    if (!self->ctx_.enter())
+    if (!self->ctx_.enter(*self->ms_))
       return nullptr;
     Py_RETURN_NONE;
   }
 
   static PyObject * exit__(SetBackendContext * self, PyObject * /*args*/) {
-    if (!self->ctx_.exit())
+    if (!self->ctx_.exit(*self->ms_))
       return nullptr;
     Py_RETURN_NONE;
   }
 
   static int traverse(SetBackendContext * self, visitproc visit, void * arg) {
+    Py_VISIT(Py_TYPE(self));
     Py_VISIT(self->ctx_.get_backend().backend.get());
     return 0;
   }
@@ -844,19 +1328,30 @@ struct SetBackendContext {
     return py_make_tuple(opt.backend, py_bool(opt.coerce), py_bool(opt.only))
         .release();
   }
+
+  static PyObject * reduce_(SetBackendContext * self, PyObject * /*args*/) {
+    auto args = py_ref::steal(pickle_(self, nullptr));
+    if (!args)
+      return nullptr;
+
+    return py_make_tuple(reinterpret_cast<PyObject *>(Py_TYPE(self)), args)
+        .release();
+  }
 };
 
 
 struct SkipBackendContext {
   PyObject_HEAD
 
-  context_helper<py_ref> ctx_;
+  module_state * ms_;
+  context_helper<py_ref, &local_backends::skipped> ctx_;
 
   static void dealloc(SkipBackendContext * self) {
     PyObject_GC_UnTrack(self);
-    auto tp_free = Py_TYPE(self)->tp_free;
+    auto type = Py_TYPE(self);
     self->~SkipBackendContext();
-    tp_free(self);
+    type->tp_free(self);
+    Py_DECREF(type);
   }
 
   static PyObject * new_(
@@ -867,11 +1362,13 @@ struct SkipBackendContext {
 
     // Placement new
     self = new (self) SkipBackendContext;
+    self->ms_ = &get_module_state(type);
     return reinterpret_cast<PyObject *>(self);
   }
 
   static int init(
       SkipBackendContext * self, PyObject * args, PyObject * kwargs) {
+    auto & ms = *self->ms_;
     static const char * kwlist[] = {"backend", nullptr};
     PyObject * backend;
 
@@ -879,22 +1376,22 @@ struct SkipBackendContext {
             args, kwargs, "O", (char **)kwlist, &backend))
       return -1;
 
-    if (!backend_validate_ua_domain(backend)) {
+    if (!backend_validate_ua_domain(ms, backend)) {
       return -1;
     }
 
-    auto num_domains = backend_get_num_domains(backend);
+    auto num_domains = backend_get_num_domains(ms, backend);
     if (num_domains < 0) {
       return -1;
     }
 
     try {
-      decltype(ctx_)::BackendLists backend_lists(num_domains);
+      decltype(ctx_)::DomainList domains(num_domains);
       int idx = 0;
 
       const auto ret = backend_for_each_domain_string(
-          backend, [&](const std::string & domain) {
-            backend_lists[idx] = &local_domain_map[domain].skipped;
+          ms, backend, [&](const std::string & domain) {
+            domains[idx] = domain;
             ++idx;
             return LoopReturn::Continue;
           });
@@ -903,7 +1400,7 @@ struct SkipBackendContext {
         return -1;
       }
 
-      if (!self->ctx_.init(std::move(backend_lists), py_ref::ref(backend))) {
+      if (!self->ctx_.init(std::move(domains), py_ref::ref(backend))) {
         return -1;
       }
     } catch (std::bad_alloc &) {
@@ -915,18 +1412,19 @@ struct SkipBackendContext {
   }
 
   static PyObject * enter__(SkipBackendContext * self, PyObject * /* args */) {
-    if (!self->ctx_.enter())
+    if (!self->ctx_.enter(*self->ms_))
       return nullptr;
     Py_RETURN_NONE;
   }
 
   static PyObject * exit__(SkipBackendContext * self, PyObject * /*args*/) {
-    if (!self->ctx_.exit())
+    if (!self->ctx_.exit(*self->ms_))
       return nullptr;
     Py_RETURN_NONE;
   }
 
   static int traverse(SkipBackendContext * self, visitproc visit, void * arg) {
+    Py_VISIT(Py_TYPE(self));
     Py_VISIT(self->ctx_.get_backend().get());
     return 0;
   }
@@ -934,32 +1432,67 @@ struct SkipBackendContext {
   static PyObject * pickle_(SkipBackendContext * self, PyObject * /*args*/) {
     return py_make_tuple(self->ctx_.get_backend()).release();
   }
+
+  static PyObject * reduce_(SkipBackendContext * self, PyObject * /*args*/) {
+    auto args = py_ref::steal(pickle_(self, nullptr));
+    if (!args)
+      return nullptr;
+
+    return py_make_tuple(reinterpret_cast<PyObject *>(Py_TYPE(self)), args)
+        .release();
+  }
 };
 
-const local_backends & get_local_backends(const std::string & domain_key) {
+const local_backends & get_local_backends(
+    const thread_state & ts, const std::string & domain_key) {
   static const local_backends null_local_backends;
-  auto itr = local_domain_map.find(domain_key);
-  if (itr == local_domain_map.end()) {
+  // Most threads set no backends, skip hashing the domain then
+  if (ts.local_domain_map.empty())
+    return null_local_backends;
+
+  auto itr = ts.local_domain_map.find(domain_key);
+  if (itr == ts.local_domain_map.end()) {
     return null_local_backends;
   }
   return itr->second;
 }
 
 
-const global_backends & get_global_backends(const std::string & domain_key) {
-  static const global_backends null_global_backends;
-  const auto & cur_globals = *current_global_state;
-  auto itr = cur_globals.find(domain_key);
-  if (itr == cur_globals.end()) {
-    return null_global_backends;
+/** The global backends of ``domain_key``
+ *
+ * ``frozen`` is set if they come from the table of freeze_backends, which
+ * never changes and lives as long as the module.
+ */
+const global_backends & get_global_backends(
+    module_state & ms, const thread_state & ts, const std::string & domain_key,
+    bool & frozen) {
+  const global_state_t * cur_globals = ts.current_global_state;
+  frozen = false;
+  if (cur_globals == &ms.global_domain_map) {
+    if (auto frozen_table = ms.frozen.load(std::memory_order_acquire)) {
+      cur_globals = &frozen_table->globals;
+      frozen = true;
+    }
+  }
+
+  auto itr = cur_globals->find(domain_key);
+  if (itr == cur_globals->end()) {
+    return no_global_backends;
   }
   return itr->second;
 }
 
+/** Call ``call`` with each backend for ``domain_key``, in order
+ *
+ * ``frozen_globals`` are the domain's global backends from a frozen_route,
+ * or null to look them up.
+ */
 template <typename Callback>
 LoopReturn for_each_backend_in_domain(
-    const std::string & domain_key, Callback call) {
-  const local_backends & locals = get_local_backends(domain_key);
+    module_state & ms, thread_state * ts, const std::string & domain_key,
+    const global_backends * frozen_globals, Callback call) {
+  dispatch_guard guard(*ts);
+  const local_backends & locals = get_local_backends(*ts, domain_key);
 
   auto & skip = locals.skipped;
   auto & pref = locals.preferred;
@@ -979,6 +1512,9 @@ LoopReturn for_each_backend_in_domain(
     return (it != skip.end());
   };
 
+  // Backends are copied out with owning references: the callback may push
+  // to the lists, or drop the state's reference to the backend it is given,
+  // e.g. through clear_backends or set_state
   LoopReturn ret = LoopReturn::Continue;
   for (int i = pref.size() - 1; i >= 0; --i) {
     auto options = pref[i];
@@ -996,19 +1532,30 @@ LoopReturn for_each_backend_in_domain(
       return LoopReturn::Break;
   }
 
-  auto & globals = get_global_backends(domain_key);
+  // Frozen global backends are borrowed instead, as the frozen table can't
+  // drop its references. This spares threads sharing those backends from
+  // contending on their reference counts.
+  bool frozen = true;
+  auto & globals = frozen_globals
+                       ? *frozen_globals
+                       : get_global_backends(ms, *ts, domain_key, frozen);
   auto try_global_backend = [&] {
-    auto & options = globals.global;
-    if (!options.backend)
+    PyObject * backend = globals.global.backend.get();
+    const bool coerce = globals.global.coerce;
+    if (!backend)
       return LoopReturn::Continue;
 
-    int skip_current = should_skip(options.backend.get());
+    py_ref owned;
+    if (!frozen)
+      owned = py_ref::ref(backend);
+
+    int skip_current = should_skip(backend);
     if (skip_current < 0)
       return LoopReturn::Error;
     if (skip_current > 0)
       return LoopReturn::Continue;
 
-    return call(options.backend.get(), options.coerce);
+    return call(backend, coerce);
   };
 
   if (!globals.try_global_backend_last) {
@@ -1021,14 +1568,18 @@ LoopReturn for_each_backend_in_domain(
   }
 
   for (size_t i = 0; i < globals.registered.size(); ++i) {
-    py_ref backend = globals.registered[i];
-    int skip_current = should_skip(backend.get());
+    PyObject * backend = globals.registered[i].get();
+    py_ref owned;
+    if (!frozen)
+      owned = py_ref::ref(backend);
+
+    int skip_current = should_skip(backend);
     if (skip_current < 0)
       return LoopReturn::Error;
     if (skip_current)
       continue;
 
-    ret = call(backend.get(), false);
+    ret = call(backend, false);
     if (ret != LoopReturn::Continue)
       return ret;
   }
@@ -1040,69 +1591,698 @@ LoopReturn for_each_backend_in_domain(
 }
 
 template <typename Callback>
-LoopReturn for_each_backend(std::string domain, Callback call) {
-  do {
-    auto ret = for_each_backend_in_domain(domain, call);
+LoopReturn for_each_backend_in_domain(
+    module_state & ms, const std::string & domain_key, Callback call) {
+  auto ts = get_thread_state(ms);
+  if (!ts)
+    return LoopReturn::Error;
+
+  return for_each_backend_in_domain(ms, ts, domain_key, nullptr, call);
+}
+
+/** Call ``call`` with each backend for ``domain_key`` and its parents
+ *
+ * With a ``route`` from Function::get_frozen_route, the domains and their
+ * global backends are taken from it instead, unless the thread uses its own
+ * global backends.
+ */
+template <typename Callback>
+LoopReturn for_each_backend(
+    module_state & ms, const std::string & domain_key, Callback call,
+    const frozen_route * route = nullptr) {
+  if (route) {
+    auto ts = get_thread_state(ms);
+    if (!ts)
+      return LoopReturn::Error;
+
+    if (ts->current_global_state == &ms.global_domain_map) {
+      auto ret = LoopReturn::Continue;
+      for (const auto & entry : route->chain) {
+        ret = for_each_backend_in_domain(
+            ms, ts, entry.domain, entry.globals, call);
+        if (ret != LoopReturn::Continue)
+          return ret;
+      }
+      return ret;
+    }
+  }
+
+  auto ret = for_each_backend_in_domain(ms, domain_key, call);
+  auto dot_pos = domain_key.rfind('.');
+  if (ret != LoopReturn::Continue || dot_pos == std::string::npos ||
+      dot_pos == 0)
+    return ret;
+
+  // Only domains with a parent need a copy of the key to walk up
+  std::string domain(domain_key, 0, dot_pos);
+  while (true) {
+    ret = for_each_backend_in_domain(ms, domain, call);
     if (ret != LoopReturn::Continue) {
       return ret;
     }
 
-    auto dot_pos = domain.rfind('.');
-    if (dot_pos == std::string::npos) {
+    dot_pos = domain.rfind('.');
+    if (dot_pos == std::string::npos || dot_pos == 0) {
       return ret;
     }
 
     domain.resize(dot_pos);
-  } while (!domain.empty());
-  return LoopReturn::Continue;
+  }
 }
 
-struct py_func_args {
-  py_ref args, kwargs;
-};
-
-struct Function {
+/** A backend implemented in C, created through the C API
+ *
+ * The dispatcher calls its hooks directly, instead of going through
+ * ``__ua_convert__`` and ``__ua_function__``. Those are still defined, for
+ * callers using the Python protocol.
+ */
+struct NativeBackend {
   PyObject_HEAD
-  py_ref extractor_, replacer_;  // functions to handle dispatchables
-  std::string domain_key_;       // associated __ua_domain__ in UTF8
-  py_ref def_args_, def_kwargs_; // default arguments
-  py_ref def_impl_;              // default implementation
-  py_ref dict_;                  // __dict__
-
-  PyObject * call(PyObject * args, PyObject * kwargs);
+  module_state * ms_;
+  py_ref domain_;
+  UArray_ConvertFunc convert_;
+  UArray_FunctionFunc function_;
+  void * data_;
+  py_ref owner_;
+  py_ref dict_; // __dict__, for set_backend's cache
+
+  static void dealloc(NativeBackend * self) {
+    PyObject_GC_UnTrack(self);
+    auto type = Py_TYPE(self);
+    self->~NativeBackend();
+    type->tp_free(self);
+    Py_DECREF(type);
+  }
 
-  py_func_args replace_dispatchables(
-      PyObject * backend, PyObject * args, PyObject * kwargs,
-      PyObject * coerce);
+  static int traverse(NativeBackend * self, visitproc visit, void * arg) {
+    Py_VISIT(Py_TYPE(self));
+    Py_VISIT(self->domain_.get());
+    Py_VISIT(self->owner_.get());
+    Py_VISIT(self->dict_.get());
+    return 0;
+  }
 
-  py_ref canonicalize_args(PyObject * args);
-  py_ref canonicalize_kwargs(PyObject * kwargs);
+  static int clear(NativeBackend * self) {
+    self->owner_.reset();
+    self->dict_.reset();
+    return 0;
+  }
 
-  static void dealloc(Function * self) {
-    PyObject_GC_UnTrack(self);
-    auto tp_free = Py_TYPE(self)->tp_free;
-    self->~Function();
-    tp_free(self);
+  static PyObject * get_domain(NativeBackend * self, void * /* closure */) {
+    return py_ref(self->domain_).release();
   }
 
-  static PyObject * new_(
-      PyTypeObject * type, PyObject * args, PyObject * kwargs) {
-    auto self = reinterpret_cast<Function *>(type->tp_alloc(type, 0));
-    if (self == nullptr)
-      return nullptr;
+  static PyObject * ua_convert_(
+      NativeBackend * self, PyObject * const * args, Py_ssize_t nargs);
+  static PyObject * ua_function_(
+      NativeBackend * self, PyObject * const * args, Py_ssize_t nargs);
+};
 
-    // Placement new
-    self = new (self) Function;
-    return reinterpret_cast<PyObject *>(self);
-  }
+NativeBackend * as_native_backend(module_state & ms, PyObject * backend) {
+  if (!Py_IS_TYPE(backend, (PyTypeObject *)ms.NativeBackendType.get()))
+    return nullptr;
+  return reinterpret_cast<NativeBackend *>(backend);
+}
 
-  static int init(Function * self, PyObject * args, PyObject * /*kwargs*/) {
-    PyObject *extractor, *replacer;
-    PyObject * domain;
-    PyObject *def_args, *def_kwargs;
-    PyObject * def_impl;
+/** Whether the backend can convert dispatchables. Returns -1 on error. */
+int backend_has_convert(module_state & ms, PyObject * backend) {
+  if (auto native = as_native_backend(ms, backend))
+    return (native->convert_ != nullptr);
 
-    if (!PyArg_ParseTuple(
+  auto has_convert = has_attr(backend, ms.identifiers.ua_convert_group.get());
+  if (has_convert != 0)
+    return has_convert;
+
+  return has_attr(backend, ms.identifiers.ua_convert.get());
+}
+
+/** Dispatchables sharing a value type, dispatch type and coercibility */
+struct dispatchable_group {
+  py_ref value_type, dispatch_type;
+  bool coercible;
+  bool is_sequence = false;        // from a single DispatchableSequence
+  py_ref values;                   // list of the grouped values
+  std::vector<Py_ssize_t> indices; // positions in the dispatchables tuple
+};
+
+struct dispatchable_group_key {
+  PyObject * value_type;
+  PyObject * dispatch_type;
+  bool coercible;
+
+  bool operator==(const dispatchable_group_key & other) const {
+    return (
+        value_type == other.value_type &&
+        dispatch_type == other.dispatch_type && coercible == other.coercible);
+  }
+};
+
+struct dispatchable_group_key_hash {
+  size_t operator()(const dispatchable_group_key & key) const {
+    auto h = std::hash<PyObject *>{}(key.value_type);
+    h = h * 31 + std::hash<PyObject *>{}(key.dispatch_type);
+    return h * 2 + key.coercible;
+  }
+};
+
+/** Split dispatchables into homogeneous groups, in order of first appearance
+ *
+ * Returns false on error.
+ */
+bool group_dispatchables(
+    module_state & ms, PyObject * dispatchables,
+    std::vector<dispatchable_group> & groups) {
+  std::unordered_map<
+      dispatchable_group_key, size_t, dispatchable_group_key_hash>
+      group_index;
+
+  // Dispatchables are usually all of the same class, so remember the last
+  PyTypeObject * last_type = nullptr;
+  int last_is_sequence = 0;
+
+  const auto size = PyTuple_GET_SIZE(dispatchables);
+  for (Py_ssize_t i = 0; i < size; ++i) {
+    auto dispatchable = PyTuple_GET_ITEM(dispatchables, i);
+    if (Py_TYPE(dispatchable) != last_type) {
+      PyObject * flag;
+      last_is_sequence = get_optional_attr(
+          reinterpret_cast<PyObject *>(Py_TYPE(dispatchable)),
+          ms.identifiers.ua_sequence.get(), &flag);
+      if (last_is_sequence > 0) {
+        last_is_sequence = PyObject_IsTrue(flag);
+        Py_DECREF(flag);
+      }
+      if (last_is_sequence < 0)
+        return false;
+      last_type = Py_TYPE(dispatchable);
+    }
+    auto value = py_ref::steal(
+        PyObject_GetAttr(dispatchable, ms.identifiers.value.get()));
+    if (!value)
+      return false;
+    auto dispatch_type = py_ref::steal(
+        PyObject_GetAttr(dispatchable, ms.identifiers.type.get()));
+    if (!dispatch_type)
+      return false;
+    auto coercible_obj = py_ref::steal(
+        PyObject_GetAttr(dispatchable, ms.identifiers.coercible.get()));
+    if (!coercible_obj)
+      return false;
+    auto coercible = PyObject_IsTrue(coercible_obj.get());
+    if (coercible < 0)
+      return false;
+
+    if (last_is_sequence) {
+      // The whole sequence is converted as one group of its own
+      dispatchable_group group;
+      group.value_type =
+          py_ref::ref(reinterpret_cast<PyObject *>(Py_TYPE(value.get())));
+      group.dispatch_type = dispatch_type;
+      group.coercible = coercible;
+      group.is_sequence = true;
+      group.values = py_ref::steal(PySequence_List(value.get()));
+      if (!group.values)
+        return false;
+      group.indices.push_back(i);
+      groups.push_back(std::move(group));
+      continue;
+    }
+
+    auto value_type = reinterpret_cast<PyObject *>(Py_TYPE(value.get()));
+    dispatchable_group_key key{
+        value_type, dispatch_type.get(), static_cast<bool>(coercible)};
+    auto it = group_index.find(key);
+    if (it == group_index.end()) {
+      dispatchable_group group;
+      group.value_type = py_ref::ref(value_type);
+      group.dispatch_type = dispatch_type;
+      group.coercible = coercible;
+      group.values = py_ref::steal(PyList_New(0));
+      if (!group.values)
+        return false;
+
+      it = group_index.emplace(key, groups.size()).first;
+      groups.push_back(std::move(group));
+    }
+
+    auto & group = groups[it->second];
+    if (PyList_Append(group.values.get(), value.get()) < 0)
+      return false;
+    group.indices.push_back(i);
+  }
+  return true;
+}
+
+/** Convert dispatchables one homogeneous group at a time
+ *
+ * ``convert_group(group, coerce)`` returns a sequence of the group's
+ * converted values, or ``NotImplemented``, and the results are scattered back
+ * into a tuple in the original order. A ``DispatchableSequence`` is a group
+ * of its own and is replaced by a list of its converted values.
+ */
+template <typename ConvertGroup>
+py_ref convert_grouped(
+    module_state & ms, PyObject * dispatchables_obj, PyObject * coerce,
+    ConvertGroup convert_group) {
+  auto dispatchables = py_ref::steal(PySequence_Tuple(dispatchables_obj));
+  if (!dispatchables)
+    return {};
+
+  std::vector<dispatchable_group> groups;
+  try {
+    if (!group_dispatchables(ms, dispatchables.get(), groups))
+      return {};
+  } catch (std::bad_alloc &) {
+    PyErr_NoMemory();
+    return {};
+  }
+
+  auto output =
+      py_ref::steal(PyTuple_New(PyTuple_GET_SIZE(dispatchables.get())));
+  if (!output)
+    return {};
+
+  for (auto & group : groups) {
+    PyObject * group_coerce =
+        (group.coercible && coerce == Py_True) ? Py_True : Py_False;
+    auto res = convert_group(group, group_coerce);
+    if (!res || res == Py_NotImplemented)
+      return res;
+
+    auto converted = py_ref::steal(PySequence_Fast(
+        res.get(), "__ua_convert_group__ must return a sequence"));
+    if (!converted)
+      return {};
+
+    if (group.is_sequence) {
+      auto converted_list = py_ref::steal(PySequence_List(converted.get()));
+      if (!converted_list)
+        return {};
+
+      if (PyList_GET_SIZE(converted_list.get()) !=
+          PyList_GET_SIZE(group.values.get())) {
+        PyErr_SetString(
+            PyExc_ValueError,
+            "__ua_convert_group__ must return one value per input value");
+        return {};
+      }
+
+      PyTuple_SET_ITEM(
+          output.get(), group.indices[0], converted_list.release());
+      continue;
+    }
+
+    const auto size =
+        static_cast<size_t>(PySequence_Fast_GET_SIZE(converted.get()));
+    if (size != group.indices.size()) {
+      PyErr_SetString(
+          PyExc_ValueError,
+          "__ua_convert_group__ must return one value per input value");
+      return {};
+    }
+
+    for (size_t i = 0; i < size; ++i) {
+      auto item = PySequence_Fast_GET_ITEM(converted.get(), i);
+      Py_INCREF(item);
+      PyTuple_SET_ITEM(output.get(), group.indices[i], item);
+    }
+  }
+
+  return output;
+}
+
+/** Convert dispatchables through ``__ua_convert_group__``
+ *
+ * The hook is called once per group with the signature
+ * ``(values, dispatch_type, coerce)``.
+ */
+py_ref backend_convert_grouped(
+    module_state & ms, PyObject * backend, PyObject * dispatchables,
+    PyObject * coerce) {
+  return convert_grouped(
+      ms, dispatchables, coerce,
+      [&](const dispatchable_group & group, PyObject * group_coerce) {
+        PyObject * convert_args[] = {
+            backend, group.values.get(), group.dispatch_type.get(),
+            group_coerce};
+        return py_ref::steal(PyObject_VectorcallMethod(
+            ms.identifiers.ua_convert_group.get(), convert_args,
+            array_size(convert_args) | PY_VECTORCALL_ARGUMENTS_OFFSET,
+            nullptr));
+      });
+}
+
+/** Convert dispatchables with the ``convert`` hook of a native backend
+ *
+ * The hook is called once per value. Without a hook, values are passed
+ * through unchanged.
+ */
+py_ref native_backend_convert(
+    module_state & ms, NativeBackend * backend, PyObject * dispatchables,
+    PyObject * coerce) {
+  return convert_grouped(
+      ms, dispatchables, coerce,
+      [&](const dispatchable_group & group, PyObject * group_coerce) {
+        if (!backend->convert_)
+          return group.values;
+
+        const auto size = PyList_GET_SIZE(group.values.get());
+        auto output = py_ref::steal(PyList_New(size));
+        if (!output)
+          return output;
+
+        for (Py_ssize_t i = 0; i < size; ++i) {
+          auto value = py_ref::steal(backend->convert_(
+              backend->data_, PyList_GET_ITEM(group.values.get(), i),
+              group.dispatch_type.get(), group_coerce == Py_True));
+          if (!value || value == Py_NotImplemented)
+            return value;
+          PyList_SET_ITEM(output.get(), i, value.release());
+        }
+        return output;
+      });
+}
+
+/** Convert dispatchables to the backend's types, bypassing any cache
+ *
+ * Returns an iterable of converted values, NotImplemented if the backend
+ * doesn't support the conversion, or a null reference on error.
+ */
+py_ref backend_convert_uncached(
+    module_state & ms, PyObject * backend, PyObject * dispatchables,
+    PyObject * coerce) {
+  if (auto native = as_native_backend(ms, backend))
+    return native_backend_convert(ms, native, dispatchables, coerce);
+
+  auto has_grouped = has_attr(backend, ms.identifiers.ua_convert_group.get());
+  if (has_grouped < 0)
+    return {};
+
+  if (has_grouped)
+    return backend_convert_grouped(ms, backend, dispatchables, coerce);
+
+  PyObject * convert_args[] = {backend, dispatchables, coerce};
+  return py_ref::steal(PyObject_VectorcallMethod(
+      ms.identifiers.ua_convert.get(), convert_args,
+      array_size(convert_args) | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr));
+}
+
+/** Convert dispatchables to the backend's types
+ *
+ * Coercing conversions go through the conversion cache, if one is set.
+ */
+py_ref backend_convert(
+    module_state & ms, PyObject * backend, PyObject * dispatchables,
+    PyObject * coerce) {
+  if (coerce != Py_True || !ms.conversion_cache)
+    return backend_convert_uncached(ms, backend, dispatchables, coerce);
+
+  // Keep the cache alive in case it is replaced during the call
+  auto cache = ms.conversion_cache;
+  PyObject * convert_args[] = {cache.get(), backend, dispatchables};
+  return py_ref::steal(PyObject_VectorcallMethod(
+      ms.identifiers.convert.get(), convert_args,
+      array_size(convert_args) | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr));
+}
+
+struct py_func_args {
+  py_ref args, kwargs;
+};
+
+/** Arguments of a multimethod call
+ *
+ * Arguments are held in vectorcall form (a C array of positional arguments
+ * followed by keyword values, plus a tuple of keyword names) for as long as
+ * possible, so they can be forwarded to implementations without copying. The
+ * (args, kwargs) tuple/dict form is only created when something asks for it,
+ * e.g. the argument replacer or a backend using the tuple protocol.
+ */
+class call_args {
+  PyObject * const * vector_ = nullptr; // Borrowed arguments vector
+  Py_ssize_t nargs_ = 0;
+  PyObject * kwnames_ = nullptr; // Borrowed, or owned by kwnames_owner_
+  py_ref kwnames_owner_;
+  std::vector<PyObject *> storage_; // Backs vector_ if it was rebuilt
+  py_ref args_, kwargs_;            // Tuple form, if created
+  bool has_vector_ = false;
+
+public:
+  call_args() = default;
+  call_args(const call_args &) = delete;
+  call_args(call_args &&) = default;
+  call_args & operator=(const call_args &) = delete;
+  call_args & operator=(call_args &&) = default;
+
+  /** View of a vectorcall argument vector, which must outlive this object */
+  static call_args from_vector(
+      PyObject * const * args, Py_ssize_t nargs, PyObject * kwnames) {
+    call_args output;
+    output.vector_ = args;
+    output.nargs_ = nargs;
+    if (kwnames && PyTuple_GET_SIZE(kwnames) > 0)
+      output.kwnames_ = kwnames;
+    output.has_vector_ = true;
+    return output;
+  }
+
+  /** Arguments built from a copy of the given argument vector */
+  static call_args from_storage(
+      std::vector<PyObject *> && storage, Py_ssize_t nargs, py_ref kwnames) {
+    call_args output;
+    output.storage_ = std::move(storage);
+    output.nargs_ = nargs;
+    if (kwnames && PyTuple_GET_SIZE(kwnames.get()) > 0)
+      output.kwnames_owner_ = std::move(kwnames);
+    output.kwnames_ = output.kwnames_owner_.get();
+    output.vector_ = output.storage_.data();
+    output.has_vector_ = true;
+    return output;
+  }
+
+  static call_args from_tuple(py_ref args, py_ref kwargs) {
+    call_args output;
+    output.args_ = std::move(args);
+    output.kwargs_ = std::move(kwargs);
+    return output;
+  }
+
+  /** Create the vectorcall form, if needed. Returns false on error. */
+  bool ensure_vector() {
+    if (has_vector_)
+      return true;
+
+    nargs_ = PyTuple_GET_SIZE(args_.get());
+    auto nkwargs = kwargs_ ? PyDict_GET_SIZE(kwargs_.get()) : 0;
+    if (nkwargs == 0) {
+      // Tuple items are contiguous, so they can be used directly
+      vector_ = &PyTuple_GET_ITEM(args_.get(), 0);
+      has_vector_ = true;
+      return true;
+    }
+
+    kwnames_owner_ = py_ref::steal(PyTuple_New(nkwargs));
+    kwnames_ = kwnames_owner_.get();
+    if (!kwnames_)
+      return false;
+
+    try {
+      storage_.resize(nargs_ + nkwargs);
+    } catch (std::bad_alloc &) {
+      PyErr_NoMemory();
+      return false;
+    }
+
+    for (Py_ssize_t i = 0; i < nargs_; ++i) {
+      storage_[i] = PyTuple_GET_ITEM(args_.get(), i);
+    }
+
+    PyObject *key, *value;
+    Py_ssize_t pos = 0, i = 0;
+    while (PyDict_Next(kwargs_.get(), &pos, &key, &value)) {
+      Py_INCREF(key);
+      PyTuple_SET_ITEM(kwnames_, i, key);
+      storage_[nargs_ + i] = value;
+      ++i;
+    }
+
+    vector_ = storage_.data();
+    has_vector_ = true;
+    return true;
+  }
+
+  /** Positional arguments as a tuple, or nullptr on error */
+  PyObject * args_tuple() {
+    if (args_)
+      return args_.get();
+
+    args_ = py_ref::steal(PyTuple_New(nargs_));
+    if (!args_)
+      return nullptr;
+
+    for (Py_ssize_t i = 0; i < nargs_; ++i) {
+      Py_INCREF(vector_[i]);
+      PyTuple_SET_ITEM(args_.get(), i, vector_[i]);
+    }
+    return args_.get();
+  }
+
+  /** Keyword arguments as a dict, or nullptr on error */
+  PyObject * kwargs_dict() {
+    if (kwargs_)
+      return kwargs_.get();
+
+    auto kwargs = py_ref::steal(PyDict_New());
+    if (!kwargs)
+      return nullptr;
+
+    for (Py_ssize_t i = 0; i < nkwargs(); ++i) {
+      if (PyDict_SetItem(
+              kwargs.get(), PyTuple_GET_ITEM(kwnames_, i),
+              vector_[nargs_ + i]) < 0)
+        return nullptr;
+    }
+    kwargs_ = std::move(kwargs);
+    return kwargs_.get();
+  }
+
+  /** Call ``callable(*args, **kwargs)`` using vectorcall */
+  py_ref call(PyObject * callable) {
+    if (!ensure_vector())
+      return {};
+
+    return py_ref::steal(
+        PyObject_Vectorcall(callable, vector_, nargs_, kwnames_));
+  }
+
+  /** Call ``func(vector, nargs, kwnames)`` with the vectorcall form */
+  template <typename Func>
+  py_ref call_vector(Func func) {
+    if (!ensure_vector())
+      return {};
+
+    return py_ref::steal(func(vector_, nargs_, kwnames_));
+  }
+
+  /** Call ``self.name(*prefix, *args, **kwargs)`` using vectorcall */
+  template <size_t N>
+  py_ref call_method(PyObject * name, PyObject * const (&prefix)[N]) {
+    if (!ensure_vector())
+      return {};
+
+    const auto size = N + nargs_ + nkwargs();
+    SmallDynamicArray<PyObject *, 8> method_args;
+    try {
+      method_args = SmallDynamicArray<PyObject *, 8>(size);
+    } catch (std::bad_alloc &) {
+      PyErr_NoMemory();
+      return {};
+    }
+
+    std::copy(prefix, prefix + N, method_args.begin());
+    std::copy(vector_, vector_ + (size - N), method_args.begin() + N);
+    return py_ref::steal(PyObject_VectorcallMethod(
+        name, method_args.begin(),
+        (N + nargs_) | PY_VECTORCALL_ARGUMENTS_OFFSET, kwnames_));
+  }
+
+  Py_ssize_t nargs() const {
+    return has_vector_ ? nargs_ : PyTuple_GET_SIZE(args_.get());
+  }
+
+  Py_ssize_t nkwargs() const {
+    if (!has_vector_)
+      return kwargs_ ? PyDict_GET_SIZE(kwargs_.get()) : 0;
+    return kwnames_ ? PyTuple_GET_SIZE(kwnames_) : 0;
+  }
+};
+
+enum class ReplaceResult { Error, NotImplemented, Unchanged, Replaced };
+
+/** A backend that may be called, with the options it was selected with */
+struct backend_candidate {
+  py_ref backend;
+  bool coerce;
+};
+
+/** What selects a backend for a call, when selecting by cost or by route */
+struct dispatch_signature {
+  py_ref dispatchables; // Tuple of the extracted dispatchables
+  py_ref types;         // Tuple of the types of their values
+  py_ref backends;      // Tuple of the (backend, coerce) candidates
+};
+
+struct Function {
+  PyObject_HEAD
+  module_state * ms_;            // state of the defining module
+  py_ref extractor_, replacer_;  // functions to handle dispatchables
+  std::string domain_key_;       // associated __ua_domain__ in UTF8
+  py_ref def_args_, def_kwargs_; // default arguments
+  py_ref def_impl_;              // default implementation
+  py_ref dict_;                  // __dict__
+  py_ref cost_cache_;            // Backend orders chosen by order_by_cost
+  std::atomic<frozen_route *> frozen_route_{nullptr}; // See get_frozen_route
+
+  vectorcallfunc vectorcall_;
+
+  PyObject * call(
+      PyObject * const * args, Py_ssize_t nargs, PyObject * kwnames);
+  PyObject * acall(
+      PyObject * const * args, Py_ssize_t nargs, PyObject * kwnames);
+
+  ReplaceResult replace_dispatchables(
+      PyObject * backend, call_args & args, PyObject * coerce,
+      call_args & replaced, PyObject * dispatchables = nullptr);
+
+  bool canonicalize(
+      PyObject * const * args, Py_ssize_t nargs, PyObject * kwnames,
+      call_args & output);
+  py_ref canonicalize_kwargs(PyObject * kwargs);
+
+  bool get_signature(
+      const std::vector<backend_candidate> & candidates, call_args & args,
+      dispatch_signature & sig);
+  bool order_by_cost(
+      const std::vector<backend_candidate> & candidates,
+      const dispatch_signature & sig, std::vector<size_t> & order);
+  bool apply_route(const dispatch_signature & sig, std::vector<size_t> & order);
+  bool report_dispatch(const dispatch_signature & sig, size_t index);
+  LoopReturn get_candidates(
+      call_args & args, std::vector<backend_candidate> & candidates,
+      std::vector<size_t> & order, dispatch_signature & sig);
+  const frozen_route * get_frozen_route();
+
+  static void dealloc(Function * self) {
+    PyObject_GC_UnTrack(self);
+    auto type = Py_TYPE(self);
+    auto tp_free = type->tp_free;
+    delete self->frozen_route_.load();
+    self->~Function();
+    tp_free(self);
+    Py_DECREF(type);
+  }
+
+  static PyObject * new_(
+      PyTypeObject * type, PyObject * args, PyObject * kwargs) {
+    auto self = reinterpret_cast<Function *>(type->tp_alloc(type, 0));
+    if (self == nullptr)
+      return nullptr;
+
+    // Placement new
+    self = new (self) Function;
+    self->ms_ = &get_module_state(type);
+    self->vectorcall_ = Function::vectorcall;
+    // Multimethods are typically module globals called from every thread
+    enable_deferred_refcount(reinterpret_cast<PyObject *>(self));
+    return reinterpret_cast<PyObject *>(self);
+  }
+
+  static int init(Function * self, PyObject * args, PyObject * /*kwargs*/) {
+    PyObject *extractor, *replacer;
+    PyObject * domain;
+    PyObject *def_args, *def_kwargs;
+    PyObject * def_impl;
+
+    if (!PyArg_ParseTuple(
             args, "OOO!O!O!O", &extractor, &replacer, &PyUnicode_Type, &domain,
             &PyTuple_Type, &def_args, &PyDict_Type, &def_kwargs, &def_impl)) {
       return -1;
@@ -1134,7 +2314,15 @@ struct Function {
     return 0;
   }
 
+  static PyObject * vectorcall(
+      PyObject * self, PyObject * const * args, size_t nargsf,
+      PyObject * kwnames);
+  static PyObject * acall_(
+      Function * self, PyObject * const * args, Py_ssize_t nargs,
+      PyObject * kwnames);
   static PyObject * repr(Function * self);
+  static PyObject * reduce_(Function * self, PyObject * /* args */);
+  static PyObject * replace_dispatchables_(Function * self, PyObject * args);
   static PyObject * descr_get(PyObject * self, PyObject * obj, PyObject * type);
   static int traverse(Function * self, visitproc visit, void * arg);
   static int clear(Function * self);
@@ -1151,24 +2339,75 @@ bool is_default(PyObject * value, PyObject * def) {
 }
 
 
-py_ref Function::canonicalize_args(PyObject * args) {
-  const auto arg_size = PyTuple_GET_SIZE(args);
+/** Strip arguments that have their default values
+ *
+ * The output only copies the argument vector if something was removed.
+ */
+bool Function::canonicalize(
+    PyObject * const * args, Py_ssize_t nargs, PyObject * kwnames,
+    call_args & output) {
   const auto def_size = PyTuple_GET_SIZE(def_args_.get());
 
-  if (arg_size > def_size)
-    return py_ref::ref(args);
+  Py_ssize_t new_nargs = nargs;
+  if (nargs <= def_size) {
+    new_nargs = 0;
+    for (Py_ssize_t i = nargs - 1; i >= 0; --i) {
+      auto def = PyTuple_GET_ITEM(def_args_.get(), i);
+      if (!is_default(args[i], def)) {
+        new_nargs = i + 1;
+        break;
+      }
+    }
+  }
 
-  Py_ssize_t mismatch = 0;
-  for (Py_ssize_t i = arg_size - 1; i >= 0; --i) {
-    auto val = PyTuple_GET_ITEM(args, i);
-    auto def = PyTuple_GET_ITEM(def_args_.get(), i);
-    if (!is_default(val, def)) {
-      mismatch = i + 1;
-      break;
+  const Py_ssize_t nkwargs = kwnames ? PyTuple_GET_SIZE(kwnames) : 0;
+  Py_ssize_t num_default_kwargs = 0;
+  for (Py_ssize_t i = 0; i < nkwargs; ++i) {
+    auto def = PyDict_GetItemWithError(
+        def_kwargs_.get(), PyTuple_GET_ITEM(kwnames, i));
+    if (!def && PyErr_Occurred())
+      return false;
+
+    if (def && is_default(args[nargs + i], def))
+      ++num_default_kwargs;
+  }
+
+  if (new_nargs == nargs && num_default_kwargs == 0) {
+    output = call_args::from_vector(args, nargs, kwnames);
+    return true;
+  }
+
+  std::vector<PyObject *> storage;
+  py_ref new_kwnames;
+  try {
+    storage.assign(args, args + new_nargs);
+    storage.reserve(new_nargs + nkwargs - num_default_kwargs);
+    if (nkwargs > num_default_kwargs) {
+      new_kwnames = py_ref::steal(PyTuple_New(nkwargs - num_default_kwargs));
+      if (!new_kwnames)
+        return false;
+    }
+
+    Py_ssize_t idx = 0;
+    for (Py_ssize_t i = 0; i < nkwargs; ++i) {
+      auto key = PyTuple_GET_ITEM(kwnames, i);
+      auto value = args[nargs + i];
+      auto def = PyDict_GetItemWithError(def_kwargs_.get(), key);
+      if (def && is_default(value, def))
+        continue;
+
+      Py_INCREF(key);
+      PyTuple_SET_ITEM(new_kwnames.get(), idx++, key);
+      storage.push_back(value);
     }
+  } catch (std::bad_alloc &) {
+    PyErr_NoMemory();
+    return false;
   }
 
-  return py_ref::steal(PyTuple_GetSlice(args, 0, mismatch));
+  output = call_args::from_storage(
+      std::move(storage), new_nargs, std::move(new_kwnames));
+  return true;
 }
 
 
@@ -1188,48 +2427,58 @@ py_ref Function::canonicalize_kwargs(PyObject * kwargs) {
 }
 
 
-py_func_args Function::replace_dispatchables(
-    PyObject * backend, PyObject * args, PyObject * kwargs, PyObject * coerce) {
-  auto has_ua_convert =
-      PyObject_HasAttr(backend, identifiers.ua_convert->get());
+ReplaceResult Function::replace_dispatchables(
+    PyObject * backend, call_args & args, PyObject * coerce,
+    call_args & replaced, PyObject * dispatchables) {
+  auto & ms = *ms_;
+  auto has_ua_convert = backend_has_convert(ms, backend);
+  if (has_ua_convert < 0)
+    return ReplaceResult::Error;
   if (!has_ua_convert) {
-    return {py_ref::ref(args), py_ref::ref(kwargs)};
+    return ReplaceResult::Unchanged;
   }
 
-  auto dispatchables =
-      py_ref::steal(PyObject_Call(extractor_.get(), args, kwargs));
-  if (!dispatchables)
-    return {};
+  // Reuse the dispatchables already extracted for the signature, if any
+  py_ref extracted;
+  if (!dispatchables) {
+    extracted = args.call(extractor_.get());
+    if (!extracted)
+      return ReplaceResult::Error;
+    dispatchables = extracted.get();
+  }
 
-  PyObject * convert_args[] = {backend, dispatchables.get(), coerce};
-  auto res = py_ref::steal(PyObject_VectorcallMethod(
-      identifiers.ua_convert->get(), convert_args,
-      array_size(convert_args) | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr));
+  auto res = backend_convert(ms, backend, dispatchables, coerce);
   if (!res) {
-    return {};
+    return ReplaceResult::Error;
   }
 
   if (res == Py_NotImplemented) {
-    return {std::move(res), nullptr};
+    return ReplaceResult::NotImplemented;
   }
 
   auto replaced_args = py_ref::steal(PySequence_Tuple(res.get()));
   if (!replaced_args)
-    return {};
+    return ReplaceResult::Error;
 
-  PyObject * replacer_args[] = {nullptr, args, kwargs, replaced_args.get()};
+  auto args_tuple = args.args_tuple();
+  auto kwargs_dict = args.kwargs_dict();
+  if (!args_tuple || !kwargs_dict)
+    return ReplaceResult::Error;
+
+  PyObject * replacer_args[] = {
+      nullptr, args_tuple, kwargs_dict, replaced_args.get()};
   res = py_ref::steal(PyObject_Vectorcall(
       replacer_.get(), &replacer_args[1],
       (array_size(replacer_args) - 1) | PY_VECTORCALL_ARGUMENTS_OFFSET,
       nullptr));
   if (!res)
-    return {};
+    return ReplaceResult::Error;
 
   if (!PyTuple_Check(res.get()) || PyTuple_Size(res.get()) != 2) {
     PyErr_SetString(
         PyExc_TypeError,
         "Argument replacer must return a 2-tuple (args, kwargs)");
-    return {};
+    return ReplaceResult::Error;
   }
 
   auto new_args = py_ref::ref(PyTuple_GET_ITEM(res.get(), 0));
@@ -1239,15 +2488,19 @@ py_func_args Function::replace_dispatchables(
 
   if (!PyTuple_Check(new_args.get()) || !PyDict_Check(new_kwargs.get())) {
     PyErr_SetString(PyExc_ValueError, "Invalid return from argument_replacer");
-    return {};
+    return ReplaceResult::Error;
   }
 
-  return {std::move(new_args), std::move(new_kwargs)};
+  replaced = call_args::from_tuple(std::move(new_args), std::move(new_kwargs));
+  return ReplaceResult::Replaced;
 }
 
 
-PyObject * Function_call(Function * self, PyObject * args, PyObject * kwargs) {
-  return self->call(args, kwargs);
+PyObject * Function::vectorcall(
+    PyObject * self, PyObject * const * args, size_t nargsf,
+    PyObject * kwnames) {
+  return reinterpret_cast<Function *>(self)->call(
+      args, PyVectorcall_NARGS(nargsf), kwnames);
 }
 
 class py_errinf {
@@ -1287,77 +2540,528 @@ private:
 };
 
 
-PyObject * Function::call(PyObject * args_, PyObject * kwargs_) {
-  auto args = canonicalize_args(args_);
-  auto kwargs = canonicalize_kwargs(kwargs_);
+/** Result of looking up a multimethod in a backend's implementation table */
+struct backend_implementation {
+  py_ref impl;            // The implementation, if listed
+  bool has_table = false; // Whether the backend has __ua_implementations__
+};
+
+/** Look up ``method`` in ``backend.__ua_implementations__``
+ *
+ * Returns an empty implementation if the backend doesn't declare an
+ * implementation table or ``method`` isn't listed in it. On error, the
+ * Python exception is set and ``has_table`` is true with no ``impl``.
+ */
+backend_implementation backend_get_implementation(
+    module_state & ms, PyObject * backend, PyObject * method) {
+  backend_implementation output;
+  PyObject * table_obj;
+  auto has_table = get_optional_attr(
+      backend, ms.identifiers.ua_implementations.get(), &table_obj);
+  if (has_table <= 0) {
+    output.has_table = (has_table < 0);
+    return output;
+  }
+  output.has_table = true;
+  auto table = py_ref::steal(table_obj);
+
+  if (PyDict_CheckExact(table.get())) {
+    output.impl = py_ref::ref(PyDict_GetItemWithError(table.get(), method));
+    return output;
+  }
+
+  output.impl = py_ref::steal(PyObject_GetItem(table.get(), method));
+  if (!output.impl && PyErr_ExceptionMatches(PyExc_KeyError))
+    PyErr_Clear();
+  return output;
+}
+
+/** Whether the backend opted into the vectorcall ``__ua_function__`` protocol
+ *
+ * Returns -1 on error.
+ */
+int backend_uses_vectorcall(module_state & ms, PyObject * backend) {
+  PyObject * flag_obj;
+  auto found =
+      get_optional_attr(backend, ms.identifiers.ua_vectorcall.get(), &flag_obj);
+  if (found <= 0)
+    return found;
+
+  auto flag = py_ref::steal(flag_obj);
+  return PyObject_IsTrue(flag.get());
+}
+
+/** Call the backend's implementation of ``method`` with the given arguments
+ *
+ * Implementations listed in ``__ua_implementations__`` are called directly,
+ * anything else goes through ``__ua_function__``.
+ */
+py_ref backend_call_function(
+    module_state & ms, PyObject * backend, PyObject * method,
+    call_args & args) {
+  if (auto native = as_native_backend(ms, backend)) {
+    return args.call_vector([&](PyObject * const * vector, Py_ssize_t nargs,
+                                PyObject * kwnames) {
+      return native->function_(native->data_, method, vector, nargs, kwnames);
+    });
+  }
+
+  auto found = backend_get_implementation(ms, backend, method);
+  if (found.impl)
+    return args.call(found.impl.get());
+
+  if (PyErr_Occurred())
+    return {};
+
+  if (found.has_table &&
+      !PyObject_HasAttr(backend, ms.identifiers.ua_function.get())) {
+    // Only an implementation table, so this method isn't supported
+    return py_ref::ref(Py_NotImplemented);
+  }
+
+  auto use_vectorcall = backend_uses_vectorcall(ms, backend);
+  if (use_vectorcall < 0)
+    return {};
+
+  if (use_vectorcall) {
+    PyObject * const prefix[] = {backend, method};
+    return args.call_method(ms.identifiers.ua_function.get(), prefix);
+  }
+
+  auto args_tuple = args.args_tuple();
+  auto kwargs_dict = args.kwargs_dict();
+  if (!args_tuple || !kwargs_dict)
+    return {};
+
+  PyObject * call_args[] = {backend, method, args_tuple, kwargs_dict};
+  return py_ref::steal(PyObject_VectorcallMethod(
+      ms.identifiers.ua_function.get(), call_args,
+      array_size(call_args) | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr));
+}
+
+
+/** The backend's estimated cost of calling ``method``
+ *
+ * Backends without ``__ua_cost__``, or that return ``None`` or
+ * ``NotImplemented`` from it, have an infinite cost.
+ */
+bool backend_get_cost(
+    module_state & ms, PyObject * backend, PyObject * method,
+    PyObject * dispatchables, double & cost) {
+  cost = std::numeric_limits<double>::infinity();
+
+  PyObject * cost_func_obj;
+  auto found =
+      get_optional_attr(backend, ms.identifiers.ua_cost.get(), &cost_func_obj);
+  if (found <= 0)
+    return (found == 0);
+
+  auto cost_func = py_ref::steal(cost_func_obj);
+  auto result = py_ref::steal(PyObject_CallFunctionObjArgs(
+      cost_func.get(), method, dispatchables, nullptr));
+  if (!result)
+    return false;
+
+  if (result == Py_None || result == Py_NotImplemented)
+    return true;
+
+  cost = PyFloat_AsDouble(result.get());
+  return !(cost == -1.0 && PyErr_Occurred());
+}
+
+/** Size bucket of the dispatched values, the bit length of their total size
+ *
+ * The size of a value is its ``nbytes`` if it has one, otherwise its
+ * ``len()``, otherwise zero. Returns -1 on error.
+ */
+int dispatchables_size_bucket(module_state & ms, PyObject * dispatchables) {
+  size_t total = 0;
+  for (Py_ssize_t i = 0; i < PyTuple_GET_SIZE(dispatchables); ++i) {
+    auto value = py_ref::steal(PyObject_GetAttr(
+        PyTuple_GET_ITEM(dispatchables, i), ms.identifiers.value.get()));
+    if (!value)
+      return -1;
+
+    PyObject * nbytes_obj;
+    auto has_nbytes = get_optional_attr(
+        value.get(), ms.identifiers.nbytes.get(), &nbytes_obj);
+    if (has_nbytes < 0)
+      return -1;
+
+    Py_ssize_t size;
+    if (has_nbytes) {
+      auto nbytes = py_ref::steal(nbytes_obj);
+      size = PyLong_Check(nbytes.get()) ? PyLong_AsSsize_t(nbytes.get()) : -1;
+    } else {
+      size = PyObject_Size(value.get());
+    }
+
+    if (size < 0) {
+      // Unsized values and errors from buggy ``nbytes`` don't count
+      PyErr_Clear();
+      continue;
+    }
+    total += static_cast<size_t>(size);
+  }
+
+  int bucket = 0;
+  for (; total != 0; total >>= 1)
+    ++bucket;
+  return bucket;
+}
+
+/** Fill in the signature of a call to this multimethod with ``candidates`` */
+bool Function::get_signature(
+    const std::vector<backend_candidate> & candidates, call_args & args,
+    dispatch_signature & sig) {
+  auto & ms = *ms_;
+  auto dispatchables_obj = args.call(extractor_.get());
+  if (!dispatchables_obj)
+    return false;
+  sig.dispatchables = py_ref::steal(PySequence_Tuple(dispatchables_obj.get()));
+  if (!sig.dispatchables)
+    return false;
+
+  const auto num_dispatchables = PyTuple_GET_SIZE(sig.dispatchables.get());
+  sig.types = py_ref::steal(PyTuple_New(num_dispatchables));
+  if (!sig.types)
+    return false;
+  for (Py_ssize_t i = 0; i < num_dispatchables; ++i) {
+    auto value = py_ref::steal(PyObject_GetAttr(
+        PyTuple_GET_ITEM(sig.dispatchables.get(), i),
+        ms.identifiers.value.get()));
+    if (!value)
+      return false;
+    auto value_type = reinterpret_cast<PyObject *>(Py_TYPE(value.get()));
+    Py_INCREF(value_type);
+    PyTuple_SET_ITEM(sig.types.get(), i, value_type);
+  }
+
+  sig.backends = py_ref::steal(PyTuple_New(candidates.size()));
+  if (!sig.backends)
+    return false;
+  for (size_t i = 0; i < candidates.size(); ++i) {
+    auto entry =
+        py_make_tuple(candidates[i].backend, py_bool(candidates[i].coerce));
+    if (!entry)
+      return false;
+    PyTuple_SET_ITEM(sig.backends.get(), i, entry.release());
+  }
+  return true;
+}
+
+/** Order ``candidates`` by the cost they estimate for calling this multimethod
+ *
+ * Candidates with the same cost stay in their original order. Orders are
+ * cached for the types and the size bucket of the dispatched values, and
+ * the list of candidates.
+ */
+bool Function::order_by_cost(
+    const std::vector<backend_candidate> & candidates,
+    const dispatch_signature & sig, std::vector<size_t> & order) {
+  auto & ms = *ms_;
+  auto bucket = dispatchables_size_bucket(ms, sig.dispatchables.get());
+  if (bucket < 0)
+    return false;
+
+  auto bucket_obj = py_ref::steal(PyLong_FromLong(bucket));
+  if (!bucket_obj)
+    return false;
+  auto key = py_make_tuple(sig.types, bucket_obj, sig.backends);
+  if (!key)
+    return false;
+
+  if (!cost_cache_) {
+    cost_cache_ = py_ref::steal(PyDict_New());
+    if (!cost_cache_)
+      return false;
+  }
+
+  // Unhashable backends just aren't cached
+  bool cacheable = true;
+  auto cached = PyDict_GetItemWithError(cost_cache_.get(), key.get());
+  if (!cached && PyErr_Occurred()) {
+    if (!PyErr_ExceptionMatches(PyExc_TypeError))
+      return false;
+    PyErr_Clear();
+    cacheable = false;
+  }
+
+  if (cached) {
+    for (size_t i = 0; i < order.size(); ++i)
+      order[i] = PyLong_AsSize_t(PyTuple_GET_ITEM(cached, i));
+    return true;
+  }
+
+  std::vector<double> costs;
+  try {
+    costs.resize(candidates.size());
+  } catch (std::bad_alloc &) {
+    PyErr_NoMemory();
+    return false;
+  }
+  for (size_t i = 0; i < candidates.size(); ++i) {
+    if (!backend_get_cost(
+            ms, candidates[i].backend.get(), reinterpret_cast<PyObject *>(this),
+            sig.dispatchables.get(), costs[i]))
+      return false;
+  }
+
+  std::stable_sort(order.begin(), order.end(), [&](size_t a, size_t b) {
+    return costs[a] < costs[b];
+  });
+
+  if (!cacheable)
+    return true;
+
+  auto order_obj = py_ref::steal(PyTuple_New(order.size()));
+  if (!order_obj)
+    return false;
+  for (size_t i = 0; i < order.size(); ++i) {
+    auto index = PyLong_FromSize_t(order[i]);
+    if (!index)
+      return false;
+    PyTuple_SET_ITEM(order_obj.get(), i, index);
+  }
+
+  // Keep the cache bounded, the common case only has a few keys
+  constexpr Py_ssize_t max_cost_cache_size = 256;
+  if (PyDict_GET_SIZE(cost_cache_.get()) >= max_cost_cache_size)
+    PyDict_Clear(cost_cache_.get());
+
+  return PyDict_SetItem(cost_cache_.get(), key.get(), order_obj.get()) == 0;
+}
+
+/** Move the candidate routed to by the loaded dispatch profile to the front
+ *
+ * Routes are keyed by the multimethod, the types of the dispatched values
+ * and the list of candidates.
+ */
+bool Function::apply_route(
+    const dispatch_signature & sig, std::vector<size_t> & order) {
+  auto & ms = *ms_;
+  auto key = py_make_tuple(
+      reinterpret_cast<PyObject *>(this), sig.types, sig.backends);
+  if (!key)
+    return false;
+
+  auto routes = ms.dispatch_routes;
+  auto route = PyDict_GetItemWithError(routes.get(), key.get());
+  if (!route) {
+    if (!PyErr_Occurred())
+      return true;
+    // Unhashable backends can't have routes
+    if (!PyErr_ExceptionMatches(PyExc_TypeError))
+      return false;
+    PyErr_Clear();
+    return true;
+  }
+
+  auto index = PyLong_AsSize_t(route);
+  if (index == static_cast<size_t>(-1) && PyErr_Occurred())
+    return false;
+
+  auto it = std::find(order.begin(), order.end(), index);
+  if (it != order.end())
+    std::rotate(order.begin(), it, it + 1);
+  return true;
+}
+
+/** The route to dispatch along, if the global backends are frozen
+ *
+ * Built on the first call after freeze_backends, and kept for later calls.
+ * Returns null if building the route failed, in which case dispatch looks
+ * the domains up as usual.
+ */
+const frozen_route * Function::get_frozen_route() {
+  auto & ms = *ms_;
+  auto frozen = ms.frozen.load(std::memory_order_acquire);
+  if (!frozen)
+    return nullptr;
+
+  auto route = frozen_route_.load(std::memory_order_acquire);
+  if (route)
+    return route;
+
+  std::unique_ptr<frozen_route> new_route;
+  try {
+    new_route.reset(new frozen_route);
+    std::string domain = domain_key_;
+    while (true) {
+      auto itr = frozen->globals.find(domain);
+      new_route->chain.push_back(
+          {domain,
+           itr == frozen->globals.end() ? &no_global_backends : &itr->second});
+
+      // The same walk as for_each_backend
+      auto dot_pos = domain.rfind('.');
+      if (dot_pos == std::string::npos || dot_pos == 0)
+        break;
+      domain.resize(dot_pos);
+    }
+  } catch (std::bad_alloc &) {
+    return nullptr;
+  }
+
+  // Another thread may have built it meanwhile
+  if (frozen_route_.compare_exchange_strong(route, new_route.get()))
+    return new_route.release();
+  return route;
+}
+
+/** Collect the backends that may serve a call, and the order to try them in
+ *
+ * Returns ``Break`` if a backend was set with ``only`` or ``coerce``, so the
+ * default implementation must not be called without a backend.
+ */
+LoopReturn Function::get_candidates(
+    call_args & args, std::vector<backend_candidate> & candidates,
+    std::vector<size_t> & order, dispatch_signature & sig) {
+  auto & ms = *ms_;
+  auto ret = for_each_backend(
+      ms, domain_key_,
+      [&](PyObject * backend, bool coerce) {
+        try {
+          candidates.push_back({py_ref::ref(backend), coerce});
+        } catch (std::bad_alloc &) {
+          PyErr_NoMemory();
+          return LoopReturn::Error;
+        }
+        return LoopReturn::Continue;
+      },
+      get_frozen_route());
+  if (ret == LoopReturn::Error)
+    return ret;
+
+  try {
+    order.resize(candidates.size());
+  } catch (std::bad_alloc &) {
+    PyErr_NoMemory();
+    return LoopReturn::Error;
+  }
+  for (size_t i = 0; i < order.size(); ++i)
+    order[i] = i;
+
+  if (candidates.empty())
+    return ret;
+
+  const bool by_cost =
+      ms.selection_mode.load(std::memory_order_relaxed) == SelectionMode::Cost;
+  if (!get_signature(candidates, args, sig) ||
+      (by_cost && !order_by_cost(candidates, sig, order)) ||
+      (ms.dispatch_routes && !apply_route(sig, order)))
+    return LoopReturn::Error;
+  return ret;
+}
+
+/** Report the backend that served a call to the dispatch hook */
+bool Function::report_dispatch(const dispatch_signature & sig, size_t index) {
+  auto & ms = *ms_;
+  auto hook = ms.dispatch_hook;
+  if (!hook)
+    return true;
+
+  auto index_obj = py_ref::steal(PyLong_FromSize_t(index));
+  if (!index_obj)
+    return false;
+
+  auto res = py_ref::steal(PyObject_CallFunctionObjArgs(
+      hook.get(), reinterpret_cast<PyObject *>(this), sig.types.get(),
+      sig.backends.get(), index_obj.get(), nullptr));
+  return static_cast<bool>(res);
+}
+
+
+PyObject * Function::call(
+    PyObject * const * args_, Py_ssize_t nargs, PyObject * kwnames) {
+  auto & ms = *ms_;
+  call_args args;
+  if (!canonicalize(args_, nargs, kwnames, args))
+    return nullptr;
 
   py_ref result;
   std::vector<std::pair<py_ref, py_errinf>> errors;
+  dispatch_signature sig; // Only filled in if the candidates are collected
+
+  auto try_backend = [&, this](PyObject * backend, bool coerce) {
+    call_args replaced_args;
+    auto replaced = replace_dispatchables(
+        backend, args, coerce ? Py_True : Py_False, replaced_args,
+        sig.dispatchables.get());
+    if (replaced == ReplaceResult::NotImplemented)
+      return LoopReturn::Continue;
+    if (replaced == ReplaceResult::Error)
+      return LoopReturn::Error;
 
+    auto & new_args =
+        (replaced == ReplaceResult::Replaced) ? replaced_args : args;
+    result = backend_call_function(
+        ms, backend, reinterpret_cast<PyObject *>(this), new_args);
 
-  auto ret =
-      for_each_backend(domain_key_, [&, this](PyObject * backend, bool coerce) {
-        auto new_args = replace_dispatchables(
-            backend, args.get(), kwargs.get(), coerce ? Py_True : Py_False);
-        if (new_args.args == Py_NotImplemented)
-          return LoopReturn::Continue;
-        if (new_args.args == nullptr)
-          return LoopReturn::Error;
+    // raise BackendNotImplemeted is equivalent to return NotImplemented
+    if (!result &&
+        PyErr_ExceptionMatches(ms.BackendNotImplementedError.get())) {
+      errors.push_back({py_ref::ref(backend), py_errinf::fetch()});
+      result = py_ref::ref(Py_NotImplemented);
+    }
 
-        PyObject * args[] = {
-            backend, reinterpret_cast<PyObject *>(this), new_args.args.get(),
-            new_args.kwargs.get()};
-        result = py_ref::steal(PyObject_VectorcallMethod(
-            identifiers.ua_function->get(), args,
-            array_size(args) | PY_VECTORCALL_ARGUMENTS_OFFSET, nullptr));
-
-        // raise BackendNotImplemeted is equivalent to return NotImplemented
-        if (!result &&
-            PyErr_ExceptionMatches(BackendNotImplementedError.get())) {
-          errors.push_back({py_ref::ref(backend), py_errinf::fetch()});
-          result = py_ref::ref(Py_NotImplemented);
-        }
+    // Try the default with this backend
+    if (result == Py_NotImplemented && def_impl_ != Py_None) {
+      backend_options opt;
+      opt.backend = py_ref::ref(backend);
+      opt.coerce = coerce;
+      opt.only = true;
+      context_helper<backend_options, &local_backends::preferred> ctx;
+      if (!ctx.init(domain_key_, std::move(opt)))
+        return LoopReturn::Error;
 
-        // Try the default with this backend
-        if (result == Py_NotImplemented && def_impl_ != Py_None) {
-          backend_options opt;
-          opt.backend = py_ref::ref(backend);
-          opt.coerce = coerce;
-          opt.only = true;
-          context_helper<backend_options> ctx;
-          try {
-            if (!ctx.init(
-                    local_domain_map[domain_key_].preferred, std::move(opt)))
-              return LoopReturn::Error;
-          } catch (std::bad_alloc &) {
-            PyErr_NoMemory();
-            return LoopReturn::Error;
-          }
-
-          if (!ctx.enter())
-            return LoopReturn::Error;
-
-          result = py_ref::steal(PyObject_Call(
-              def_impl_.get(), new_args.args.get(), new_args.kwargs.get()));
-
-          if (PyErr_Occurred() &&
-              PyErr_ExceptionMatches(BackendNotImplementedError.get())) {
-            errors.push_back({py_ref::ref(backend), py_errinf::fetch()});
-            result = py_ref::ref(Py_NotImplemented);
-          }
-
-          if (!ctx.exit())
-            return LoopReturn::Error;
-        }
+      if (!ctx.enter(ms))
+        return LoopReturn::Error;
+
+      result = new_args.call(def_impl_.get());
+
+      if (PyErr_Occurred() &&
+          PyErr_ExceptionMatches(ms.BackendNotImplementedError.get())) {
+        errors.push_back({py_ref::ref(backend), py_errinf::fetch()});
+        result = py_ref::ref(Py_NotImplemented);
+      }
+
+      if (!ctx.exit(ms))
+        return LoopReturn::Error;
+    }
+
+    if (!result)
+      return LoopReturn::Error;
 
-        if (!result)
-          return LoopReturn::Error;
+    if (result == Py_NotImplemented)
+      return LoopReturn::Continue;
 
-        if (result == Py_NotImplemented)
-          return LoopReturn::Continue;
+    return LoopReturn::Break; // Backend called successfully
+  };
 
-        return LoopReturn::Break; // Backend called successfully
-      });
+  LoopReturn ret;
+  const bool by_cost =
+      ms.selection_mode.load(std::memory_order_relaxed) == SelectionMode::Cost;
+  if (by_cost || ms.dispatch_routes || ms.dispatch_hook) {
+    // Collect the candidates first, to reorder or report them
+    std::vector<backend_candidate> candidates;
+    std::vector<size_t> order;
+    ret = get_candidates(args, candidates, order, sig);
+
+    for (size_t i = 0; ret != LoopReturn::Error && i < order.size(); ++i) {
+      auto & candidate = candidates[order[i]];
+      auto candidate_ret =
+          try_backend(candidate.backend.get(), candidate.coerce);
+      if (candidate_ret == LoopReturn::Break && !report_dispatch(sig, order[i]))
+        candidate_ret = LoopReturn::Error;
+      if (candidate_ret != LoopReturn::Continue) {
+        ret = candidate_ret;
+        break;
+      }
+    }
+  } else {
+    ret = for_each_backend(ms, domain_key_, try_backend, get_frozen_route());
+  }
 
   if (ret == LoopReturn::Error)
     return nullptr;
@@ -1368,10 +3072,9 @@ PyObject * Function::call(PyObject * args_, PyObject * kwargs_) {
   // Last resort, try calling default implementation directly
   // Only call if no backend was marked only or coerce
   if (ret == LoopReturn::Continue && def_impl_ != Py_None) {
-    result =
-        py_ref::steal(PyObject_Call(def_impl_.get(), args.get(), kwargs.get()));
+    result = args.call(def_impl_.get());
     if (!result) {
-      if (!PyErr_ExceptionMatches(BackendNotImplementedError.get()))
+      if (!PyErr_ExceptionMatches(ms.BackendNotImplementedError.get()))
         return nullptr;
 
       errors.push_back({py_ref::ref(Py_None), py_errinf::fetch()});
@@ -1395,11 +3098,117 @@ PyObject * Function::call(PyObject * args_, PyObject * kwargs_) {
 
     PyTuple_SET_ITEM(exception_tuple.get(), i + 1, pair.release());
   }
-  PyErr_SetObject(BackendNotImplementedError.get(), exception_tuple.get());
+  PyErr_SetObject(ms.BackendNotImplementedError.get(), exception_tuple.get());
   return nullptr;
 }
 
 
+/** Start an asynchronous call of this multimethod
+ *
+ * Dispatch is resolved here, in the calling thread and with its backend
+ * state. The resulting steps, the candidate backends with their coerce
+ * flags, are passed on to ``uarray._async._acall``, which returns the
+ * awaitable. Arguments are only converted for a backend once its step is
+ * reached.
+ */
+PyObject * Function::acall(
+    PyObject * const * args_, Py_ssize_t nargs, PyObject * kwnames) {
+  auto & ms = *ms_;
+  call_args args;
+  if (!canonicalize(args_, nargs, kwnames, args))
+    return nullptr;
+
+  std::vector<backend_candidate> candidates;
+  std::vector<size_t> order;
+  dispatch_signature sig;
+  auto ret = get_candidates(args, candidates, order, sig);
+  if (ret == LoopReturn::Error)
+    return nullptr;
+
+  auto steps = py_ref::steal(PyList_New(0));
+  if (!steps)
+    return nullptr;
+
+  for (auto i : order) {
+    auto & candidate = candidates[i];
+    auto step = py_make_tuple(candidate.backend, py_bool(candidate.coerce));
+    if (!step || PyList_Append(steps.get(), step.get()) < 0)
+      return nullptr;
+  }
+
+  if (!ms.async_runner) {
+    auto module = py_ref::steal(PyImport_ImportModule("uarray._async"));
+    if (!module)
+      return nullptr;
+    ms.async_runner =
+        py_ref::steal(PyObject_GetAttrString(module.get(), "_acall"));
+    if (!ms.async_runner)
+      return nullptr;
+  }
+
+  auto args_tuple = args.args_tuple();
+  auto kwargs_dict = args.kwargs_dict();
+  if (!args_tuple || !kwargs_dict)
+    return nullptr;
+
+  // The default may only be called without a backend if none was set with
+  // ``only`` or ``coerce``, as in ``call``
+  auto use_default = py_bool(ret == LoopReturn::Continue);
+  auto dispatchables =
+      sig.dispatchables ? sig.dispatchables : py_ref::ref(Py_None);
+  return PyObject_CallFunctionObjArgs(
+      ms.async_runner.get(), reinterpret_cast<PyObject *>(this), steps.get(),
+      args_tuple, kwargs_dict, dispatchables.get(), use_default.get(), nullptr);
+}
+
+/** Convert the arguments of a call for ``backend``, as dispatch does
+ *
+ * Takes ``(backend, coerce, args, kwargs, dispatchables)``, where
+ * ``dispatchables`` were extracted from the arguments, or None to extract
+ * them. Returns ``(args, kwargs)``, or NotImplemented if the backend doesn't
+ * support the dispatchables.
+ */
+PyObject * Function::replace_dispatchables_(Function * self, PyObject * args) {
+  PyObject *backend, *call_args_tuple, *kwargs, *dispatchables;
+  int coerce;
+  if (!PyArg_ParseTuple(
+          args, "OpO!O!O:_replace_dispatchables", &backend, &coerce,
+          &PyTuple_Type, &call_args_tuple, &PyDict_Type, &kwargs,
+          &dispatchables))
+    return nullptr;
+
+  auto input =
+      call_args::from_tuple(py_ref::ref(call_args_tuple), py_ref::ref(kwargs));
+  call_args replaced_args;
+  auto replaced = self->replace_dispatchables(
+      backend, input, coerce ? Py_True : Py_False, replaced_args,
+      dispatchables == Py_None ? nullptr : dispatchables);
+  switch (replaced) {
+  case ReplaceResult::Error:
+    return nullptr;
+  case ReplaceResult::NotImplemented:
+    Py_RETURN_NOTIMPLEMENTED;
+  case ReplaceResult::Unchanged:
+    return PyTuple_Pack(2, call_args_tuple, kwargs);
+  case ReplaceResult::Replaced:
+    break;
+  }
+
+  auto new_args = replaced_args.args_tuple();
+  auto new_kwargs = replaced_args.kwargs_dict();
+  if (!new_args || !new_kwargs)
+    return nullptr;
+  return PyTuple_Pack(2, new_args, new_kwargs);
+}
+
+
+PyObject * Function::acall_(
+    Function * self, PyObject * const * args, Py_ssize_t nargs,
+    PyObject * kwnames) {
+  return self->acall(args, nargs, kwnames);
+}
+
+
 PyObject * Function::repr(Function * self) {
   if (self->dict_)
     if (auto name = PyDict_GetItemString(self->dict_.get(), "__name__"))
@@ -1423,12 +3232,14 @@ PyObject * Function::descr_get(
 
 /** Make members visible to the garbage collector */
 int Function::traverse(Function * self, visitproc visit, void * arg) {
+  Py_VISIT(Py_TYPE(self));
   Py_VISIT(self->extractor_.get());
   Py_VISIT(self->replacer_.get());
   Py_VISIT(self->def_args_.get());
   Py_VISIT(self->def_kwargs_.get());
   Py_VISIT(self->def_impl_.get());
   Py_VISIT(self->dict_.get());
+  Py_VISIT(self->cost_cache_.get());
   return 0;
 }
 
@@ -1441,6 +3252,7 @@ int Function::clear(Function * self) {
   self->def_kwargs_.reset();
   self->def_impl_.reset();
   self->dict_.reset();
+  self->cost_cache_.reset();
   return 0;
 }
 
@@ -1459,103 +3271,427 @@ PyObject * Function::get_default(Function * self) {
   return self->def_impl_.get();
 }
 
+/** Multimethods are pickled by reference, see ``pickle_function`` */
+PyObject * Function::reduce_(Function * self, PyObject * /* args */) {
+  auto module = py_ref::steal(PyImport_ImportModule("uarray._backend"));
+  if (!module)
+    return nullptr;
+
+  auto pickle_function =
+      py_ref::steal(PyObject_GetAttrString(module.get(), "pickle_function"));
+  if (!pickle_function)
+    return nullptr;
+
+  return PyObject_CallOneArg(
+      pickle_function.get(), reinterpret_cast<PyObject *>(self));
+}
+
 PyObject * Function::get_domain(Function * self) {
   return PyUnicode_FromStringAndSize(
       self->domain_key_.c_str(), self->domain_key_.size());
 }
 
+PyObject * NativeBackend::ua_convert_(
+    NativeBackend * self, PyObject * const * args, Py_ssize_t nargs) {
+  if (nargs != 2) {
+    PyErr_Format(
+        PyExc_TypeError, "__ua_convert__ expected 2 arguments, got %zd", nargs);
+    return nullptr;
+  }
+
+  auto coerce = PyObject_IsTrue(args[1]);
+  if (coerce < 0)
+    return nullptr;
+
+  return native_backend_convert(
+             *self->ms_, self, args[0], coerce ? Py_True : Py_False)
+      .release();
+}
+
+PyObject * NativeBackend::ua_function_(
+    NativeBackend * self, PyObject * const * args, Py_ssize_t nargs) {
+  if (nargs != 3) {
+    PyErr_Format(
+        PyExc_TypeError, "__ua_function__ expected 3 arguments, got %zd",
+        nargs);
+    return nullptr;
+  }
+
+  if (!PyTuple_Check(args[1]) || !PyDict_Check(args[2])) {
+    PyErr_SetString(
+        PyExc_TypeError, "__ua_function__ expects an args tuple and a "
+                         "kwargs dict");
+    return nullptr;
+  }
+
+  auto call = call_args::from_tuple(py_ref::ref(args[1]), py_ref::ref(args[2]));
+  return backend_call_function(
+             *self->ms_, reinterpret_cast<PyObject *>(self), args[0], call)
+      .release();
+}
+
+module_state & capi_state(const UArray_API * api) {
+  return *static_cast<module_state *>(api->state);
+}
+
+PyObject * capi_call(
+    const UArray_API * api, PyObject * multimethod, PyObject * const * args,
+    size_t nargsf, PyObject * kwnames) {
+  auto & ms = capi_state(api);
+  if (!PyObject_TypeCheck(multimethod, (PyTypeObject *)ms.FunctionType.get())) {
+    PyErr_SetString(PyExc_TypeError, "expected a multimethod");
+    return nullptr;
+  }
+
+  return reinterpret_cast<Function *>(multimethod)
+      ->call(args, PyVectorcall_NARGS(nargsf), kwnames);
+}
+
+PyObject * capi_get_backend(const UArray_API * api, const char * domain) {
+  auto & ms = capi_state(api);
+  auto result = py_ref::ref(Py_None);
+  try {
+    auto ret = for_each_backend(
+        ms, domain, [&](PyObject * backend, bool /* coerce */) {
+          result = py_ref::ref(backend);
+          return LoopReturn::Break;
+        });
+    if (ret == LoopReturn::Error)
+      return nullptr;
+  } catch (std::bad_alloc &) {
+    PyErr_NoMemory();
+    return nullptr;
+  }
+  return result.release();
+}
+
+PyObject * capi_push_backend(
+    const UArray_API * api, PyObject * backend, int coerce, int only) {
+  auto & ms = capi_state(api);
+  PyObject * args[] = {
+      backend, coerce ? Py_True : Py_False, only ? Py_True : Py_False};
+  auto frame = py_ref::steal(PyObject_Vectorcall(
+      ms.SetBackendContextType.get(), args, array_size(args), nullptr));
+  if (!frame)
+    return nullptr;
+
+  if (!reinterpret_cast<SetBackendContext *>(frame.get())->ctx_.enter(ms))
+    return nullptr;
+  return frame.release();
+}
+
+int capi_pop_backend(const UArray_API * api, PyObject * frame) {
+  auto & ms = capi_state(api);
+  if (!Py_IS_TYPE(frame, (PyTypeObject *)ms.SetBackendContextType.get())) {
+    PyErr_SetString(PyExc_TypeError, "expected a frame from push_backend");
+    return -1;
+  }
+
+  return reinterpret_cast<SetBackendContext *>(frame)->ctx_.exit(ms) ? 0 : -1;
+}
+
+PyObject * capi_new_backend(
+    const UArray_API * api, PyObject * domain, UArray_ConvertFunc convert,
+    UArray_FunctionFunc function, void * data, PyObject * owner) {
+  auto & ms = capi_state(api);
+  if (!function) {
+    PyErr_SetString(PyExc_ValueError, "function must not be NULL");
+    return nullptr;
+  }
+
+  auto type = reinterpret_cast<PyTypeObject *>(ms.NativeBackendType.get());
+  auto self = reinterpret_cast<NativeBackend *>(type->tp_alloc(type, 0));
+  if (!self)
+    return nullptr;
+
+  // Placement new
+  self = new (self) NativeBackend;
+  auto output = py_ref::steal(reinterpret_cast<PyObject *>(self));
+  self->ms_ = &ms;
+  self->domain_ = py_ref::ref(domain);
+  self->convert_ = convert;
+  self->function_ = function;
+  self->data_ = data;
+  self->owner_ = py_ref::ref(owner);
+
+  if (!backend_validate_ua_domain(ms, output.get()))
+    return nullptr;
+  return output.release();
+}
+
+int capi_register_backend(const UArray_API * api, PyObject * backend) {
+  return register_backend_impl(capi_state(api), backend) ? 0 : -1;
+}
 
 PyMethodDef BackendState_Methods[] = {
     {"_pickle", (PyCFunction)BackendState::pickle_, METH_NOARGS, nullptr},
+    {"__reduce__", (PyCFunction)BackendState::reduce_, METH_NOARGS, nullptr},
     {"_unpickle", (PyCFunction)BackendState::unpickle_,
      METH_VARARGS | METH_CLASS, nullptr},
     {NULL} /* Sentinel */
 };
 
-PyTypeObject BackendStateType = {
-    PyVarObject_HEAD_INIT(NULL, 0)     /* boilerplate */
-    "uarray._BackendState",            /* tp_name */
-    sizeof(BackendState),              /* tp_basicsize */
-    0,                                 /* tp_itemsize */
-    (destructor)BackendState::dealloc, /* tp_dealloc */
-    0,                                 /* tp_print */
-    0,                                 /* tp_getattr */
-    0,                                 /* tp_setattr */
-    0,                                 /* tp_reserved */
-    0,                                 /* tp_repr */
-    0,                                 /* tp_as_number */
-    0,                                 /* tp_as_sequence */
-    0,                                 /* tp_as_mapping */
-    0,                                 /* tp_hash  */
-    0,                                 /* tp_call */
-    0,                                 /* tp_str */
-    0,                                 /* tp_getattro */
-    0,                                 /* tp_setattro */
-    0,                                 /* tp_as_buffer */
-    Py_TPFLAGS_DEFAULT,                /* tp_flags */
-    0,                                 /* tp_doc */
-    0,                                 /* tp_traverse */
-    0,                                 /* tp_clear */
-    0,                                 /* tp_richcompare */
-    0,                                 /* tp_weaklistoffset */
-    0,                                 /* tp_iter */
-    0,                                 /* tp_iternext */
-    BackendState_Methods,              /* tp_methods */
-    0,                                 /* tp_members */
-    0,                                 /* tp_getset */
-    0,                                 /* tp_base */
-    0,                                 /* tp_dict */
-    0,                                 /* tp_descr_get */
-    0,                                 /* tp_descr_set */
-    0,                                 /* tp_dictoffset */
-    0,                                 /* tp_init */
-    0,                                 /* tp_alloc */
-    BackendState::new_,                /* tp_new */
+PyType_Slot BackendState_slots[] = {
+    {Py_tp_dealloc, (void *)BackendState::dealloc},
+    {Py_tp_methods, BackendState_Methods},
+    {Py_tp_new, (void *)BackendState::new_},
+    {0, nullptr} /* Sentinel */
+};
+
+PyType_Spec BackendState_spec = {
+    /* name= */ "uarray._BackendState",
+    /* basicsize= */ sizeof(BackendState),
+    /* itemsize= */ 0,
+    /* flags= */ (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_IMMUTABLETYPE),
+    /* slots= */ BackendState_slots,
 };
 
-PyObject * get_state(PyObject * /* self */, PyObject * /* args */) {
-  py_ref ref = py_ref::steal(PyObject_Vectorcall(
-      reinterpret_cast<PyObject *>(&BackendStateType), nullptr, 0, nullptr));
+PyObject * get_state(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  auto ts = get_thread_state(ms);
+  if (!ts)
+    return nullptr;
+
+  py_ref ref = py_ref::steal(
+      PyObject_Vectorcall(ms.BackendStateType.get(), nullptr, 0, nullptr));
+  if (!ref)
+    return nullptr;
   BackendState * output = reinterpret_cast<BackendState *>(ref.get());
 
-  output->locals = local_domain_map;
+  output->locals = ts->local_domain_map;
   output->use_thread_local_globals =
-      (current_global_state != global_domain_map.get());
-  output->globals = *current_global_state;
+      (ts->current_global_state != &ms.global_domain_map);
+  output->globals = *ts->current_global_state;
 
   return ref.release();
 }
 
-PyObject * set_state(PyObject * /* self */, PyObject * args) {
+PyObject * set_state(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
   PyObject * arg;
   int reset_allowed = false;
   if (!PyArg_ParseTuple(args, "O|p", &arg, &reset_allowed))
     return nullptr;
 
-  if (!PyObject_IsInstance(
-          arg, reinterpret_cast<PyObject *>(&BackendStateType))) {
+  if (!PyObject_IsInstance(arg, ms.BackendStateType.get())) {
     PyErr_SetString(
         PyExc_TypeError, "state must be a uarray._BackendState object.");
     return nullptr;
   }
 
+  auto ts = get_thread_state(ms);
+  if (!ts)
+    return nullptr;
+
   BackendState * state = reinterpret_cast<BackendState *>(arg);
-  local_domain_map = state->locals;
+  ts->local_domain_map = state->locals;
+  ts->local_version = ms.new_local_version();
+  ++ms.global_version;
   bool use_thread_local_globals =
       (!reset_allowed) || state->use_thread_local_globals;
-  current_global_state = use_thread_local_globals ? &thread_local_domain_map
-                                                  : global_domain_map.get();
+  ts->current_global_state = use_thread_local_globals
+                                 ? &ts->thread_local_domain_map
+                                 : &ms.global_domain_map;
 
   if (use_thread_local_globals)
-    thread_local_domain_map = state->globals;
+    ts->thread_local_domain_map = state->globals;
   else
-    thread_local_domain_map.clear();
+    ts->thread_local_domain_map.clear();
+
+
+  Py_RETURN_NONE;
+}
+
+PyObject * convert_dispatchables(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
+  PyObject *backend, *dispatchables;
+  int coerce;
+  if (!PyArg_ParseTuple(
+          args, "OOp:convert_dispatchables", &backend, &dispatchables, &coerce))
+    return nullptr;
+
+  return backend_convert_uncached(
+             ms, backend, dispatchables, coerce ? Py_True : Py_False)
+      .release();
+}
+
+PyObject * set_conversion_cache(PyObject * self, PyObject * cache) {
+  auto & ms = get_module_state(self);
+  if (cache == Py_None) {
+    ms.conversion_cache.reset();
+  } else {
+    ms.conversion_cache = py_ref::ref(cache);
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject * get_conversion_cache(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  if (!ms.conversion_cache)
+    Py_RETURN_NONE;
+  return py_ref(ms.conversion_cache).release();
+}
+
+PyObject * set_dispatch_routes(PyObject * self, PyObject * routes) {
+  auto & ms = get_module_state(self);
+  if (routes == Py_None) {
+    ms.dispatch_routes.reset();
+    Py_RETURN_NONE;
+  }
+
+  if (!PyDict_Check(routes)) {
+    PyErr_SetString(PyExc_TypeError, "dispatch routes must be a dict or None");
+    return nullptr;
+  }
+  ms.dispatch_routes = py_ref::ref(routes);
+  Py_RETURN_NONE;
+}
+
+PyObject * set_dispatch_hook(PyObject * self, PyObject * hook) {
+  auto & ms = get_module_state(self);
+  if (hook == Py_None) {
+    ms.dispatch_hook.reset();
+  } else {
+    ms.dispatch_hook = py_ref::ref(hook);
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject * get_dispatch_hook(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  if (!ms.dispatch_hook)
+    Py_RETURN_NONE;
+  return py_ref(ms.dispatch_hook).release();
+}
+
+PyObject * set_selection_mode(PyObject * self, PyObject * mode) {
+  auto & ms = get_module_state(self);
+  if (!PyUnicode_Check(mode)) {
+    PyErr_SetString(PyExc_TypeError, "selection mode must be a string");
+    return nullptr;
+  }
+
+  if (PyUnicode_CompareWithASCIIString(mode, "order") == 0) {
+    ms.selection_mode = SelectionMode::Order;
+  } else if (PyUnicode_CompareWithASCIIString(mode, "cost") == 0) {
+    ms.selection_mode = SelectionMode::Cost;
+  } else {
+    PyErr_Format(
+        PyExc_ValueError, "selection mode must be 'order' or 'cost', not %R",
+        mode);
+    return nullptr;
+  }
+  Py_RETURN_NONE;
+}
+
+PyObject * get_selection_mode(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  return PyUnicode_FromString(
+      ms.selection_mode == SelectionMode::Cost ? "cost" : "order");
+}
+
+/** Sizes of a backend state, as reported by memory_stats */
+struct state_stats {
+  size_t domains = 0;  // Entries in the map
+  size_t backends = 0; // References to backends
+  size_t capacity = 0; // Elements allocated by the lists of backends
+
+  void add(const local_state_t & locals) {
+    domains += locals.size();
+    for (const auto & item : locals) {
+      backends += item.second.preferred.size() + item.second.skipped.size();
+      capacity +=
+          item.second.preferred.capacity() + item.second.skipped.capacity();
+    }
+  }
+
+  void add(const global_state_t & globals) {
+    domains += globals.size();
+    for (const auto & item : globals) {
+      backends += item.second.registered.size();
+      backends += item.second.global.backend ? 1 : 0;
+      capacity += item.second.registered.capacity();
+    }
+  }
+
+  py_ref to_dict() const {
+    return py_ref::steal(Py_BuildValue(
+        "{snsnsn}", "domains", (Py_ssize_t)domains, "backends",
+        (Py_ssize_t)backends, "capacity", (Py_ssize_t)capacity));
+  }
+};
+
+PyObject * memory_stats(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  auto ts = get_thread_state(ms);
+  if (!ts)
+    return nullptr;
+
+  state_stats global, local, thread_globals;
+  global.add(ms.global_domain_map);
+  local.add(ts->local_domain_map);
+  thread_globals.add(ts->thread_local_domain_map);
+
+  Py_ssize_t threads;
+  {
+    std::lock_guard<std::mutex> lock(thread_states_mutex);
+    threads = ms.thread_states.size();
+  }
+
+  auto global_dict = global.to_dict();
+  auto local_dict = local.to_dict();
+  auto thread_globals_dict = (ts->current_global_state == &ms.global_domain_map)
+                                 ? py_ref::ref(Py_None)
+                                 : thread_globals.to_dict();
+  if (!global_dict || !local_dict || !thread_globals_dict)
+    return nullptr;
+
+  return Py_BuildValue(
+      "{sOsOsOsn}", "global", global_dict.get(), "thread", local_dict.get(),
+      "thread_globals", thread_globals_dict.get(), "threads", threads);
+}
+
+/** Versions identifying the backend state seen by the current thread
+ *
+ * Returns a tuple of the version of the thread's local state, which is
+ * restored when the state is restored by exiting a context, and the version
+ * of the global state, which changes on every change in any thread. Equal
+ * versions mean equal backend states.
+ */
+PyObject * get_state_version(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  auto ts = get_thread_state(ms);
+  if (!ts)
+    return nullptr;
+
+  return Py_BuildValue(
+      "(KK)", (unsigned long long)ts->local_version,
+      (unsigned long long)ms.global_version.load());
+}
+
+PyObject * freeze_backends(PyObject * self, PyObject * /* args */) {
+  auto & ms = get_module_state(self);
+  if (ms.frozen.load(std::memory_order_acquire))
+    Py_RETURN_NONE;
 
+  // Concurrent calls must not replace a table that was already published
+  std::lock_guard<std::mutex> lock(ms.freeze_mutex);
+  if (ms.frozen_owner)
+    Py_RETURN_NONE;
 
+  try {
+    ms.frozen_owner.reset(new frozen_state{ms.global_domain_map});
+  } catch (std::bad_alloc &) {
+    PyErr_NoMemory();
+    return nullptr;
+  }
+  ms.frozen.store(ms.frozen_owner.get(), std::memory_order_release);
+  ++ms.global_version;
   Py_RETURN_NONE;
 }
 
-PyObject * determine_backend(PyObject * /*self*/, PyObject * args) {
+PyObject * determine_backend(PyObject * self, PyObject * args) {
+  auto & ms = get_module_state(self);
   PyObject *domain_object, *dispatchables;
   int coerce;
   if (!PyArg_ParseTuple(
@@ -1573,23 +3709,19 @@ PyObject * determine_backend(PyObject * /*self*/, PyObject * args) {
 
   py_ref selected_backend;
   auto result = for_each_backend_in_domain(
-      domain, [&](PyObject * backend, bool coerce_backend) {
-        auto has_ua_convert =
-            PyObject_HasAttr(backend, identifiers.ua_convert->get());
+      ms, domain, [&](PyObject * backend, bool coerce_backend) {
+        auto has_ua_convert = backend_has_convert(ms, backend);
+        if (has_ua_convert < 0)
+          return LoopReturn::Error;
 
         if (!has_ua_convert) {
           // If no __ua_convert__, assume it won't accept the type
           return LoopReturn::Continue;
         }
 
-        PyObject * convert_args[] = {
-            backend, dispatchables_tuple.get(),
-            (coerce && coerce_backend) ? Py_True : Py_False};
-
-        auto res = py_ref::steal(PyObject_VectorcallMethod(
-            identifiers.ua_convert->get(), convert_args,
-            array_size(convert_args) | PY_VECTORCALL_ARGUMENTS_OFFSET,
-            nullptr));
+        auto res = backend_convert(
+            ms, backend, dispatchables_tuple.get(),
+            (coerce && coerce_backend) ? Py_True : Py_False);
         if (!res) {
           return LoopReturn::Error;
         }
@@ -1608,7 +3740,7 @@ PyObject * determine_backend(PyObject * /*self*/, PyObject * args) {
 
   // All backends failed, raise an error
   PyErr_SetString(
-      BackendNotImplementedError.get(),
+      ms.BackendNotImplementedError.get(),
       "No backends could accept input of this type.");
   return nullptr;
 }
@@ -1629,46 +3761,48 @@ PyGetSetDef Function_getset[] = {
     {NULL} /* Sentinel */
 };
 
-PyTypeObject FunctionType = {
-    PyVarObject_HEAD_INIT(NULL, 0) /* boilerplate */
-    /* tp_name= */ "uarray._Function",
-    /* tp_basicsize= */ sizeof(Function),
-    /* tp_itemsize= */ 0,
-    /* tp_dealloc= */ (destructor)Function::dealloc,
-    /* tp_print= */ 0,
-    /* tp_getattr= */ 0,
-    /* tp_setattr= */ 0,
-    /* tp_reserved= */ 0,
-    /* tp_repr= */ (reprfunc)Function::repr,
-    /* tp_as_number= */ 0,
-    /* tp_as_sequence= */ 0,
-    /* tp_as_mapping= */ 0,
-    /* tp_hash= */ 0,
-    /* tp_call= */ (ternaryfunc)Function_call,
-    /* tp_str= */ 0,
-    /* tp_getattro= */ PyObject_GenericGetAttr,
-    /* tp_setattro= */ PyObject_GenericSetAttr,
-    /* tp_as_buffer= */ 0,
-    /* tp_flags= */
-    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_METHOD_DESCRIPTOR),
-    /* tp_doc= */ 0,
-    /* tp_traverse= */ (traverseproc)Function::traverse,
-    /* tp_clear= */ (inquiry)Function::clear,
-    /* tp_richcompare= */ 0,
-    /* tp_weaklistoffset= */ 0,
-    /* tp_iter= */ 0,
-    /* tp_iternext= */ 0,
-    /* tp_methods= */ 0,
-    /* tp_members= */ 0,
-    /* tp_getset= */ Function_getset,
-    /* tp_base= */ 0,
-    /* tp_dict= */ 0,
-    /* tp_descr_get= */ Function::descr_get,
-    /* tp_descr_set= */ 0,
-    /* tp_dictoffset= */ offsetof(Function, dict_),
-    /* tp_init= */ (initproc)Function::init,
-    /* tp_alloc= */ 0,
-    /* tp_new= */ Function::new_,
+PyMethodDef Function_methods[] = {
+    {"acall", (PyCFunction)(void (*)(void))Function::acall_,
+     METH_FASTCALL | METH_KEYWORDS, nullptr},
+    {"__reduce__", (PyCFunction)Function::reduce_, METH_NOARGS, nullptr},
+    {"_replace_dispatchables", (PyCFunction)Function::replace_dispatchables_,
+     METH_VARARGS, nullptr},
+    {NULL} /* Sentinel */
+};
+
+PyMemberDef Function_members[] = {
+    {"__vectorcalloffset__", Py_T_PYSSIZET, offsetof(Function, vectorcall_),
+     Py_READONLY, nullptr},
+    {"__dictoffset__", Py_T_PYSSIZET, offsetof(Function, dict_), Py_READONLY,
+     nullptr},
+    {NULL} /* Sentinel */
+};
+
+PyType_Slot Function_slots[] = {
+    {Py_tp_dealloc, (void *)Function::dealloc},
+    {Py_tp_repr, (void *)Function::repr},
+    {Py_tp_call, (void *)PyVectorcall_Call},
+    {Py_tp_getattro, (void *)PyObject_GenericGetAttr},
+    {Py_tp_setattro, (void *)PyObject_GenericSetAttr},
+    {Py_tp_traverse, (void *)Function::traverse},
+    {Py_tp_clear, (void *)Function::clear},
+    {Py_tp_methods, Function_methods},
+    {Py_tp_members, Function_members},
+    {Py_tp_getset, Function_getset},
+    {Py_tp_descr_get, (void *)Function::descr_get},
+    {Py_tp_init, (void *)Function::init},
+    {Py_tp_new, (void *)Function::new_},
+    {0, nullptr} /* Sentinel */
+};
+
+PyType_Spec Function_spec = {
+    /* name= */ "uarray._Function",
+    /* basicsize= */ sizeof(Function),
+    /* itemsize= */ 0,
+    /* flags= */
+    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_METHOD_DESCRIPTOR |
+     Py_TPFLAGS_HAVE_VECTORCALL | Py_TPFLAGS_IMMUTABLETYPE),
+    /* slots= */ Function_slots,
 };
 
 
@@ -1677,48 +3811,27 @@ PyMethodDef SetBackendContext_Methods[] = {
      nullptr},
     {"__exit__", (PyCFunction)SetBackendContext::exit__, METH_VARARGS, nullptr},
     {"_pickle", (PyCFunction)SetBackendContext::pickle_, METH_NOARGS, nullptr},
+    {"__reduce__", (PyCFunction)SetBackendContext::reduce_, METH_NOARGS,
+     nullptr},
     {NULL} /* Sentinel */
 };
 
-PyTypeObject SetBackendContextType = {
-    PyVarObject_HEAD_INIT(NULL, 0)             /* boilerplate */
-    "uarray._SetBackendContext",               /* tp_name */
-    sizeof(SetBackendContext),                 /* tp_basicsize */
-    0,                                         /* tp_itemsize */
-    (destructor)SetBackendContext::dealloc,    /* tp_dealloc */
-    0,                                         /* tp_print */
-    0,                                         /* tp_getattr */
-    0,                                         /* tp_setattr */
-    0,                                         /* tp_reserved */
-    0,                                         /* tp_repr */
-    0,                                         /* tp_as_number */
-    0,                                         /* tp_as_sequence */
-    0,                                         /* tp_as_mapping */
-    0,                                         /* tp_hash  */
-    0,                                         /* tp_call */
-    0,                                         /* tp_str */
-    0,                                         /* tp_getattro */
-    0,                                         /* tp_setattro */
-    0,                                         /* tp_as_buffer */
-    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC), /* tp_flags */
-    0,                                         /* tp_doc */
-    (traverseproc)SetBackendContext::traverse, /* tp_traverse */
-    0,                                         /* tp_clear */
-    0,                                         /* tp_richcompare */
-    0,                                         /* tp_weaklistoffset */
-    0,                                         /* tp_iter */
-    0,                                         /* tp_iternext */
-    SetBackendContext_Methods,                 /* tp_methods */
-    0,                                         /* tp_members */
-    0,                                         /* tp_getset */
-    0,                                         /* tp_base */
-    0,                                         /* tp_dict */
-    0,                                         /* tp_descr_get */
-    0,                                         /* tp_descr_set */
-    0,                                         /* tp_dictoffset */
-    (initproc)SetBackendContext::init,         /* tp_init */
-    0,                                         /* tp_alloc */
-    SetBackendContext::new_,                   /* tp_new */
+PyType_Slot SetBackendContext_slots[] = {
+    {Py_tp_dealloc, (void *)SetBackendContext::dealloc},
+    {Py_tp_traverse, (void *)SetBackendContext::traverse},
+    {Py_tp_methods, SetBackendContext_Methods},
+    {Py_tp_init, (void *)SetBackendContext::init},
+    {Py_tp_new, (void *)SetBackendContext::new_},
+    {0, nullptr} /* Sentinel */
+};
+
+PyType_Spec SetBackendContext_spec = {
+    /* name= */ "uarray._SetBackendContext",
+    /* basicsize= */ sizeof(SetBackendContext),
+    /* itemsize= */ 0,
+    /* flags= */
+    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_IMMUTABLETYPE),
+    /* slots= */ SetBackendContext_slots,
 };
 
 
@@ -1728,48 +3841,71 @@ PyMethodDef SkipBackendContext_Methods[] = {
     {"__exit__", (PyCFunction)SkipBackendContext::exit__, METH_VARARGS,
      nullptr},
     {"_pickle", (PyCFunction)SkipBackendContext::pickle_, METH_NOARGS, nullptr},
+    {"__reduce__", (PyCFunction)SkipBackendContext::reduce_, METH_NOARGS,
+     nullptr},
+    {NULL} /* Sentinel */
+};
+
+PyType_Slot SkipBackendContext_slots[] = {
+    {Py_tp_dealloc, (void *)SkipBackendContext::dealloc},
+    {Py_tp_traverse, (void *)SkipBackendContext::traverse},
+    {Py_tp_methods, SkipBackendContext_Methods},
+    {Py_tp_init, (void *)SkipBackendContext::init},
+    {Py_tp_new, (void *)SkipBackendContext::new_},
+    {0, nullptr} /* Sentinel */
+};
+
+PyType_Spec SkipBackendContext_spec = {
+    /* name= */ "uarray._SkipBackendContext",
+    /* basicsize= */ sizeof(SkipBackendContext),
+    /* itemsize= */ 0,
+    /* flags= */
+    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_IMMUTABLETYPE),
+    /* slots= */ SkipBackendContext_slots,
+};
+
+
+PyMemberDef NativeBackend_members[] = {
+    {"__dictoffset__", Py_T_PYSSIZET, offsetof(NativeBackend, dict_),
+     Py_READONLY, nullptr},
+    {NULL} /* Sentinel */
+};
+
+PyGetSetDef NativeBackend_getset[] = {
+    {"__dict__", PyObject_GenericGetDict, PyObject_GenericSetDict, nullptr,
+     nullptr},
+    {"__ua_domain__", (getter)NativeBackend::get_domain, nullptr, nullptr,
+     nullptr},
+    {NULL} /* Sentinel */
+};
+
+PyMethodDef NativeBackend_Methods[] = {
+    {"__ua_convert__", (PyCFunction)(void (*)(void))NativeBackend::ua_convert_,
+     METH_FASTCALL, nullptr},
+    {"__ua_function__",
+     (PyCFunction)(void (*)(void))NativeBackend::ua_function_, METH_FASTCALL,
+     nullptr},
     {NULL} /* Sentinel */
 };
 
-PyTypeObject SkipBackendContextType = {
-    PyVarObject_HEAD_INIT(NULL, 0)              /* boilerplate */
-    "uarray._SkipBackendContext",               /* tp_name */
-    sizeof(SkipBackendContext),                 /* tp_basicsize */
-    0,                                          /* tp_itemsize */
-    (destructor)SkipBackendContext::dealloc,    /* tp_dealloc */
-    0,                                          /* tp_print */
-    0,                                          /* tp_getattr */
-    0,                                          /* tp_setattr */
-    0,                                          /* tp_reserved */
-    0,                                          /* tp_repr */
-    0,                                          /* tp_as_number */
-    0,                                          /* tp_as_sequence */
-    0,                                          /* tp_as_mapping */
-    0,                                          /* tp_hash  */
-    0,                                          /* tp_call */
-    0,                                          /* tp_str */
-    0,                                          /* tp_getattro */
-    0,                                          /* tp_setattro */
-    0,                                          /* tp_as_buffer */
-    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC),  /* tp_flags */
-    0,                                          /* tp_doc */
-    (traverseproc)SkipBackendContext::traverse, /* tp_traverse */
-    0,                                          /* tp_clear */
-    0,                                          /* tp_richcompare */
-    0,                                          /* tp_weaklistoffset */
-    0,                                          /* tp_iter */
-    0,                                          /* tp_iternext */
-    SkipBackendContext_Methods,                 /* tp_methods */
-    0,                                          /* tp_members */
-    0,                                          /* tp_getset */
-    0,                                          /* tp_base */
-    0,                                          /* tp_dict */
-    0,                                          /* tp_descr_get */
-    0,                                          /* tp_descr_set */
-    0,                                          /* tp_dictoffset */
-    (initproc)SkipBackendContext::init,         /* tp_init */
-    0,                                          /* tp_alloc */
-    SkipBackendContext::new_,                   /* tp_new */
+PyType_Slot NativeBackend_slots[] = {
+    {Py_tp_dealloc, (void *)NativeBackend::dealloc},
+    {Py_tp_traverse, (void *)NativeBackend::traverse},
+    {Py_tp_clear, (void *)NativeBackend::clear},
+    {Py_tp_methods, NativeBackend_Methods},
+    {Py_tp_members, NativeBackend_members},
+    {Py_tp_getset, NativeBackend_getset},
+    {0, nullptr} /* Sentinel */
+};
+
+PyType_Spec NativeBackend_spec = {
+    /* name= */ "uarray._NativeBackend",
+    /* basicsize= */ sizeof(NativeBackend),
+    /* itemsize= */ 0,
+    /* flags= */
+    (Py_TPFLAGS_DEFAULT | Py_TPFLAGS_HAVE_GC | Py_TPFLAGS_IMMUTABLETYPE |
+     Py_TPFLAGS_DISALLOW_INSTANTIATION),
+    /* slots= */ NativeBackend_slots,
 };
 
 
@@ -1777,71 +3913,109 @@ PyMethodDef method_defs[] = {
     {"set_global_backend", set_global_backend, METH_VARARGS, nullptr},
     {"register_backend", register_backend, METH_VARARGS, nullptr},
     {"clear_backends", clear_backends, METH_VARARGS, nullptr},
+    {"_replace_backend", replace_backend, METH_VARARGS, nullptr},
     {"determine_backend", determine_backend, METH_VARARGS, nullptr},
     {"get_state", get_state, METH_NOARGS, nullptr},
     {"set_state", set_state, METH_VARARGS, nullptr},
+    {"convert_dispatchables", convert_dispatchables, METH_VARARGS, nullptr},
+    {"set_conversion_cache", set_conversion_cache, METH_O, nullptr},
+    {"get_conversion_cache", get_conversion_cache, METH_NOARGS, nullptr},
+    {"set_selection_mode", set_selection_mode, METH_O, nullptr},
+    {"set_dispatch_routes", set_dispatch_routes, METH_O, nullptr},
+    {"set_dispatch_hook", set_dispatch_hook, METH_O, nullptr},
+    {"get_dispatch_hook", get_dispatch_hook, METH_NOARGS, nullptr},
+    {"get_selection_mode", get_selection_mode, METH_NOARGS, nullptr},
+    {"memory_stats", memory_stats, METH_NOARGS, nullptr},
+    {"get_state_version", get_state_version, METH_NOARGS, nullptr},
+    {"freeze_backends", freeze_backends, METH_NOARGS, nullptr},
     {NULL} /* Sentinel */
 };
 
-PyModuleDef uarray_module = {
-    PyModuleDef_HEAD_INIT,
-    /* m_name= */ "uarray._uarray",
-    /* m_doc= */ nullptr,
-    /* m_size= */ -1,
-    /* m_methods= */ method_defs,
-    /* m_slots= */ nullptr,
-    /* m_traverse= */ globals_traverse,
-    /* m_clear= */ globals_clear,
-    /* m_free= */ globals_free};
-
-} // namespace
-
-
-PyMODINIT_FUNC PyInit__uarray(void) {
-
-  auto m = py_ref::steal(PyModule_Create(&uarray_module));
-  if (!m)
-    return nullptr;
-
-  if (PyType_Ready(&FunctionType) < 0)
-    return nullptr;
-  Py_INCREF(&FunctionType);
-  PyModule_AddObject(m.get(), "_Function", (PyObject *)&FunctionType);
+int module_exec(PyObject * module) {
+  auto & slot = *static_cast<module_state **>(PyModule_GetState(module));
+  slot = new (std::nothrow) module_state;
+  if (!slot) {
+    PyErr_NoMemory();
+    return -1;
+  }
+  auto & ms = *slot;
+  ms.generation = ++module_generation;
 
-  if (PyType_Ready(&SetBackendContextType) < 0)
-    return nullptr;
-  Py_INCREF(&SetBackendContextType);
-  PyModule_AddObject(
-      m.get(), "_SetBackendContext", (PyObject *)&SetBackendContextType);
+  // Any unique object works as the key into the thread state dicts
+  ms.thread_state_key =
+      py_ref::steal(PyObject_CallNoArgs((PyObject *)&PyBaseObject_Type));
+  if (!ms.thread_state_key)
+    return -1;
 
-  if (PyType_Ready(&SkipBackendContextType) < 0)
-    return nullptr;
-  Py_INCREF(&SkipBackendContextType);
-  PyModule_AddObject(
-      m.get(), "_SkipBackendContext", (PyObject *)&SkipBackendContextType);
+  if (!ms.identifiers.init())
+    return -1;
 
-  if (PyType_Ready(&BackendStateType) < 0)
-    return nullptr;
-  Py_INCREF(&BackendStateType);
-  PyModule_AddObject(m.get(), "_BackendState", (PyObject *)&BackendStateType);
+  auto add_type = [&](PyType_Spec & spec, py_ref & type) {
+    type = py_ref::steal(PyType_FromModuleAndSpec(module, &spec, nullptr));
+    if (!type)
+      return false;
+    // Add under the unqualified name, e.g. "_Function"
+    const char * name = strrchr(spec.name, '.') + 1;
+    return PyModule_AddObjectRef(module, name, type.get()) == 0;
+  };
+  if (!add_type(Function_spec, ms.FunctionType) ||
+      !add_type(SetBackendContext_spec, ms.SetBackendContextType) ||
+      !add_type(SkipBackendContext_spec, ms.SkipBackendContextType) ||
+      !add_type(BackendState_spec, ms.BackendStateType) ||
+      !add_type(NativeBackend_spec, ms.NativeBackendType))
+    return -1;
 
-  BackendNotImplementedError = py_ref::steal(PyErr_NewExceptionWithDoc(
+  ms.BackendNotImplementedError = py_ref::steal(PyErr_NewExceptionWithDoc(
       "uarray.BackendNotImplementedError",
       "An exception that is thrown when no compatible"
       " backend is found for a method.",
       PyExc_NotImplementedError, nullptr));
-  if (!BackendNotImplementedError)
-    return nullptr;
-  Py_INCREF(BackendNotImplementedError.get());
-  PyModule_AddObject(
-      m.get(), "BackendNotImplementedError", BackendNotImplementedError.get());
+  if (!ms.BackendNotImplementedError)
+    return -1;
+  if (PyModule_AddObjectRef(
+          module, "BackendNotImplementedError",
+          ms.BackendNotImplementedError.get()) < 0)
+    return -1;
 
-  if (!identifiers.init())
-    return nullptr;
+  ms.capi.version = UARRAY_API_VERSION;
+  ms.capi.state = &ms;
+  ms.capi.call = capi_call;
+  ms.capi.get_backend = capi_get_backend;
+  ms.capi.push_backend = capi_push_backend;
+  ms.capi.pop_backend = capi_pop_backend;
+  ms.capi.new_backend = capi_new_backend;
+  ms.capi.register_backend = capi_register_backend;
+  auto capsule =
+      py_ref::steal(PyCapsule_New(&ms.capi, UARRAY_API_CAPSULE_NAME, nullptr));
+  if (!capsule || PyModule_AddObjectRef(module, "_C_API", capsule.get()) < 0)
+    return -1;
+
+  return 0;
+}
 
-#if Py_GIL_DISABLED
-  PyUnstable_Module_SetGIL(m.get(), Py_MOD_GIL_NOT_USED);
+PyModuleDef_Slot module_slots[] = {
+    {Py_mod_exec, (void *)module_exec},
+#ifdef Py_mod_multiple_interpreters
+    {Py_mod_multiple_interpreters, Py_MOD_PER_INTERPRETER_GIL_SUPPORTED},
 #endif
+#ifdef Py_mod_gil
+    {Py_mod_gil, Py_MOD_GIL_NOT_USED},
+#endif
+    {0, nullptr} /* Sentinel */
+};
 
-  return m.release();
-}
+PyModuleDef uarray_module = {
+    PyModuleDef_HEAD_INIT,
+    /* m_name= */ "uarray._uarray",
+    /* m_doc= */ nullptr,
+    /* m_size= */ sizeof(module_state *),
+    /* m_methods= */ method_defs,
+    /* m_slots= */ module_slots,
+    /* m_traverse= */ module_traverse,
+    /* m_clear= */ module_clear,
+    /* m_free= */ module_free};
+
+} // namespace
+
+
+PyMODINIT_FUNC PyInit__uarray(void) { return PyModuleDef_Init(&uarray_module); }
@@ -89,6 +89,24 @@ We can also coerce the type of the input.
 ('override_me', ('1', '2'), {})
 ('override_me', ('1.0', '2'), {})
 
+Backends converting many values at once can define
+``__ua_convert_group__`` with the signature ``(values, dispatch_type, coerce)``
+instead. The dispatchables are grouped by the type of their value, their
+dispatch type and their coercibility, and the hook is called once per group
+with a list of values. It returns one converted value per input value, or
+``NotImplemented``. Here, ``coerce`` already accounts for the group's
+coercibility.
+
+>>> def __ua_convert_group__(values, dispatch_type, coerce):
+...     if dispatch_type is not int:
+...         return NotImplemented
+...     return [str(v) for v in values] if coerce else values
+>>> be.__ua_convert_group__ = __ua_convert_group__
+>>> with ua.set_backend(be, coerce=True):
+...     overridden_me(1, "2")
+('override_me', ('1', '2'), {})
+>>> del be.__ua_convert_group__
+
 Another feature is that if you remove ``__ua_convert__``, the arguments are not
 converted at all and it's up to the backend to handle that.
 
@@ -97,6 +115,48 @@ converted at all and it's up to the backend to handle that.
 ...     overridden_me(1, "2")
 ('override_me', (1, '2'), {})
 
+Backends that only map multimethods to implementations can declare an
+``__ua_implementations__`` mapping instead. Listed implementations are called
+directly with the (converted) arguments, without going through
+``__ua_function__``. Multimethods that aren't listed still fall back to
+``__ua_function__``, if the backend has one.
+
+>>> be.__ua_implementations__ = {overridden_me: lambda a, b: (b, a)}
+>>> with ua.set_backend(be):
+...     overridden_me(1, "2")
+('2', 1)
+>>> del be.__ua_implementations__
+
+Setting ``__ua_vectorcall__ = True`` switches ``__ua_function__`` to the
+signature ``(method, *args, **kwargs)``. The arguments are then forwarded
+as they were passed, without packing them into a tuple and a dict first.
+
+>>> be.__ua_vectorcall__ = True
+>>> be.__ua_function__ = lambda method, *args, **kwargs: (args, kwargs)
+>>> with ua.set_backend(be):
+...     overridden_me(1, b="2")
+((1,), {'b': '2'})
+>>> del be.__ua_vectorcall__
+
+Multimethods can also be awaited with ``acall``. Backends defining
+``__ua_function_async__``, with the same signature as ``__ua_function__``,
+return an awaitable from it. Other backends are called in an executor, see
+:obj:`set_async_executor`.
+
+>>> import asyncio
+>>> async def __ua_function_async__(method, args, kwargs):
+...     return "async", args
+>>> be.__ua_function_async__ = __ua_function_async__
+>>> with ua.set_backend(be):
+...     asyncio.run(overridden_me.acall(1, "2"))
+('async', (1, '2'))
+>>> del be.__ua_function_async__
+
+Backends can also estimate the cost of a call with
+``__ua_cost__(method, dispatchables)``. When the selection mode is set to
+``"cost"`` with :obj:`set_selection_mode`, the backends that may handle a
+call are tried cheapest first instead of in order.
+
 You also have the option to return ``NotImplemented``, in which case processing moves on
 to the next back-end, which in this case, doesn't exist. The same applies to
 ``__ua_convert__``.
@@ -116,4 +176,12 @@ possible.
 # Explicitly re-export `__all__` so type checkers consider it a public member
 from ._backend import __all__ as __all__
 from ._backend import *
+from . import _async, _lazy, _wrappers
+from ._async import *
+from ._lazy import *
+from ._wrappers import *
+
+__all__ += _async.__all__
+__all__ += _lazy.__all__
+__all__ += _wrappers.__all__
 from ._version import __version__
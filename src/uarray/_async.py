@@ -0,0 +1,195 @@
+"""Asynchronous multimethod calls."""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Coroutine, Sequence
+from typing import TYPE_CHECKING, Any
+
+from ._backend import _BackendState, _set_backend, get_state, set_state
+from ._uarray import BackendNotImplementedError
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+    from typing_extensions import TypeIs
+
+    from ._typing import _SupportsUA, _SupportsUAFunctionAsync
+
+__all__ = [
+    "set_async_executor",
+    "get_async_executor",
+]
+
+_executor: None | concurrent.futures.Executor = None
+
+
+def set_async_executor(executor: None | concurrent.futures.Executor) -> None:
+    """
+    Sets the executor for backends called by ``acall`` without
+    ``__ua_function_async__``.
+
+    Awaiting ``multimethod.acall(*args, **kwargs)`` calls the
+    ``__ua_function_async__(method, args, kwargs)`` hook of backends that
+    define it, and awaits the awaitable it returns. Other backends, and
+    default implementations, are called in an executor instead, so they
+    don't block the event loop.
+
+    Parameters
+    ----------
+    executor : Optional[concurrent.futures.Executor]
+        The executor to use, or ``None`` for the event loop's default
+        executor.
+
+    See Also
+    --------
+    get_async_executor : Gets the executor.
+
+    Examples
+    --------
+    >>> import asyncio
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> class SyncBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         return "sync"
+    >>> with ThreadPoolExecutor(1) as executor:
+    ...     ua.set_async_executor(executor)
+    ...     with ua.set_backend(SyncBackend()):
+    ...         asyncio.run(ex.creation_multimethod.acall())
+    'sync'
+    >>> ua.set_async_executor(None)
+    """
+    global _executor
+    _executor = executor
+
+
+def get_async_executor() -> None | concurrent.futures.Executor:
+    """
+    Gets the executor set with :obj:`set_async_executor`.
+
+    See Also
+    --------
+    set_async_executor : Sets the executor.
+    """
+    return _executor
+
+
+def _run_in_state(
+    state: _BackendState,
+    backend: None | _SupportsUA,
+    coerce: bool,
+    func: Callable[..., Any],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> Any:
+    with set_state(state):
+        if backend is None:
+            return func(*args, **kwargs)
+
+        with _set_backend(backend, coerce, True):
+            return func(*args, **kwargs)
+
+
+def _is_async(backend: object) -> TypeIs[_SupportsUAFunctionAsync]:
+    return hasattr(backend, "__ua_function_async__")
+
+
+def _acall(
+    method: Any,
+    steps: Sequence[tuple[_SupportsUA, bool]],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+    dispatchables: None | tuple[Any, ...],
+    use_default: bool,
+) -> Coroutine[Any, Any, Any]:
+    # Called by `_Function.acall` once dispatch is resolved. The state and
+    # executor are captured now, in the calling thread, so concurrent calls
+    # don't see each other's backends.
+    return _dispatch(
+        method, steps, args, kwargs, dispatchables, use_default, get_state(), _executor
+    )
+
+
+async def _dispatch(
+    method: Any,
+    steps: Sequence[tuple[_SupportsUA, bool]],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+    dispatchables: None | tuple[Any, ...],
+    use_default: bool,
+    state: _BackendState,
+    executor: None | concurrent.futures.Executor,
+) -> Any:
+    # Imported here, as asyncio is slow to import and only needed once awaited
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    errors: list[tuple[Any, BaseException]] = []
+
+    async def run(
+        backend: None | _SupportsUA,
+        coerce: bool,
+        func: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        try:
+            return await loop.run_in_executor(
+                executor, _run_in_state, state, backend, coerce, func, args, kwargs
+            )
+        except BackendNotImplementedError as e:
+            errors.append((backend, e))
+            return NotImplemented
+
+    for backend, coerce in steps:
+        if not _is_async(backend):
+            # Synchronous backend: the multimethod with only this backend,
+            # which also tries the default with it
+            try:
+                result = await loop.run_in_executor(
+                    executor,
+                    _run_in_state,
+                    state,
+                    backend,
+                    coerce,
+                    method,
+                    args,
+                    kwargs,
+                )
+            except BackendNotImplementedError as e:
+                errors.extend(e.args[1:])
+                continue
+        else:
+            # Converted only now, as the backends before may have served it
+            with set_state(state):
+                replaced = method._replace_dispatchables(
+                    backend, coerce, args, kwargs, dispatchables
+                )
+            if replaced is NotImplemented:
+                continue
+
+            new_args, new_kwargs = replaced
+            try:
+                result = await backend.__ua_function_async__(
+                    method, new_args, new_kwargs
+                )
+            except BackendNotImplementedError as e:
+                errors.append((backend, e))
+                result = NotImplemented
+
+            if result is NotImplemented and method.default is not None:
+                result = await run(
+                    backend, coerce, method.default, new_args, new_kwargs
+                )
+
+        if result is not NotImplemented:
+            return result
+
+    if use_default and method.default is not None:
+        result = await run(None, False, method.default, args, kwargs)
+        if result is not NotImplemented:
+            return result
+
+    raise BackendNotImplementedError(
+        "No selected backends had an implementation for this function.", *errors
+    )
@@ -1,15 +1,26 @@
 from __future__ import annotations
 
+import array
 import types
-import inspect
 import functools
 from . import _uarray
-import copyreg
-import pickle
 import contextlib
+import os
+import sys
+import threading
 import warnings
-
-from collections.abc import Callable, Generator, Iterable
+import weakref
+
+from collections import OrderedDict
+from collections.abc import (
+    Callable,
+    Generator,
+    Iterable,
+    Iterator,
+    Mapping,
+    MutableMapping,
+    Sequence,
+)
 from typing import TYPE_CHECKING, Any, Generic, TypeVar, Literal, overload, no_type_check
 
 from ._uarray import (
@@ -24,6 +35,7 @@ if TYPE_CHECKING:
     from typing_extensions import ParamSpec
     from ._typing import (
         _SupportsUA,
+        _UABackend,
         _PartialDispatchable,
         _ReplacerFunc,
     )
@@ -43,13 +55,28 @@ __all__ = [
     "determine_backend",
     "determine_backend_multi",
     "clear_backends",
+    "freeze_backends",
+    "ConversionCache",
+    "set_conversion_cache",
+    "get_conversion_cache",
+    "set_selection_mode",
+    "get_selection_mode",
+    "memory_stats",
+    "record_dispatch",
+    "load_dispatch_profile",
+    "clear_dispatch_profile",
+    "get_include",
     "create_multimethod",
     "generate_multimethod",
+    "generate_multimethods",
     "_Function",
     "BackendNotImplementedError",
     "Dispatchable",
+    "DispatchableSequence",
     "wrap_single_convertor",
     "wrap_single_convertor_instance",
+    "BufferConvertor",
+    "TypeDispatcher",
     "all_of_type",
     "mark_as",
     "set_state",
@@ -97,6 +124,8 @@ def pickle_function(
     qname = getattr(func, "__qualname__", None)
     self_ = getattr(func, "__self__", None)
 
+    import pickle
+
     try:
         test = unpickle_function(mod_name, qname, self_)
     except pickle.UnpicklingError:
@@ -110,36 +139,6 @@ def pickle_function(
     return unpickle_function, (mod_name, qname, self_)
 
 
-def pickle_state(
-    state: _BackendState,
-) -> tuple[
-    Callable[[dict[str, Any], dict[str, Any], bool], _BackendState],
-    tuple[dict[str, Any], dict[str, Any], bool],
-]:
-    return _uarray._BackendState._unpickle, state._pickle()
-
-
-def pickle_set_backend_context(
-    ctx: _SetBackendContext,
-) -> tuple[type[_SetBackendContext], tuple[_SupportsUA, bool, bool],]:
-    return _SetBackendContext, ctx._pickle()
-
-
-def pickle_skip_backend_context(
-    ctx: _SkipBackendContext,
-) -> tuple[type[_SkipBackendContext], tuple[_SupportsUA],]:
-    return _SkipBackendContext, ctx._pickle()
-
-
-# TODO: Remove the `if` block once python/typeshed#7415
-# has been integrated into mypy
-if not TYPE_CHECKING:
-    copyreg.pickle(_Function, pickle_function)
-    copyreg.pickle(_uarray._BackendState, pickle_state)
-    copyreg.pickle(_SetBackendContext, pickle_set_backend_context)
-    copyreg.pickle(_SkipBackendContext, pickle_skip_backend_context)
-
-
 def get_state() -> _BackendState:
     """
     Returns an opaque object containing the current state of all the backends.
@@ -287,6 +286,200 @@ def generate_multimethod(
     return functools.update_wrapper(ua_func, argument_extractor) # type: ignore[return-value]
 
 
+# `inspect.CO_VARARGS` and `inspect.CO_VARKEYWORDS`, without importing inspect
+_CO_VARARGS = 0x04
+_CO_VARKEYWORDS = 0x08
+
+
+def _signature_key(f: Callable[..., Any]) -> None | tuple[Any, ...]:
+    # Functions with the same parameters and the same default objects have
+    # the same `get_defaults`. Other callables are analyzed on their own.
+    if type(f) is not types.FunctionType or hasattr(f, "__wrapped__"):
+        return None
+    if "__signature__" in f.__dict__:
+        return None
+
+    code = f.__code__
+    nparams = (
+        code.co_argcount
+        + code.co_kwonlyargcount
+        + bool(code.co_flags & _CO_VARARGS)
+        + bool(code.co_flags & _CO_VARKEYWORDS)
+    )
+    kwdefaults = f.__kwdefaults__ or {}
+    return (
+        code.co_argcount,
+        code.co_posonlyargcount,
+        code.co_kwonlyargcount,
+        code.co_flags & (_CO_VARARGS | _CO_VARKEYWORDS),
+        code.co_varnames[:nparams],
+        tuple(map(id, f.__defaults__ or ())),
+        tuple((k, id(v)) for k, v in kwdefaults.items()),
+    )
+
+
+class _Multimethods(Mapping[str, "_Function[...]"]):
+    """The multimethods created by :obj:`generate_multimethods`."""
+
+    def __init__(
+        self,
+        table: Mapping[str, tuple[Any, ...]],
+        domain: str,
+        module: None | str,
+    ) -> None:
+        self._table = dict(table)
+        self._domain = domain
+        self._module = module
+        self._created: dict[str, _Function[...]] = {}
+        self._defaults: dict[Any, tuple[dict[str, Any], tuple[Any, ...], set[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _create(self, name: str) -> _Function[...]:
+        extractor, replacer, *rest = self._table[name]
+        default = rest[0] if rest else None
+
+        key = _signature_key(extractor)
+        defaults = self._defaults.get(key) if key is not None else None
+        if defaults is None:
+            defaults = get_defaults(extractor)
+            if key is not None:
+                self._defaults[key] = defaults
+        kw_defaults, arg_defaults, _ = defaults
+
+        func = _Function(
+            extractor, replacer, self._domain, arg_defaults, kw_defaults, default
+        )
+        # Extractors may be shared, so the name comes from the table
+        module: str = (
+            self._module
+            or getattr(extractor, "__module__", None)
+            or type(extractor).__module__
+        )
+        func.__module__ = module
+        func.__name__ = func.__qualname__ = name
+        func.__doc__ = getattr(extractor, "__doc__", None)
+        func.__wrapped__ = extractor
+        return func
+
+    def __getitem__(self, name: str) -> _Function[...]:
+        try:
+            return self._created[name]
+        except KeyError:
+            pass
+
+        if name not in self._table:
+            raise KeyError(name)
+
+        with self._lock:
+            if name not in self._created:
+                self._created[name] = self._create(name)
+        return self._created[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._table)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+def generate_multimethods(
+    table: Mapping[str, tuple[Any, ...]],
+    domain: str,
+    *,
+    namespace: None | MutableMapping[str, Any] = None,
+    lazy: bool = False,
+) -> Mapping[str, _Function[...]]:
+    """
+    Generates many multimethods at once.
+
+    Unlike calling :obj:`generate_multimethod` for each, the signature analysis
+    is shared by extractors with the same parameters and defaults, and the
+    multimethods can be created lazily, on first use.
+
+    Parameters
+    ----------
+    table : Mapping[str, tuple]
+        Maps the name of each multimethod to an ``(argument_extractor,
+        argument_replacer)`` or ``(argument_extractor, argument_replacer,
+        default)`` tuple, see :obj:`generate_multimethod`. The multimethods
+        are named after the keys, so extractors may be shared.
+    domain : str
+        The domain of the multimethods.
+    namespace : Optional[MutableMapping[str, Any]]
+        Where to put the multimethods, usually the ``globals()`` of the
+        module defining them.
+    lazy : bool
+        Whether to create each multimethod on first access, rather than
+        right away. With a ``namespace``, a module ``__getattr__`` that does
+        so is added to it, along with a ``__dir__`` listing the
+        multimethods. Any ``__getattr__`` or ``__dir__`` the namespace
+        already had is used for other names.
+
+    Returns
+    -------
+    Mapping[str, _Function]
+        The multimethods by name.
+
+    See Also
+    --------
+    generate_multimethod
+        Generates a single multimethod.
+
+    Examples
+    --------
+    >>> import types
+    >>> def extract_one(a):
+    ...     return (ua.Dispatchable(a, int),)
+    >>> def replace_one(args, kwargs, dispatchables):
+    ...     return dispatchables, kwargs
+    >>> module = types.ModuleType("ua_example_api")
+    >>> _ = ua.generate_multimethods(
+    ...     {"negative": (extract_one, replace_one, lambda a: -a),
+    ...      "absolute": (extract_one, replace_one, abs)},
+    ...     "ua_examples",
+    ...     namespace=vars(module),
+    ...     lazy=True,
+    ... )
+    >>> "negative" in vars(module)
+    False
+    >>> module.negative(2)
+    -2
+    >>> module.negative.__name__, "negative" in vars(module)
+    ('negative', True)
+    """
+    module = namespace.get("__name__") if namespace is not None else None
+    multimethods = _Multimethods(table, domain, module)
+
+    if not lazy:
+        for name in multimethods:
+            multimethods[name]
+        if namespace is not None:
+            namespace.update(multimethods)
+        return multimethods
+
+    if namespace is not None:
+        fallback = namespace.get("__getattr__")
+        dir_fallback = namespace.get("__dir__")
+
+        def __getattr__(name: str) -> Any:
+            if name in multimethods:
+                # Cached in the namespace, so this is only called once
+                func = namespace[name] = multimethods[name]
+                return func
+            if fallback is not None:
+                return fallback(name)
+            raise AttributeError(f"module {module!r} has no attribute {name!r}")
+
+        def __dir__() -> list[str]:
+            names = dir_fallback() if dir_fallback is not None else namespace
+            return sorted(set(names) | set(multimethods))
+
+        namespace["__getattr__"] = __getattr__
+        namespace["__dir__"] = __dir__
+
+    return multimethods
+
+
 def set_backend(
     backend: _SupportsUA,
     coerce: bool = False,
@@ -312,6 +505,15 @@ def set_backend(
     # Deprecated: 2022-08-17, To be removed: 2023-08-17
     # See gh-237 and https://discuss.scientific-python.org/t/requirements-and-discussion-of-a-type-dispatcher-for-the-ecosystem/157/40
     warnings.warn("uarray.skip_backend is deprecated, please migrate to scoped backends.", category=DeprecationWarning)
+    return _set_backend(backend, coerce, only)
+
+
+def _set_backend(
+    backend: _SupportsUA,
+    coerce: bool = False,
+    only: bool = False,
+) -> _SetBackendContext:
+    # `set_backend` without the deprecation warning, for use within uarray
     try:
         return backend.__ua_cache__["set", coerce, only]
     except AttributeError:
@@ -355,6 +557,8 @@ def skip_backend(backend: _SupportsUA) -> _SkipBackendContext:
 def get_defaults(
     f: Callable[..., Any],
 ) -> tuple[dict[str, Any], tuple[Any, ...], set[str]]:
+    import inspect
+
     sig = inspect.signature(f)
     kw_defaults = {}
     arg_defaults = []
@@ -413,7 +617,7 @@ def set_global_backend(
     _uarray.set_global_backend(backend, coerce, only, try_last)
 
 
-def register_backend(backend: _SupportsUA) -> None:
+def register_backend(backend: _UABackend) -> None:
     """
     This utility method sets registers backend for permanent use. It
     will be tried in the list of backends automatically, unless the
@@ -464,6 +668,545 @@ def clear_backends(
     _uarray.clear_backends(domain, registered, globals)
 
 
+def freeze_backends() -> None:
+    """
+    Freezes the global backends, for the rest of the process.
+
+    The backends set with :obj:`set_global_backend` and
+    :obj:`register_backend` are copied into an immutable table. Each
+    multimethod then looks up its domain and the parent domains in that
+    table on its first call, and reuses the result for later calls, so
+    dispatch no longer hashes domain names or reads state shared with other
+    threads.
+
+    Afterwards, :obj:`set_global_backend`, :obj:`register_backend` and
+    :obj:`clear_backends` raise :obj:`RuntimeError`. Backends set with
+    :obj:`set_backend` and :obj:`skip_backend` still take precedence over
+    the frozen ones. Threads with their own copy of the global backends,
+    i.e. within :obj:`set_state` or :obj:`reset_state`, keep using and
+    changing that copy. Freezing again does nothing.
+
+    See Also
+    --------
+    set_global_backend : Set a global backend.
+    register_backend : Register a backend globally.
+    """
+    _uarray.freeze_backends()
+
+
+def _nbytes(value: object) -> int:
+    try:
+        return int(value.nbytes)  # type: ignore[attr-defined]
+    except (AttributeError, TypeError):
+        pass
+
+    try:
+        with memoryview(value) as view:  # type: ignore[arg-type]
+            return view.nbytes
+    except TypeError:
+        return sys.getsizeof(value)
+
+
+class _CacheEntry:
+    __slots__ = ("ref", "backend", "dispatch_type", "converted", "nbytes")
+
+    def __init__(self, ref, backend, dispatch_type, converted, nbytes):
+        self.ref = ref
+        # Keep these alive so their ids in the cache key stay unique
+        self.backend = backend
+        self.dispatch_type = dispatch_type
+        self.converted = converted
+        self.nbytes = nbytes
+
+
+class ConversionCache:
+    """
+    A least-recently-used cache of coerced values.
+
+    Once set with :obj:`set_conversion_cache`, the results of coercing
+    conversions (``__ua_convert__`` called with ``coerce=True``) are stored
+    here, and later conversions of the same objects for the same backend and
+    dispatch type are served without calling ``__ua_convert__``. This applies
+    to multimethod calls as well as :obj:`determine_backend`.
+
+    Entries are keyed weakly on the input objects, and are dropped as soon as
+    an input object is garbage collected. Objects that can't be weakly
+    referenced are never cached.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of cached values.
+    maxbytes : Optional[int]
+        The maximum total size of the cached values, in bytes. Sizes are
+        taken from ``nbytes``, the buffer protocol, or ``sys.getsizeof``.
+        ``None`` means no limit.
+
+    Attributes
+    ----------
+    hits
+        The number of values served from the cache.
+    misses
+        The number of values that had to be converted.
+
+    Notes
+    -----
+    Only conversions with ``coerce=True`` are cached, since they are the
+    ones expected to copy. The backend must convert each dispatchable
+    independently of the others, as misses are converted on their own.
+
+    Examples
+    --------
+    >>> class Buffer:
+    ...     pass
+    >>> class CopyingBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     copies = 0
+    ...     @ua.wrap_single_convertor_instance
+    ...     def __ua_convert__(self, value, dispatch_type, coerce):
+    ...         self.copies += 1
+    ...         return [value]
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         return args[0]
+    >>> be = CopyingBackend()
+    >>> x = Buffer()
+    >>> ua.set_conversion_cache(ua.ConversionCache(maxsize=16))
+    >>> with ua.set_backend(be, coerce=True):
+    ...     _ = ex.call_multimethod(x)
+    ...     _ = ex.call_multimethod(x)
+    >>> be.copies
+    1
+    >>> ua.set_conversion_cache(None)
+    """
+
+    def __init__(self, maxsize: int = 128, maxbytes: None | int = None) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must be non-negative")
+        if maxbytes is not None and maxbytes < 0:
+            raise ValueError("maxbytes must be non-negative or None")
+
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self._nbytes = 0
+        self._entries: OrderedDict[tuple[int, int, int, bool], _CacheEntry] = (
+            OrderedDict()
+        )
+        # Maps id(value) to the keys of its entries, for invalidation
+        self._keys_by_value: dict[int, set[tuple[int, int, int, bool]]] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """The total size of the cached values, in bytes."""
+        return self._nbytes
+
+    def clear(self) -> None:
+        """Removes all cached values."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_value.clear()
+            self._nbytes = 0
+
+    def convert(
+        self,
+        backend: _SupportsUA,
+        dispatchables: Iterable[Dispatchable[Any, Any]],
+    ) -> Iterable[Any]:
+        """
+        Coerces ``dispatchables`` to ``backend``'s types, using cached
+        values where possible. Called by the dispatcher.
+        """
+        dispatchables = tuple(dispatchables)
+        converted: list[Any] = [None] * len(dispatchables)
+        missing = []
+        with self._lock:
+            for i, d in enumerate(dispatchables):
+                key = (id(d.value), id(backend), id(d.type), bool(d.coercible))
+                entry = self._entries.get(key)
+                if entry is not None and entry.ref() is d.value:
+                    self._entries.move_to_end(key)
+                    converted[i] = entry.converted
+                else:
+                    missing.append(i)
+
+            self.hits += len(dispatchables) - len(missing)
+            self.misses += len(missing)
+
+        if not missing:
+            return converted
+
+        to_convert = tuple(dispatchables[i] for i in missing)
+        result = _uarray.convert_dispatchables(backend, to_convert, True)
+        if result is NotImplemented:
+            return NotImplemented
+
+        result = list(result)
+        if len(result) != len(missing):
+            raise ValueError("__ua_convert__ must return one value per dispatchable")
+
+        for i, value in zip(missing, result):
+            converted[i] = value
+            self._store(backend, dispatchables[i], value)
+
+        return converted
+
+    def _store(
+        self, backend: _SupportsUA, d: Dispatchable[Any, Any], converted: Any
+    ) -> None:
+        nbytes = _nbytes(converted)
+        if self.maxsize == 0 or (self.maxbytes is not None and nbytes > self.maxbytes):
+            return
+
+        value_id = id(d.value)
+        try:
+            ref = weakref.ref(d.value, self._make_invalidator(value_id))
+        except TypeError:
+            return
+
+        key = (value_id, id(backend), id(d.type), bool(d.coercible))
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _CacheEntry(ref, backend, d.type, converted, nbytes)
+            self._keys_by_value.setdefault(value_id, set()).add(key)
+            self._nbytes += nbytes
+
+            while len(self._entries) > self.maxsize or (
+                self.maxbytes is not None and self._nbytes > self.maxbytes
+            ):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple[int, int, int, bool]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        self._nbytes -= entry.nbytes
+        keys = self._keys_by_value.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_value[key[0]]
+
+    def _make_invalidator(self, value_id: int) -> Callable[[Any], None]:
+        self_ref = weakref.ref(self)
+
+        def invalidate(ref: Any) -> None:
+            self = self_ref()
+            if self is None:
+                return
+
+            with self._lock:
+                for key in list(self._keys_by_value.get(value_id, ())):
+                    # Entries for a new object with a reused id are kept
+                    entry = self._entries.get(key)
+                    if entry is not None and entry.ref is ref:
+                        self._remove(key)
+
+        return invalidate
+
+
+def set_conversion_cache(cache: None | ConversionCache) -> None:
+    """
+    Sets the cache used for coercing conversions, see :obj:`ConversionCache`.
+
+    ``None`` disables caching. Note that this method is not thread-safe.
+
+    See Also
+    --------
+    get_conversion_cache: Gets the current conversion cache.
+    """
+    _uarray.set_conversion_cache(cache)
+
+
+def get_conversion_cache() -> None | ConversionCache:
+    """
+    Returns the cache set with :obj:`set_conversion_cache`, or ``None``.
+    """
+    return _uarray.get_conversion_cache()
+
+
+def set_selection_mode(mode: Literal["order", "cost"]) -> None:
+    """
+    Sets how multimethods choose among the backends they may call.
+
+    In the default ``"order"`` mode, backends are tried in order: the
+    backends set with :obj:`set_backend`, innermost first, then the global
+    backend, then the registered backends. The first one that implements
+    the call is used.
+
+    In the ``"cost"`` mode, the same backends are first asked for the cost
+    of the call through their ``__ua_cost__(method, dispatchables)``, and
+    then tried in order of increasing cost. Backends without
+    ``__ua_cost__``, or that return ``None`` or ``NotImplemented`` from it,
+    come last. Backends with the same cost keep their original order. The
+    resulting order is cached for each multimethod, per types of the
+    dispatched values, size bucket of their ``nbytes`` or ``len()``, and
+    list of candidate backends.
+
+    The mode applies to all threads.
+
+    Parameters
+    ----------
+    mode : str
+        Either ``"order"`` or ``"cost"``.
+
+    See Also
+    --------
+    get_selection_mode: Gets the current selection mode.
+
+    Examples
+    --------
+    >>> class CostBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __init__(self, name, cost):
+    ...         self.name, self.cost = name, cost
+    ...     def __ua_cost__(self, method, dispatchables):
+    ...         return self.cost
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         return self.name
+    >>> fast, slow = CostBackend("fast", 1), CostBackend("slow", 10)
+    >>> with ua.set_backend(fast), ua.set_backend(slow):
+    ...     ex.creation_multimethod()
+    'slow'
+    >>> ua.set_selection_mode("cost")
+    >>> with ua.set_backend(fast), ua.set_backend(slow):
+    ...     ex.creation_multimethod()
+    'fast'
+    >>> ua.set_selection_mode("order")
+    """
+    _uarray.set_selection_mode(mode)
+
+
+def get_selection_mode() -> Literal["order", "cost"]:
+    """
+    Returns the mode set with :obj:`set_selection_mode`.
+    """
+    return _uarray.get_selection_mode()  # type: ignore[return-value]
+
+
+def memory_stats() -> dict[str, Any]:
+    """
+    Reports the sizes of the backend state.
+
+    Each size is a dict with the number of ``domains`` with an entry in the
+    state, the number of references to ``backends`` it holds, and the total
+    ``capacity`` of its lists of backends, i.e. how many references they
+    have room for.
+
+    Domains set with :obj:`set_backend` or :obj:`skip_backend` are removed
+    from the state of the thread once all these contexts exited, and the
+    state of a thread is freed when the thread exits.
+
+    Returns
+    -------
+    dict
+        ``"global"`` holds the size of the global state, shared by all
+        threads. ``"thread"`` holds the size of the backends set in the
+        calling thread, and ``"thread_globals"`` the size of its own copy of
+        the global state, or ``None`` if it uses the shared one. ``"threads"``
+        is the number of threads with a state.
+
+    Examples
+    --------
+    >>> ua.memory_stats()["thread"]
+    {'domains': 0, 'backends': 0, 'capacity': 0}
+    >>> with ua.set_backend(ex.BackendA):
+    ...     ua.memory_stats()["thread"]
+    {'domains': 1, 'backends': 1, 'capacity': 1}
+    >>> ua.memory_stats()["thread"]
+    {'domains': 0, 'backends': 0, 'capacity': 0}
+    """
+    return _uarray.memory_stats()
+
+
+def _import_path(obj: object) -> None | str:
+    # Modules by name, and other objects the way `pickle_function` finds them
+    if isinstance(obj, types.ModuleType):
+        return obj.__name__
+
+    mod_name = getattr(obj, "__module__", None)
+    qname = getattr(obj, "__qualname__", None)
+    if not isinstance(mod_name, str) or not isinstance(qname, str):
+        # Instances defined at the top level of their class's module
+        module = sys.modules.get(type(obj).__module__)
+        if module is None:
+            return None
+        for name, value in vars(module).items():
+            if value is obj:
+                return f"{module.__name__}:{name}"
+        return None
+
+    import pickle
+
+    try:
+        found = unpickle_function(mod_name, qname, None)
+    except pickle.UnpicklingError:
+        return None
+
+    return f"{mod_name}:{qname}" if found is obj else None
+
+
+def _resolve_import_path(path: str) -> Any:
+    import importlib
+
+    mod_name, _, qname = path.partition(":")
+    if not qname:
+        return importlib.import_module(mod_name)
+    return unpickle_function(mod_name, qname, None)
+
+
+@contextlib.contextmanager
+def record_dispatch(path: str | os.PathLike[str]) -> Generator[None, None, None]:
+    """
+    A context manager that records which backends serve multimethod calls.
+
+    For each combination of multimethod, types of the dispatched values and
+    list of candidate backends seen within the context, the backend that
+    finally served the call is recorded. The resulting profile is written
+    to ``path`` on exit, even if the block raises, to be loaded with
+    :obj:`load_dispatch_profile`.
+
+    Multimethods, types and backends are stored by import path, like
+    multimethods are pickled. Backend instances are found by their name in
+    their class's module. Combinations involving objects that can't be found
+    by import path aren't recorded.
+
+    Parameters
+    ----------
+    path : PathLike
+        The file to write the profile to.
+
+    See Also
+    --------
+    load_dispatch_profile : Loads a recorded profile.
+    """
+    import json
+
+    routes: dict[tuple[Any, ...], int] = {}
+    previous = _uarray.get_dispatch_hook()
+
+    def hook(method, types, backends, index):
+        try:
+            routes[method, types, backends] = index
+        except TypeError:
+            pass  # Unhashable backends can't be routed to
+        if previous is not None:
+            previous(method, types, backends, index)
+
+    _uarray.set_dispatch_hook(hook)
+    try:
+        yield
+    finally:
+        _uarray.set_dispatch_hook(previous)
+
+        entries = []
+        for (method, value_types, backends), index in routes.items():
+            method_path = _import_path(method)
+            type_paths = [_import_path(t) for t in value_types]
+            backend_paths = [[_import_path(b), coerce] for b, coerce in backends]
+            if (
+                method_path is None
+                or None in type_paths
+                or any(b is None for b, _ in backend_paths)
+            ):
+                continue
+
+            entries.append(
+                {
+                    "method": method_path,
+                    "types": type_paths,
+                    "backends": backend_paths,
+                    "backend": index,
+                }
+            )
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "routes": entries}, f, indent=1)
+
+
+def load_dispatch_profile(path: str | os.PathLike[str]) -> int:
+    """
+    Loads a profile recorded with :obj:`record_dispatch`.
+
+    For calls matching a recorded combination of multimethod, types of the
+    dispatched values and list of candidate backends, the backend that
+    served the call during recording is tried first. This skips probing the
+    other backends with ``__ua_convert__``. Other calls, or calls the
+    recorded backend doesn't implement anymore, are dispatched as usual.
+
+    Entries referring to objects that can't be imported are ignored. Loading
+    a profile replaces the one loaded before, if any.
+
+    Parameters
+    ----------
+    path : PathLike
+        The file to read the profile from.
+
+    Returns
+    -------
+    int
+        The number of routes loaded.
+
+    See Also
+    --------
+    record_dispatch : Records a profile.
+    clear_dispatch_profile : Unloads the profile.
+
+    Examples
+    --------
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "profile.json")
+    >>> with ua.record_dispatch(path):
+    ...     with ua.set_backend(ex.BackendA), ua.set_backend(ex.BackendC):
+    ...         ex.typed_multimethod(ex.TypeA())
+    TypeA
+    >>> ua.load_dispatch_profile(path)
+    1
+
+    Now, ``BackendA`` is tried first for the same call, without asking
+    ``BackendC`` to convert the arguments.
+
+    >>> with ua.set_backend(ex.BackendA), ua.set_backend(ex.BackendC):
+    ...     ex.typed_multimethod(ex.TypeA())
+    TypeA
+    >>> ua.clear_dispatch_profile()
+    """
+    import json
+    import pickle
+
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    routes = {}
+    for entry in data["routes"]:
+        try:
+            method = _resolve_import_path(entry["method"])
+            value_types = tuple(_resolve_import_path(t) for t in entry["types"])
+            backends = tuple(
+                (_resolve_import_path(b), bool(coerce))
+                for b, coerce in entry["backends"]
+            )
+        except (ImportError, pickle.UnpicklingError):
+            continue
+
+        routes[method, value_types, backends] = int(entry["backend"])
+
+    _uarray.set_dispatch_routes(routes)
+    return len(routes)
+
+
+def clear_dispatch_profile() -> None:
+    """
+    Unloads the profile loaded with :obj:`load_dispatch_profile`.
+    """
+    _uarray.set_dispatch_routes(None)
+
+
 class Dispatchable(Generic[_T, _TT]):
     """
     A utility class which marks an argument with a specific dispatch type.
@@ -521,6 +1264,33 @@ class Dispatchable(Generic[_T, _TT]):
     __repr__ = __str__
 
 
+class DispatchableSequence(Dispatchable[Sequence[_T], _TT]):
+    """
+    Marks a whole sequence of values with the same dispatch type.
+
+    This is meant for variadic multimethods, e.g. ones taking a list of
+    arrays. Instead of one :obj:`Dispatchable` per element, the extractor
+    returns a single :obj:`DispatchableSequence`, and the replacer gets back
+    a list of converted values in its place.
+
+    Backends with ``__ua_convert_group__`` convert the whole sequence in a
+    single call. :obj:`wrap_single_convertor` converts it element by element.
+
+    Examples
+    --------
+    >>> x = DispatchableSequence([1, 2], int)
+    >>> x
+    <DispatchableSequence: type=<class 'int'>, value=[1, 2]>
+
+    See Also
+    --------
+    Dispatchable
+        Marks a single value.
+    """
+
+    __ua_sequence__ = True
+
+
 def mark_as(dispatch_type: _TT) -> _PartialDispatchable[_TT]:
     """
     Creates a utility function to mark something as a specific type.
@@ -577,7 +1347,8 @@ def wrap_single_convertor(
     """
     Wraps a ``__ua_convert__`` defined for a single element to all elements.
     If any of them return ``NotImplemented``, the operation is assumed to be
-    undefined.
+    undefined. Each element of a :obj:`DispatchableSequence` is converted
+    separately, and the results are returned as a list.
 
     Accepts a signature of (value, type, coerce).
     """
@@ -586,7 +1357,15 @@ def wrap_single_convertor(
     def __ua_convert__(dispatchables, coerce):
         converted = []
         for d in dispatchables:
-            c = convert_single(d.value, d.type, coerce and d.coercible)
+            if isinstance(d, DispatchableSequence):
+                c = []
+                for value in d.value:
+                    c_value = convert_single(value, d.type, coerce and d.coercible)
+                    if c_value is NotImplemented:
+                        return NotImplemented
+                    c.append(c_value)
+            else:
+                c = convert_single(d.value, d.type, coerce and d.coercible)
 
             if c is NotImplemented:
                 return NotImplemented
@@ -604,7 +1383,8 @@ def wrap_single_convertor_instance(
     """
     Wraps a ``__ua_convert__`` defined for a single element to all elements.
     If any of them return ``NotImplemented``, the operation is assumed to be
-    undefined.
+    undefined. Each element of a :obj:`DispatchableSequence` is converted
+    separately, and the results are returned as a list.
 
     Accepts a signature of (value, type, coerce).
     """
@@ -613,7 +1393,17 @@ def wrap_single_convertor_instance(
     def __ua_convert__(self, dispatchables, coerce):
         converted = []
         for d in dispatchables:
-            c = convert_single(self, d.value, d.type, coerce and d.coercible)
+            if isinstance(d, DispatchableSequence):
+                c = []
+                for value in d.value:
+                    c_value = convert_single(
+                        self, value, d.type, coerce and d.coercible
+                    )
+                    if c_value is NotImplemented:
+                        return NotImplemented
+                    c.append(c_value)
+            else:
+                c = convert_single(self, d.value, d.type, coerce and d.coercible)
 
             if c is NotImplemented:
                 return NotImplemented
@@ -625,6 +1415,288 @@ def wrap_single_convertor_instance(
     return __ua_convert__
 
 
+def _native_format(format: str) -> str:
+    # "@" is the default byte order and size, and may or may not be spelled out
+    return format[1:] if format.startswith("@") else format
+
+
+def _cast_buffer(
+    view: memoryview, format: str, shape: None | tuple[int, ...] = None
+) -> memoryview:
+    # ``memoryview.cast`` is only annotated for literal formats
+    cast: Callable[..., memoryview] = view.cast
+    return cast(format) if shape is None else cast(format, shape)
+
+
+def _copy_buffer(view: memoryview, format: None | str) -> memoryview:
+    # ``tobytes`` always produces C order, whatever the strides of ``view``
+    data = bytearray(view.tobytes())
+    if format is None or _native_format(format) == _native_format(view.format):
+        copied = _cast_buffer(memoryview(data), _native_format(view.format))
+    else:
+        items = _cast_buffer(memoryview(data), _native_format(view.format)).tolist()
+        copied = memoryview(array.array(format, items))
+
+    if view.ndim > 1:
+        copied = _cast_buffer(copied.cast("B"), copied.format, view.shape)
+
+    return copied
+
+
+class BufferConvertor(Generic[_T2]):
+    """
+    Builds a ``__ua_convert__`` for containers that support the buffer protocol.
+
+    Values marked with ``dispatch_type`` are exported with :obj:`memoryview`
+    and passed to ``target``. Whenever the format, the contiguity and the
+    writability of the exported buffer are acceptable, ``target`` gets a view
+    of the original memory. Otherwise, if coercion is allowed, the buffer is
+    copied into a new C-contiguous, writable buffer with the required format,
+    and ``target`` gets a view of that copy. Values that don't support the
+    buffer protocol, or that would need a copy without coercion, aren't
+    supported. Values marked with other dispatch types are passed through
+    unchanged.
+
+    Instances can be used directly as ``__ua_convert__``, either on a module,
+    a class or an instance.
+
+    Parameters
+    ----------
+    target : Callable[[memoryview], Any]
+        Constructs the backend's container from a :obj:`memoryview`. It must
+        not copy, if memory is to be shared. If ``target`` is a type, values
+        that are already instances of it are returned as they are, provided
+        their buffer is acceptable.
+    dispatch_type : Optional[type]
+        The dispatch type to convert. ``None`` converts all values.
+    format : Optional[str]
+        The :mod:`struct` format the items must have. ``None`` accepts any
+        format. Formats differing from the exported one are converted with
+        :mod:`array`, so must be one of its type codes.
+    writable : bool
+        Whether the buffer must be writable.
+    contiguous : bool
+        Whether the buffer must be C-contiguous.
+    on_convert : Optional[Callable[[Any, Any, bool], None]]
+        Called with ``(value, converted, copied)`` after each conversion.
+
+    Attributes
+    ----------
+    shared
+        The number of values converted without copying.
+    copied
+        The number of values that had to be copied.
+
+    Examples
+    --------
+    >>> import array
+    >>> convert = ua.BufferConvertor(memoryview, format="d")
+    >>> x = array.array("d", [1.0, 2.0])
+    >>> convert([ua.Dispatchable(x, None)], coerce=False)[0].obj is x
+    True
+    >>> y = array.array("i", [1, 2])
+    >>> convert([ua.Dispatchable(y, None)], coerce=False)
+    NotImplemented
+    >>> convert([ua.Dispatchable(y, None)], coerce=True)[0].tolist()
+    [1.0, 2.0]
+    >>> convert.shared, convert.copied
+    (1, 1)
+    """
+
+    def __init__(
+        self,
+        target: Callable[[memoryview], _T2],
+        *,
+        dispatch_type: None | type[Any] = None,
+        format: None | str = None,
+        writable: bool = False,
+        contiguous: bool = True,
+        on_convert: None | Callable[[Any, _T2, bool], None] = None,
+    ) -> None:
+        self.target = target
+        self.dispatch_type = dispatch_type
+        self.format = format
+        self.writable = writable
+        self.contiguous = contiguous
+        self.on_convert = on_convert
+        self.shared = 0
+        self.copied = 0
+        self._convert = wrap_single_convertor(self.convert_single)
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: target={self.target!r}>"
+
+    def __call__(
+        self, dispatchables: Iterable[Dispatchable[Any, Any]], coerce: bool
+    ) -> list[Any]:
+        return self._convert(dispatchables, coerce)
+
+    def _acceptable(self, view: memoryview) -> bool:
+        if self.format is not None:
+            if _native_format(view.format) != _native_format(self.format):
+                return False
+        if self.contiguous and not view.c_contiguous:
+            return False
+        if self.writable and view.readonly:
+            return False
+        return True
+
+    def convert_single(self, value: Any, dispatch_type: Any, coerce: bool) -> Any:
+        """
+        Converts a single value. Can be wrapped with
+        :obj:`wrap_single_convertor` to combine it with other conversions.
+        """
+        if self.dispatch_type is not None and dispatch_type is not self.dispatch_type:
+            return value
+
+        try:
+            view = memoryview(value)
+        except TypeError:
+            return NotImplemented
+
+        converted: _T2
+        if self._acceptable(view):
+            if isinstance(self.target, type) and issubclass(type(value), self.target):
+                converted = value
+            else:
+                converted = self.target(view)
+            copied = False
+            self.shared += 1
+        elif not coerce:
+            return NotImplemented
+        else:
+            try:
+                converted = self.target(_copy_buffer(view, self.format))
+            except (TypeError, ValueError):
+                return NotImplemented
+            copied = True
+            self.copied += 1
+
+        if self.on_convert is not None:
+            self.on_convert(value, converted, copied)
+
+        return converted
+
+
+class TypeDispatcher:
+    """
+    Builds a ``__ua_function__`` that dispatches on the types of the arguments.
+
+    Implementations are registered for a multimethod and the types of the
+    leading positional arguments. A call is passed to the implementation
+    registered for the most specific types: the first argument's type is
+    compared first, by the position of the registered types in its MRO, then
+    the second, and so on. Virtual base classes, such as ABCs a type is
+    registered with, come right before :obj:`object`. Arguments beyond a
+    signature rank after any registered type, and longer signatures win over
+    shorter ones otherwise matching as well. Calls without a matching
+    implementation return ``NotImplemented``, so the next backend is tried.
+
+    Resolved implementations are cached by multimethod and the exact types
+    of the arguments, so that dispatch after the first call takes a single
+    dictionary lookup. The cache is cleared when registering.
+
+    Instances can be used directly as ``__ua_function__``, either on a
+    module, a class or an instance.
+
+    Examples
+    --------
+    >>> dispatch = ua.TypeDispatcher()
+    >>> @dispatch.register(ex.call_multimethod, ex.TypeA)
+    ... def _(a, *args):
+    ...     return "any TypeA"
+    >>> @dispatch.register(ex.call_multimethod, ex.TypeB)
+    ... def _(a, *args):
+    ...     return "TypeB"
+    >>> class Backend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     __ua_function__ = dispatch
+    >>> with ua.set_backend(Backend):
+    ...     ex.call_multimethod(ex.TypeB()), ex.call_multimethod(ex.TypeC())
+    ('TypeB', 'any TypeA')
+    """
+
+    def __init__(self) -> None:
+        self._registry: dict[Any, dict[tuple[type, ...], Callable[..., Any]]] = {}
+        self._cache: dict[tuple[Any, tuple[type, ...]], None | Callable[..., Any]] = {}
+        self._lock = threading.Lock()
+
+    def register(
+        self, method: Callable[..., Any], *types: type
+    ) -> Callable[[Callable[_P, _T]], Callable[_P, _T]]:
+        """
+        Registers the decorated function for calls to ``method`` whose
+        leading positional arguments are instances of ``types``.
+
+        The function is called with the arguments of the call, and may
+        return ``NotImplemented`` to let the next backend try.
+        """
+
+        def decorator(impl: Callable[_P, _T]) -> Callable[_P, _T]:
+            with self._lock:
+                self._registry.setdefault(method, {})[types] = impl
+                # Replaced rather than cleared, for concurrent lookups
+                self._cache = {}
+            return impl
+
+        return decorator
+
+    def resolve(
+        self, method: Callable[..., Any], types: tuple[type, ...]
+    ) -> None | Callable[..., Any]:
+        """
+        Returns the implementation called for ``method`` with arguments of
+        exactly ``types``, or ``None`` if there is none.
+        """
+        key = (method, types)
+        cache = self._cache
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+
+        best = None
+        best_rank: None | tuple[int, ...] = None
+        for signature, impl in self._registry.get(method, {}).items():
+            if len(signature) > len(types):
+                continue
+            rank = []
+            for t, registered in zip(types, signature):
+                if not issubclass(t, registered):
+                    break
+                mro = t.__mro__
+                # Virtual bases, e.g. ABCs, rank right before `object`
+                if registered in mro:
+                    rank.append(2 * mro.index(registered))
+                else:
+                    rank.append(2 * len(mro) - 3)
+            else:
+                # Arguments without a registered type rank last, so that
+                # the length only breaks ties
+                rank.extend([sys.maxsize] * (len(types) - len(signature)))
+                rank.append(-len(signature))
+                if best_rank is None or tuple(rank) < best_rank:
+                    best, best_rank = impl, tuple(rank)
+
+        cache[key] = best
+        return best
+
+    def __call__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        try:
+            impl = self._cache[method, tuple(map(type, args))]
+        except KeyError:
+            impl = self.resolve(method, tuple(map(type, args)))
+
+        if impl is None:
+            return NotImplemented
+        return impl(*args, **kwargs)
+
+
 def determine_backend(
     value: object,
     dispatch_type: type[Any],
@@ -632,6 +1704,7 @@ def determine_backend(
     domain: str,
     only: bool = True,
     coerce: bool = False,
+    cache: bool = False,
 ) -> _SetBackendContext:
     """Set the backend to the first active backend that supports ``value``
 
@@ -652,6 +1725,9 @@ def determine_backend(
         Whether or not to allow coercion to the backend's types. Implies ``only``.
     only: bool
         Whether or not this should be the last backend to try.
+    cache: bool
+        Whether or not to reuse the backend determined before for a value of
+        the same type, see the notes.
 
     See Also
     --------
@@ -664,6 +1740,11 @@ def determine_backend(
     supporting the type must return ``NotImplemented`` from their
     ``__ua_convert__`` if they don't support input of that type.
 
+    With ``cache=True``, the backend determined for a value of the same type
+    and the same arguments is set again as long as the backends set are the
+    same, without calling ``__ua_convert__``. This assumes that backends
+    accept or reject values based on their type only.
+
     Examples
     --------
 
@@ -701,9 +1782,7 @@ def determine_backend(
 
     """
     dispatchables = (Dispatchable(value, dispatch_type, coerce),)
-    backend = _uarray.determine_backend(domain, dispatchables, coerce)
-
-    return set_backend(backend, coerce=coerce, only=only)
+    return _determine_backend(domain, dispatchables, coerce, only, cache)
 
 
 def determine_backend_multi(
@@ -712,6 +1791,7 @@ def determine_backend_multi(
     domain: str,
     only: bool = True,
     coerce: bool = False,
+    cache: bool = False,
     **kwargs: type[Any],
 ) -> _SetBackendContext:
     """Set a backend supporting all ``dispatchables``
@@ -731,6 +1811,9 @@ def determine_backend_multi(
         Whether or not to allow coercion to the backend's types. Implies ``only``.
     only: bool
         Whether or not this should be the last backend to try.
+    cache: bool
+        Whether or not to reuse the backend determined before for values of
+        the same types. See :func:`determine_backend`.
     dispatch_type: Optional[Any]
         The default dispatch type associated with ``dispatchables``, aka
         ":ref:`marking <MarkingGlossary>`".
@@ -795,6 +1878,74 @@ def determine_backend_multi(
     if len(kwargs) != 0:
         raise TypeError("Received unexpected keyword arguments: {}".format(kwargs))
 
+    return _determine_backend(domain, dispatchables, coerce, only, cache)
+
+
+# Backends determined by `determine_backend` with `cache=True`, most recently
+# used last
+_determined: OrderedDict[tuple[Any, ...], _SupportsUA] = OrderedDict()
+_determined_lock = threading.Lock()
+_DETERMINED_MAXSIZE = 256
+
+
+def _determine_backend(
+    domain: str,
+    dispatchables: tuple[Dispatchable[Any, Any], ...],
+    coerce: bool,
+    only: bool,
+    cache: bool,
+) -> _SetBackendContext:
+    backend = _cached_backend(domain, dispatchables, coerce) if cache else None
+    if backend is None:
+        backend = _uarray.determine_backend(domain, dispatchables, coerce)
+
+    # Built the same way whether or not the backend came from the cache
+    return _SetBackendContext(backend, coerce, only)
+
+
+def _cached_backend(
+    domain: str,
+    dispatchables: tuple[Dispatchable[Any, Any], ...],
+    coerce: bool,
+) -> None | _SupportsUA:
+    # The state version changes whenever the backends that could be
+    # determined change
+    key = (
+        domain,
+        _uarray.get_state_version(),
+        tuple((type(d.value), d.type, d.coercible) for d in dispatchables),
+        coerce,
+    )
+    try:
+        with _determined_lock:
+            backend = _determined[key]
+            _determined.move_to_end(key)
+        return backend
+    except KeyError:
+        pass
+    except TypeError:
+        # Unhashable dispatch types
+        return None
+
     backend = _uarray.determine_backend(domain, dispatchables, coerce)
+    with _determined_lock:
+        _determined[key] = backend
+        if len(_determined) > _DETERMINED_MAXSIZE:
+            _determined.popitem(last=False)
+    return backend
+
+
+def get_include() -> str:
+    """
+    Gets the directory containing ``uarray_api.h``, the C API header.
 
-    return set_backend(backend, coerce=coerce, only=only)
+    Extensions include it to call multimethods and implement backends in C,
+    see the header for details.
+
+    Examples
+    --------
+    >>> import os
+    >>> os.path.exists(os.path.join(ua.get_include(), "uarray_api.h"))
+    True
+    """
+    return os.path.join(os.path.dirname(__file__), "include")
@@ -0,0 +1,387 @@
+"""Deferred execution of multimethods."""
+
+from __future__ import annotations
+
+import operator
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+from ._backend import get_state, set_state
+from ._uarray import _SkipBackendContext
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+__all__ = [
+    "LazyBackend",
+    "LazyValue",
+    "compute",
+]
+
+
+class _Node:
+    __slots__ = ("backend", "method", "args", "kwargs")
+
+    def __init__(
+        self,
+        backend: None | LazyBackend,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None:
+        self.backend = backend
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+
+    def dependencies(self) -> list[_Node]:
+        deps: list[_Node] = []
+        _map_lazy((self.args, self.kwargs), lambda v: deps.append(v._node))
+        return deps
+
+
+class _Constant:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+
+def _map_lazy(obj: Any, f: Callable[[LazyValue], Any]) -> Any:
+    """Applies ``f`` to the lazy values in ``obj``, looking into containers."""
+    if isinstance(obj, LazyValue):
+        return f(obj)
+
+    # Exact types only, so that e.g. named tuples are left alone
+    t = type(obj)
+    if t is tuple or t is list:
+        return t(_map_lazy(o, f) for o in obj)
+    if t is dict:
+        return {k: _map_lazy(v, f) for k, v in obj.items()}
+    return obj
+
+
+def _key(obj: Any) -> Any:
+    """A hashable key that's equal for equivalent arguments."""
+    if isinstance(obj, LazyValue):
+        return LazyValue, id(obj._node)
+
+    t = type(obj)
+    if t is tuple or t is list:
+        return t, tuple(_key(o) for o in obj)
+    if t is dict:
+        # In insertion order, as keys may not be orderable
+        return t, tuple((_key(k), _key(v)) for k, v in obj.items())
+    if t is float or t is complex:
+        # By repr, as e.g. 0.0 and -0.0 are equal but give different results
+        return t, repr(obj)
+
+    try:
+        hash(obj)
+    except TypeError:
+        # Only the same object is known to be equivalent
+        return id, id(obj)
+    return t, obj
+
+
+class LazyValue:
+    """
+    The deferred result of a multimethod called under a :obj:`LazyBackend`.
+
+    Lazy values can be passed to other multimethods under the same backend,
+    which records the calls instead of executing them. Use :obj:`compute` to
+    get the actual values.
+    """
+
+    __slots__ = ("_node",)
+
+    def __init__(self, node: _Node) -> None:
+        self._node = node
+
+    def __repr__(self) -> str:
+        name = getattr(self._node.method, "__name__", repr(self._node.method))
+        return f"<{type(self).__name__}: {name}(...)>"
+
+    @property
+    def method(self) -> Callable[..., Any]:
+        """The multimethod that produces this value."""
+        return self._node.method
+
+    @property
+    def args(self) -> tuple[Any, ...]:
+        """The positional arguments of the deferred call."""
+        return self._node.args
+
+    @property
+    def kwargs(self) -> dict[str, Any]:
+        """The keyword arguments of the deferred call."""
+        return self._node.kwargs
+
+    # Otherwise, iteration would fall back to ``__getitem__`` and never end
+    __iter__ = None
+
+    def __getitem__(self, key: Any) -> LazyValue:
+        # Lets multimethods returning tuples be unpacked lazily
+        return LazyValue(_Node(self._node.backend, operator.getitem, (self, key), {}))
+
+    def compute(self, executor: None | concurrent.futures.Executor = None) -> Any:
+        """Computes this value. See :obj:`compute`."""
+        return compute(self, executor=executor)[0]
+
+
+class LazyBackend:
+    """
+    A backend that records multimethod calls instead of executing them.
+
+    Under this backend, multimethods return :obj:`LazyValue` objects
+    standing in for their results. These record the multimethod and its
+    arguments, forming a graph of deferred calls that is only executed by
+    :obj:`compute`.
+
+    Parameters
+    ----------
+    domain : str or Sequence[str]
+        The domain(s) to defer multimethods for.
+    rules : Optional[Mapping[Callable, Callable]]
+        Simplification rules, applied by :obj:`compute` before execution.
+        Rules are called with the arguments of a deferred call of the
+        multimethod they're registered for, and return either
+        ``NotImplemented`` or the value to use instead of the call's result.
+        That value may be a (possibly new) lazy value, and rules can look
+        into their lazy arguments through :obj:`LazyValue.method`,
+        :obj:`LazyValue.args` and :obj:`LazyValue.kwargs`.
+
+    See Also
+    --------
+    compute : Executes deferred multimethod calls.
+
+    Examples
+    --------
+    >>> calls = []
+    >>> class AddBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         calls.append(args)
+    ...         return sum(args)
+    >>> lazy = ua.LazyBackend("ua_examples")
+    >>> with ua.set_backend(AddBackend()), ua.set_backend(lazy):
+    ...     a = ex.call_multimethod(1, 2)
+    ...     b = ex.call_multimethod(1, 2)
+    ...     c = ex.call_multimethod(a, b)
+    >>> isinstance(c, ua.LazyValue)
+    True
+    >>> calls
+    []
+
+    Computing ``c`` executes the equivalent calls for ``a`` and ``b`` once.
+
+    >>> with ua.set_backend(AddBackend()):
+    ...     c.compute()
+    6
+    >>> calls
+    [(1, 2), (3, 3)]
+    """
+
+    def __init__(
+        self,
+        domain: str | Sequence[str],
+        rules: None | Mapping[Callable[..., Any], Callable[..., Any]] = None,
+    ) -> None:
+        self.__ua_domain__ = domain
+        self.rules = dict(rules) if rules is not None else {}
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.__ua_domain__!r}>"
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> LazyValue:
+        return LazyValue(_Node(self, method, args, kwargs))
+
+
+def _simplify(
+    outputs: Iterable[_Node],
+) -> tuple[dict[_Node, _Node | _Constant], list[_Node]]:
+    """
+    Applies simplification rules and eliminates common subexpressions.
+
+    Returns what each node resolves to, and the new nodes in topological
+    order. Dependencies of new nodes are new nodes themselves.
+    """
+    resolved: dict[_Node, _Node | _Constant] = {}
+    aliases: dict[_Node, _Node] = {}
+    tried: set[_Node] = set()
+    table: dict[Any, _Node] = {}
+    order: list[_Node] = []
+
+    def substitute(v: LazyValue) -> Any:
+        r = resolved[v._node]
+        return r.value if isinstance(r, _Constant) else LazyValue(r)
+
+    # Iterative post-order traversal, so long chains don't hit the recursion limit
+    stack = list(outputs)
+    while stack:
+        node = stack[-1]
+        if node in resolved:
+            stack.pop()
+            continue
+
+        pending = [d for d in node.dependencies() if d not in resolved]
+        if pending:
+            stack.extend(pending)
+            continue
+
+        if node in aliases:
+            alias = aliases[node]
+            if alias in resolved:
+                resolved[node] = resolved[alias]
+                stack.pop()
+            else:
+                stack.append(alias)
+            continue
+
+        args, kwargs = _map_lazy((node.args, node.kwargs), substitute)
+
+        rule = node.backend.rules.get(node.method) if node.backend else None
+        if rule is not None and node not in tried:
+            tried.add(node)
+            out = rule(*args, **kwargs)
+            if isinstance(out, LazyValue):
+                if out._node is not node:
+                    aliases[node] = out._node
+                    continue
+            elif out is not NotImplemented:
+                resolved[node] = _Constant(out)
+                stack.pop()
+                continue
+
+        key = (node.method, _key(args), _key(kwargs))
+        canonical = table.get(key)
+        if canonical is None:
+            canonical = _Node(node.backend, node.method, args, kwargs)
+            table[key] = canonical
+            order.append(canonical)
+
+        resolved[node] = canonical
+        stack.pop()
+
+    return resolved, order
+
+
+def _evaluate(node: _Node, results: dict[_Node, Any]) -> Any:
+    args, kwargs = _map_lazy((node.args, node.kwargs), lambda v: results[v._node])
+    if node.backend is None:
+        return node.method(*args, **kwargs)
+
+    with _SkipBackendContext(node.backend):
+        return node.method(*args, **kwargs)
+
+
+def compute(
+    *values: Any, executor: None | concurrent.futures.Executor = None
+) -> tuple[Any, ...]:
+    """
+    Computes lazy values.
+
+    The deferred calls the values depend on are simplified with the rules of
+    their :obj:`LazyBackend`, and equivalent calls are merged. The calls are
+    then executed with the currently set backends, skipping the lazy backend
+    that recorded them. Intermediate results are released as soon as they are
+    no longer needed.
+
+    Parameters
+    ----------
+    values
+        The values to compute. Values that aren't lazy are returned as-is.
+    executor : Optional[concurrent.futures.Executor]
+        If given, independent calls are submitted to this executor and run
+        concurrently, each with the backend state of the calling thread.
+
+    Returns
+    -------
+    tuple
+        The computed values, in the same order as ``values``.
+
+    See Also
+    --------
+    LazyBackend : Records multimethod calls for later execution.
+    """
+    outputs = [v._node for v in values if isinstance(v, LazyValue)]
+    resolved, order = _simplify(outputs)
+
+    # Only nodes that outputs depend on are executed
+    roots = [r for r in map(resolved.__getitem__, outputs) if isinstance(r, _Node)]
+    needed: set[_Node] = set(roots)
+    for node in reversed(order):
+        if node in needed:
+            needed.update(node.dependencies())
+    order = [node for node in order if node in needed]
+
+    # How many times each result is still needed, to release intermediates
+    consumers = {node: 0 for node in order}
+    for node in roots:
+        consumers[node] += 1
+    dependencies = {node: set(node.dependencies()) for node in order}
+    for deps in dependencies.values():
+        for dep in deps:
+            consumers[dep] += 1
+
+    results: dict[_Node, Any] = {}
+
+    def finish(node: _Node, result: Any) -> None:
+        results[node] = result
+        for dep in dependencies[node]:
+            consumers[dep] -= 1
+            if consumers[dep] == 0:
+                del results[dep]
+
+    if executor is None:
+        for node in order:
+            finish(node, _evaluate(node, results))
+    else:
+        import concurrent.futures
+
+        state = get_state()
+
+        def run(node: _Node) -> Any:
+            with set_state(state):
+                return _evaluate(node, results)
+
+        remaining = {node: len(deps) for node, deps in dependencies.items()}
+        dependents: dict[_Node, list[_Node]] = {node: [] for node in order}
+        for node, deps in dependencies.items():
+            for dep in deps:
+                dependents[dep].append(node)
+
+        futures = {
+            executor.submit(run, node): node for node in order if not remaining[node]
+        }
+        try:
+            while futures:
+                done, _ = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    node = futures.pop(future)
+                    finish(node, future.result())
+                    for dependent in dependents[node]:
+                        remaining[dependent] -= 1
+                        if not remaining[dependent]:
+                            futures[executor.submit(run, dependent)] = dependent
+        finally:
+            for future in futures:
+                future.cancel()
+
+    computed = []
+    for v in values:
+        if not isinstance(v, LazyValue):
+            computed.append(v)
+            continue
+
+        r = resolved[v._node]
+        computed.append(r.value if isinstance(r, _Constant) else results[r])
+
+    return tuple(computed)
@@ -1,7 +1,7 @@
 """Helper module with various typing-related utilities."""
 
 import functools
-from collections.abc import Callable
+from collections.abc import Awaitable, Callable
 from typing import Any, Protocol, TypeVar, Iterable, type_check_only
 
 import uarray
@@ -28,6 +28,32 @@ class _SupportsUA(Protocol):
         /,
     ) -> Iterable[Any]: ...
 
+@type_check_only
+class _SupportsUAFunction(Protocol):
+    @property
+    def __ua_domain__(self) -> str | _PySequence[str]: ...
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        /,
+    ) -> Any: ...
+
+@type_check_only
+class _SupportsUAFunctionAsync(Protocol):
+    def __ua_function_async__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        /,
+    ) -> Awaitable[Any]: ...
+
+# Backends without ``__ua_convert__``, such as stubs, are accepted where
+# they are registered
+_UABackend = _SupportsUA | _SupportsUAFunction
+
 @type_check_only
 class _PartialDispatchable(functools.partial[uarray.Dispatchable[Any, _TT]]):
     func: type[uarray.Dispatchable[Any, _TT]]
@@ -1,7 +1,7 @@
 """Annotations for the ``uarray._uarray`` extension module."""
 
 import types
-from collections.abc import Callable, Iterable
+from collections.abc import Callable, Coroutine, Iterable
 from typing import Any, final, overload, Generic, ParamSpec
 
 import uarray
@@ -10,6 +10,7 @@ from uarray._typing import (
     _PyLocalDict,
     _ReplacerFunc,
     _SupportsUA,
+    _UABackend,
 )
 
 _P = ParamSpec("_P")
@@ -18,7 +19,7 @@ class BackendNotImplementedError(NotImplementedError): ...
 
 @final
 class _SkipBackendContext:
-    def __init__(self, backend: _SupportsUA) -> None: ...
+    def __init__(self, backend: _UABackend) -> None: ...
     def __enter__(self) -> None: ...
     def __exit__(
         self,
@@ -27,7 +28,7 @@ class _SkipBackendContext:
         traceback: types.TracebackType | None,
         /,
     ) -> None: ...
-    def _pickle(self) -> tuple[_SupportsUA]: ...
+    def _pickle(self) -> tuple[_UABackend]: ...
 
 @final
 class _SetBackendContext:
@@ -67,6 +68,23 @@ class _BackendState:
         /,
     ) -> _BackendState: ...
 
+@final
+class _NativeBackend:
+    @property
+    def __ua_domain__(self) -> str | tuple[str, ...]: ...
+    def __ua_convert__(
+        self, dispatchables: tuple[uarray.Dispatchable[Any, Any], ...], coerce: bool, /
+    ) -> Any: ...
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        /,
+    ) -> Any: ...
+
+_C_API: object
+
 # TODO: Remove the `type: ignore` once python/mypy#12033 has been bug fixed
 @final  # type: ignore[arg-type]
 class _Function(Generic[_P]):
@@ -81,6 +99,16 @@ class _Function(Generic[_P]):
     ) -> None: ...
     def __repr__(self) -> str: ...
     def __call__(self, *args: _P.args, **kwargs: _P.kwargs) -> Any: ...
+    def acall(self, *args: _P.args, **kwargs: _P.kwargs) -> Coroutine[Any, Any, Any]: ...
+    def _replace_dispatchables(
+        self,
+        backend: _UABackend,
+        coerce: bool,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        dispatchables: None | tuple[uarray.Dispatchable[Any, Any], ...],
+        /,
+    ) -> Any: ...
     @overload
     def __get__(self, obj: None, type: type[Any]) -> _Function[_P]: ...
     @overload
@@ -123,6 +151,23 @@ def determine_backend(
     coerce: bool,
     /,
 ) -> _SupportsUA: ...
-def register_backend(backend: _SupportsUA, /) -> None: ...
+def register_backend(backend: _UABackend, /) -> None: ...
+def _replace_backend(old: _UABackend, new: _UABackend, /) -> None: ...
 def get_state() -> _BackendState: ...
 def set_state(arg: _BackendState, reset_allowed: bool = ..., /) -> None: ...
+def convert_dispatchables(
+    backend: _SupportsUA,
+    dispatchables: Iterable[uarray.Dispatchable[Any, Any]],
+    coerce: bool,
+    /,
+) -> Any: ...
+def set_conversion_cache(cache: None | uarray.ConversionCache, /) -> None: ...
+def get_conversion_cache() -> None | uarray.ConversionCache: ...
+def set_selection_mode(mode: str, /) -> None: ...
+def get_selection_mode() -> str: ...
+def memory_stats() -> dict[str, Any]: ...
+def get_state_version() -> tuple[int, int]: ...
+def freeze_backends() -> None: ...
+def set_dispatch_routes(routes: None | dict[Any, int], /) -> None: ...
+def set_dispatch_hook(hook: None | Callable[..., object], /) -> None: ...
+def get_dispatch_hook() -> None | Callable[..., object]: ...
@@ -0,0 +1,1325 @@
+"""Backends that wrap other backends."""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import os
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable, Iterator, Mapping, Sequence
+from typing import TYPE_CHECKING, Any
+
+from ._backend import (
+    DispatchableSequence,
+    _cast_buffer,
+    _resolve_import_path,
+    _set_backend,
+    get_state,
+    register_backend,
+    set_state,
+)
+from ._uarray import (
+    BackendNotImplementedError,
+    _SetBackendContext,
+    _replace_backend,
+    convert_dispatchables,
+)
+
+if TYPE_CHECKING:
+    import concurrent.futures
+    from multiprocessing import shared_memory
+
+    from ._backend import Dispatchable
+    from ._typing import _ReplacerFunc, _SupportsUA, _UABackend
+
+__all__ = [
+    "chunked",
+    "parallel",
+    "autotune",
+    "BackendGroup",
+    "process_backend",
+    "discover_backends",
+]
+
+
+def _call_with(
+    backend: _SupportsUA,
+    method: Callable[..., Any],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> Any:
+    with _set_backend(backend, only=True):
+        return method(*args, **kwargs)
+
+
+def _forward(
+    backend: _SupportsUA,
+    method: Callable[..., Any],
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> Any:
+    """Calls ``method`` with ``backend``, letting dispatch move on if it fails."""
+    try:
+        return _call_with(backend, method, args, kwargs)
+    except BackendNotImplementedError:
+        return NotImplemented
+
+
+def _default_split(value: Any, start: int, stop: int) -> Any:
+    return value[start:stop]
+
+
+def _sized(d: Dispatchable[Any, Any]) -> bool:
+    if isinstance(d, DispatchableSequence):
+        return False
+    try:
+        len(d.value)
+    except TypeError:
+        return False
+    return True
+
+
+def _split_indices(
+    dispatchables: Sequence[Dispatchable[Any, Any]],
+    accept: Callable[[Dispatchable[Any, Any]], bool],
+) -> tuple[list[int], int]:
+    """The indices of the dispatchables to split, and their common length."""
+    indices = [i for i, d in enumerate(dispatchables) if accept(d)]
+    lengths = {len(dispatchables[i].value) for i in indices}
+    if len(lengths) > 1:
+        raise ValueError("Inputs to be split must have the same length.")
+    return indices, lengths.pop() if lengths else 0
+
+
+def _split_calls(
+    replacer: _ReplacerFunc,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+    dispatchables: Sequence[Dispatchable[Any, Any]],
+    indices: Sequence[int],
+    bounds: Iterable[tuple[int, int]],
+    take: Callable[[Any, int, int], Any],
+) -> Generator[tuple[tuple[Any, ...], dict[str, Any]], None, None]:
+    """Yields the arguments for each part of the split dispatchables."""
+    values = [d.value for d in dispatchables]
+    for start, stop in bounds:
+        part = list(values)
+        for i in indices:
+            part[i] = take(values[i], start, stop)
+        yield replacer(args, kwargs, tuple(part))
+
+
+def _map_with_state(
+    executor: concurrent.futures.Executor,
+    backend: _SupportsUA,
+    method: Callable[..., Any],
+    calls: Iterable[tuple[tuple[Any, ...], dict[str, Any]]],
+    max_in_flight: None | int = None,
+) -> Generator[Any, None, None]:
+    """
+    Calls ``method`` with ``backend`` in ``executor``, with the backend state
+    of the calling thread. Yields the results in order.
+    """
+    state = get_state()
+
+    def run(args: tuple[Any, ...], kwargs: dict[str, Any]) -> Any:
+        with set_state(state), _set_backend(backend, only=True):
+            return method(*args, **kwargs)
+
+    pending: collections.deque[concurrent.futures.Future[Any]] = collections.deque()
+    try:
+        for args, kwargs in calls:
+            if max_in_flight is not None and len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(run, args, kwargs))
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+class _ChunkedBackend:
+    def __init__(
+        self,
+        inner: _SupportsUA,
+        chunk_size: int,
+        combine: Mapping[Callable[..., Any], Callable[[Iterator[Any]], Any]],
+        split: Callable[[Any, int, int], Any],
+        dispatch_type: Any,
+        max_in_flight: int,
+        executor: None | concurrent.futures.Executor,
+    ) -> None:
+        self.inner = inner
+        self.chunk_size = chunk_size
+        self.combine = dict(combine)
+        self.split = split
+        self.dispatch_type = dispatch_type
+        self.max_in_flight = max_in_flight
+        self.executor = executor
+        self.__ua_domain__ = inner.__ua_domain__
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.inner!r}, chunk_size={self.chunk_size}>"
+
+    def _splits(self, d: Dispatchable[Any, Any]) -> bool:
+        if self.dispatch_type is not None and d.type is not self.dispatch_type:
+            return False
+        return _sized(d)
+
+    def _map(
+        self,
+        method: Callable[..., Any],
+        calls: Iterable[tuple[tuple[Any, ...], dict[str, Any]]],
+    ) -> Generator[Any, None, None]:
+        if self.executor is not None:
+            return _map_with_state(
+                self.executor, self.inner, method, calls, self.max_in_flight
+            )
+        return (_call_with(self.inner, method, a, kw) for a, kw in calls)
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        combine = self.combine.get(method)
+        replacer = getattr(method, "arg_replacer", None)
+        if combine is None or replacer is None:
+            return _forward(self.inner, method, args, kwargs)
+
+        dispatchables = method.arg_extractor(*args, **kwargs)  # type: ignore[attr-defined]
+        indices, length = _split_indices(dispatchables, self._splits)
+        if length <= self.chunk_size:
+            return _forward(self.inner, method, args, kwargs)
+
+        bounds = (
+            (start, min(start + self.chunk_size, length))
+            for start in range(0, length, self.chunk_size)
+        )
+        calls = _split_calls(
+            replacer, args, kwargs, dispatchables, indices, bounds, self.split
+        )
+        results = self._map(method, calls)
+        try:
+            return combine(results)
+        finally:
+            results.close()
+
+
+def chunked(
+    inner: _SupportsUA,
+    chunk_size: int,
+    combine: Mapping[Callable[..., Any], Callable[[Iterator[Any]], Any]],
+    *,
+    split: None | Callable[[Any, int, int], Any] = None,
+    dispatch_type: Any = None,
+    max_in_flight: int = 2,
+    executor: None | concurrent.futures.Executor = None,
+) -> _ChunkedBackend:
+    """
+    Wraps ``inner`` into a backend that processes large inputs in chunks.
+
+    Multimethods listed in ``combine`` are split along the first axis of
+    their marked dispatchables, and called once per chunk with ``inner``.
+    The results are streamed to the multimethod's combine function, which
+    merges them into the result for the whole input. All other multimethods,
+    and inputs no longer than ``chunk_size``, are passed on to ``inner`` as
+    they are.
+
+    Parameters
+    ----------
+    inner
+        The backend that executes the chunks. Its domain is used for the
+        returned backend.
+    chunk_size : int
+        The maximum length of a chunk.
+    combine : Mapping[Callable, Callable[[Iterator], Any]]
+        Declares which multimethods can be split. Maps each of them to a
+        function taking an iterator over the per-chunk results, in order,
+        and returning the combined result. E.g., a concatenation for
+        elementwise multimethods, or a reduction for reducible ones.
+    split : Optional[Callable[[Any, int, int], Any]]
+        Called with ``(value, start, stop)`` to take a chunk of a
+        dispatchable. Defaults to slicing.
+    dispatch_type : Optional[type]
+        Only dispatchables marked with this type are split. By default, all
+        dispatchables supporting :obj:`len` are, except for those in a
+        :obj:`DispatchableSequence`. The dispatchables that are split must
+        have the same length, the others are passed to each chunk unchanged.
+    max_in_flight : int
+        The maximum number of chunks submitted to ``executor`` at once.
+        Without an executor, chunks are produced and processed one by one.
+    executor : Optional[concurrent.futures.Executor]
+        If given, chunks are processed by this executor, with the backend
+        state of the calling thread.
+
+    Returns
+    -------
+    The wrapper backend, to be used with :obj:`set_backend` and similar.
+
+    Examples
+    --------
+    >>> class SumBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         print("chunk:", args[0])
+    ...         return sum(args[0])
+    >>> total = ua.generate_multimethod(
+    ...     lambda a: (ua.Dispatchable(a, list),),
+    ...     lambda args, kwargs, dispatchables: (dispatchables, kwargs),
+    ...     "ua_examples",
+    ... )
+    >>> be = ua.chunked(SumBackend(), 2, {total: sum})
+    >>> with ua.set_backend(be):
+    ...     total([1, 2, 3, 4, 5])
+    chunk: [1, 2]
+    chunk: [3, 4]
+    chunk: [5]
+    15
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive.")
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be positive.")
+
+    return _ChunkedBackend(
+        inner,
+        chunk_size,
+        combine,
+        split if split is not None else _default_split,
+        dispatch_type,
+        max_in_flight,
+        executor,
+    )
+
+
+def _take_elements(value: Any, start: int, stop: int) -> list[Any]:
+    return list(value[start:stop])
+
+
+class _ParallelBackend:
+    def __init__(
+        self,
+        inner: _SupportsUA,
+        executor: concurrent.futures.Executor,
+        split: Mapping[Callable[..., Any], Any],
+        combine: Mapping[Callable[..., Any], Callable[[list[Any]], Any]],
+        parts: int,
+    ) -> None:
+        self.inner = inner
+        self.executor = executor
+        self.split = dict(split)
+        self.combine = dict(combine)
+        self.parts = parts
+        self.__ua_domain__ = inner.__ua_domain__
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.inner!r}>"
+
+    def _calls(
+        self,
+        how: Any,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None | Iterable[tuple[tuple[Any, ...], dict[str, Any]]]:
+        if callable(how):
+            return how(args, kwargs)
+
+        replacer = getattr(method, "arg_replacer", None)
+        if replacer is None:
+            return None
+
+        dispatchables = method.arg_extractor(*args, **kwargs)  # type: ignore[attr-defined]
+        if how == "batch":
+            indices, length = _split_indices(dispatchables, _sized)
+            size = -(-length // self.parts)
+            take = _default_split
+        elif how == "sequence":
+            indices, length = _split_indices(
+                dispatchables, lambda d: isinstance(d, DispatchableSequence)
+            )
+            size = 1
+            take = _take_elements
+        else:
+            raise ValueError(f"Unknown split {how!r} for {method!r}.")
+
+        if length <= 1:
+            return None
+
+        bounds = [
+            (start, min(start + size, length)) for start in range(0, length, size)
+        ]
+        return _split_calls(
+            replacer, args, kwargs, dispatchables, indices, bounds, take
+        )
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        how = self.split.get(method)
+        calls = self._calls(how, method, args, kwargs) if how is not None else None
+        if calls is None:
+            return _forward(self.inner, method, args, kwargs)
+
+        results = list(_map_with_state(self.executor, self.inner, method, calls))
+        combine = self.combine.get(method, list)
+        return combine(results)
+
+
+def parallel(
+    inner: _SupportsUA,
+    executor: concurrent.futures.Executor,
+    split: Mapping[Callable[..., Any], Any],
+    *,
+    combine: None | Mapping[Callable[..., Any], Callable[[list[Any]], Any]] = None,
+    parts: None | int = None,
+) -> _ParallelBackend:
+    """
+    Wraps ``inner`` into a backend that runs multimethod calls in parallel.
+
+    Calls of the multimethods listed in ``split`` are split into independent
+    calls, which are executed concurrently by ``executor`` with ``inner`` and
+    the backend state of the calling thread. Their results are collected, in
+    order, and passed to the multimethod's combine function. All other
+    multimethods are passed on to ``inner`` as they are.
+
+    This only speeds things up if ``inner`` releases the GIL, or on
+    free-threaded Python builds, when using a thread pool.
+
+    Parameters
+    ----------
+    inner
+        The backend that executes the calls. Its domain is used for the
+        returned backend.
+    executor : concurrent.futures.Executor
+        The executor to run the calls in. It must not be one of its own
+        workers that calls the multimethods, or it may deadlock.
+    split : Mapping[Callable, Union[str, Callable]]
+        Declares how to split calls of each multimethod. Either
+
+        * ``"batch"``, which splits the marked dispatchables along their
+          first axis into ``parts`` parts, like :obj:`chunked`,
+        * ``"sequence"``, which makes one call per element of the
+          :obj:`DispatchableSequence` dispatchables, each getting a list with
+          a single element, or
+        * a function taking ``(args, kwargs)`` and returning an iterable of
+          ``(args, kwargs)`` for each independent call.
+    combine : Optional[Mapping[Callable, Callable[[list], Any]]]
+        Maps multimethods to functions that take the list of results, in
+        order, and return the result of the whole call. The list itself is
+        returned for multimethods not listed here.
+    parts : Optional[int]
+        The number of parts for ``"batch"`` splits. Defaults to the number of
+        CPUs.
+
+    Returns
+    -------
+    The wrapper backend, to be used with :obj:`set_backend` and similar.
+
+    See Also
+    --------
+    chunked : Splits calls into chunks of a bounded size.
+
+    Examples
+    --------
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> class LengthBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         return [len(a) for a in args]
+    >>> lengths = ua.generate_multimethod(
+    ...     lambda *a: (ua.DispatchableSequence(a, list),),
+    ...     lambda args, kwargs, dispatchables: (tuple(dispatchables[0]), kwargs),
+    ...     "ua_examples",
+    ... )
+    >>> with ThreadPoolExecutor(2) as executor:
+    ...     be = ua.parallel(LengthBackend(), executor, {lengths: "sequence"})
+    ...     with ua.set_backend(be):
+    ...         lengths([1], [2, 3], [4, 5, 6])
+    [[1], [2], [3]]
+    """
+    if parts is None:
+        parts = os.cpu_count() or 1
+    if parts < 1:
+        raise ValueError("parts must be positive.")
+
+    return _ParallelBackend(
+        inner, executor, split, combine if combine is not None else {}, parts
+    )
+
+
+def _qualified_name(obj: Any) -> str:
+    return f"{obj.__module__}:{obj.__qualname__}"
+
+
+def _size_bucket(dispatchables: Iterable[Dispatchable[Any, Any]]) -> int:
+    # Same buckets as the "cost" selection mode: the bit length of the total
+    # ``nbytes`` or ``len()`` of the values
+    total = 0
+    for d in dispatchables:
+        try:
+            size = d.value.nbytes
+        except AttributeError:
+            try:
+                size = len(d.value)
+            except TypeError:
+                continue
+        if isinstance(size, int) and size > 0:
+            total += size
+    return total.bit_length()
+
+
+# (multimethod, types of the dispatched values, size bucket)
+_TuningKey = tuple[str, tuple[str, ...], int]
+
+
+class _AutotuneBackend:
+    def __init__(
+        self,
+        candidates: Mapping[str, _SupportsUA],
+        trials: int,
+        path: None | str | os.PathLike[str],
+    ) -> None:
+        self.candidates = dict(candidates)
+        self.trials = trials
+        self.path = path
+        self.__ua_domain__ = next(iter(self.candidates.values())).__ua_domain__
+        self._decisions: dict[_TuningKey, str] = {}
+        self._timings: dict[_TuningKey, dict[str, list[float]]] = {}
+        # Keys that no candidate implements
+        self._unsupported: set[_TuningKey] = set()
+        # Multimethods keyed by id, kept alive so that ids aren't reused
+        self._anonymous: dict[int, Callable[..., Any]] = {}
+        self._lock = threading.Lock()
+
+        if path is not None:
+            # Decisions for backends that aren't candidates any more are
+            # tuned again
+            self._decisions.update(
+                (key, name)
+                for key, name in _load_decisions(path).items()
+                if name in self.candidates and _persistent(key)
+            )
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {list(self.candidates)!r}>"
+
+    @property
+    def decisions(self) -> dict[_TuningKey, str]:
+        """The backend chosen for each tuned key."""
+        with self._lock:
+            return dict(self._decisions)
+
+    def save(self) -> None:
+        """Saves the decisions to ``path``, merged with the ones already there."""
+        if self.path is None:
+            raise ValueError("No path to save the decisions to.")
+
+        with self._lock:
+            decisions = {k: v for k, v in self._decisions.items() if _persistent(k)}
+        _save_decisions(self.path, decisions)
+
+    def _key(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> None | _TuningKey:
+        extractor = getattr(method, "arg_extractor", None)
+        if extractor is None:
+            return None
+
+        dispatchables = tuple(extractor(*args, **kwargs))
+        types = tuple(_qualified_name(type(d.value)) for d in dispatchables)
+        name = _qualified_name(method)
+        if "<" in name:
+            # Lambdas and local functions share their names, so these are
+            # told apart by id, and not persisted
+            self._anonymous.setdefault(id(method), method)
+            name = f"{name}#{id(method):x}"
+        return name, types, _size_bucket(dispatchables)
+
+    def _next_trial(self, key: _TuningKey) -> None | str:
+        """The candidate to time next, or ``None`` once all have been timed."""
+        timings = self._timings.setdefault(key, {})
+        for name in self.candidates:
+            if len(timings.setdefault(name, [])) < self.trials:
+                return name
+        return None
+
+    def _record(self, key: _TuningKey, name: str, elapsed: float) -> bool:
+        """Records a timing, returns whether a decision was made."""
+        with self._lock:
+            if key in self._decisions:
+                return False
+
+            timings = self._timings.setdefault(key, {})
+            timings.setdefault(name, []).append(elapsed)
+            if self._next_trial(key) is not None:
+                return False
+
+            best = min(timings, key=lambda n: min(timings[n]))
+            del self._timings[key]
+            if min(timings[best]) == float("inf"):
+                self._unsupported.add(key)
+                return False
+
+            self._decisions[key] = best
+            return True
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        key = self._key(method, args, kwargs)
+        if key is None:
+            return NotImplemented
+
+        while True:
+            with self._lock:
+                if key in self._unsupported:
+                    return NotImplemented
+                name = self._decisions.get(key)
+                trial = self._next_trial(key) if name is None else None
+
+            if name is not None:
+                return _forward(self.candidates[name], method, args, kwargs)
+            if trial is None:
+                # Being timed by other threads
+                return NotImplemented
+
+            start = time.perf_counter()
+            result = _forward(self.candidates[trial], method, args, kwargs)
+            elapsed = time.perf_counter() - start
+
+            if result is NotImplemented:
+                # Don't try this candidate again, but another one right away
+                for _ in range(self.trials):
+                    decided = self._record(key, trial, float("inf"))
+            else:
+                decided = self._record(key, trial, elapsed)
+
+            if decided and self.path is not None:
+                self.save()
+
+            if result is not NotImplemented:
+                return result
+
+
+def _persistent(key: _TuningKey) -> bool:
+    # Whether the multimethod of the key can be found in other processes
+    return "<" not in key[0]
+
+
+def _load_decisions(path: str | os.PathLike[str]) -> dict[_TuningKey, str]:
+    import json
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+
+    return {
+        (d["method"], tuple(d["types"]), d["bucket"]): d["backend"]
+        for d in data["decisions"]
+    }
+
+
+def _save_decisions(
+    path: str | os.PathLike[str], decisions: Mapping[_TuningKey, str]
+) -> None:
+    merged = _load_decisions(path)
+    merged.update(decisions)
+    data = {
+        "version": 1,
+        "decisions": [
+            {"method": method, "types": list(types), "bucket": bucket, "backend": name}
+            for (method, types, bucket), name in sorted(merged.items())
+        ],
+    }
+    _write_json(path, data)
+
+
+def _write_json(path: str | os.PathLike[str], data: Any) -> None:
+    import json
+    import tempfile
+
+    # Write to a temporary file first, so readers never see a partial file
+    directory = os.path.dirname(os.fspath(path)) or "."
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def autotune(
+    candidates: Mapping[str, _SupportsUA],
+    *,
+    trials: int = 3,
+    path: None | str | os.PathLike[str] = None,
+) -> _AutotuneBackend:
+    """
+    Returns a backend that picks the fastest of ``candidates`` for each call.
+
+    Calls are keyed by the multimethod, the types of the dispatched values
+    and the size bucket of these values, i.e. the bit length of their total
+    ``nbytes`` or ``len()``. The first calls for each key are executed by
+    each candidate in turn, ``trials`` times, and timed. After that, the
+    candidate with the lowest time is used for that key. Candidates that
+    don't implement a call are never picked for it.
+
+    Parameters
+    ----------
+    candidates : Mapping[str, Backend]
+        The backends to choose from, by name. They must have the same
+        domain, which is used for the returned backend.
+    trials : int
+        How many times each candidate is timed for each key.
+    path : Optional[PathLike]
+        A file to persist the decisions in. Decisions in this file are loaded
+        when creating the backend, so that e.g. restarted worker processes
+        don't need to tune again. New decisions are added to it as they
+        are made. Multimethods and types are stored by import path, and
+        backends by name. Decisions for multimethods without an import path,
+        e.g. lambdas, are kept in memory only.
+
+    Returns
+    -------
+    The autotuning backend, to be used with :obj:`set_backend` and similar.
+    Its ``decisions`` attribute holds the decisions made so far.
+
+    See Also
+    --------
+    set_selection_mode : Picks backends based on their own cost estimates.
+
+    Examples
+    --------
+    >>> class NamedBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __init__(self, name):
+    ...         self.name = name
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         return self.name
+    >>> be = ua.autotune({"a": NamedBackend("a"), "b": NamedBackend("b")}, trials=1)
+    >>> with ua.set_backend(be):
+    ...     [ex.creation_multimethod() for _ in range(2)]
+    ['a', 'b']
+    >>> len(be.decisions)
+    1
+    """
+    if not candidates:
+        raise ValueError("At least one candidate is required.")
+    if trials < 1:
+        raise ValueError("trials must be positive.")
+
+    return _AutotuneBackend(candidates, trials, path)
+
+
+class BackendGroup:
+    """
+    A backend that spreads calls over several equivalent backends.
+
+    Each call is routed to one of ``members`` according to ``policy``. If
+    that member doesn't implement the call, the other members are tried,
+    in the order the policy prefers them. The number of calls in flight on
+    each member is tracked, so calls from several threads are balanced too.
+
+    Parameters
+    ----------
+    members : Sequence[Backend]
+        The backends to route calls to, e.g. instances of the same backend
+        bound to different resources. They must have the same domain, which
+        is used for the group.
+    policy : str
+        Either ``"round_robin"``, which routes calls to the members in turn,
+        or ``"least_outstanding"``, which routes each call to the member with
+        the fewest calls in flight, the earliest one on ties.
+
+    Examples
+    --------
+    >>> class NamedBackend:
+    ...     __ua_domain__ = "ua_examples"
+    ...     def __init__(self, name):
+    ...         self.name = name
+    ...     def __ua_function__(self, method, args, kwargs):
+    ...         return self.name
+    >>> group = ua.BackendGroup([NamedBackend("a"), NamedBackend("b")])
+    >>> with ua.set_backend(group):
+    ...     [ex.creation_multimethod() for _ in range(3)]
+    ['a', 'b', 'a']
+    >>> group.outstanding
+    [0, 0]
+    """
+
+    _policies = ("round_robin", "least_outstanding")
+
+    def __init__(
+        self, members: Sequence[_SupportsUA], policy: str = "round_robin"
+    ) -> None:
+        if not members:
+            raise ValueError("At least one member is required.")
+        if policy not in self._policies:
+            raise ValueError(
+                f"Unknown policy {policy!r}, expected one of {self._policies}."
+            )
+
+        self.members = tuple(members)
+        self.policy = policy
+        self.__ua_domain__ = self.members[0].__ua_domain__
+        self._outstanding = [0] * len(self.members)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {list(self.members)!r}, {self.policy!r}>"
+
+    @property
+    def outstanding(self) -> list[int]:
+        """The number of calls in flight on each member."""
+        with self._lock:
+            return list(self._outstanding)
+
+    def _order(self) -> list[int]:
+        """The member indices in order of preference. Requires the lock."""
+        n = len(self.members)
+        if self.policy == "round_robin":
+            start = self._next
+            self._next = (start + 1) % n
+            return [(start + i) % n for i in range(n)]
+
+        return sorted(range(n), key=self._outstanding.__getitem__)
+
+    def _acquire(self, order: None | list[int] = None) -> tuple[int, list[int]]:
+        with self._lock:
+            if order is None:
+                order = self._order()
+            elif self.policy == "least_outstanding":
+                order = sorted(order, key=self._outstanding.__getitem__)
+            i = order[0]
+            self._outstanding[i] += 1
+            return i, order[1:]
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        i, rest = self._acquire()
+        while True:
+            try:
+                with _set_backend(self.members[i], only=True):
+                    return method(*args, **kwargs)
+            except BackendNotImplementedError:
+                if not rest:
+                    return NotImplemented
+            finally:
+                with self._lock:
+                    self._outstanding[i] -= 1
+
+            i, rest = self._acquire(rest)
+
+
+class _SharedBuffer:
+    """Stands in for a buffer passed to a worker process in shared memory."""
+
+    __slots__ = ("name", "format", "shape", "nbytes")
+
+    def __init__(self, name: str, format: str, shape: tuple[int, ...], nbytes: int):
+        self.name = name
+        self.format = format
+        self.shape = shape
+        self.nbytes = nbytes
+
+    def __reduce__(self) -> Any:
+        return type(self), (self.name, self.format, self.shape, self.nbytes)
+
+
+def _shared_buf(shm: shared_memory.SharedMemory) -> memoryview:
+    buf = shm.buf
+    if buf is None:
+        raise ValueError(f"Shared memory block {shm.name!r} is closed.")
+    return buf
+
+
+def _share(
+    value: Any, min_size: int
+) -> None | tuple[shared_memory.SharedMemory, _SharedBuffer]:
+    """Copies ``value`` to shared memory, if it's a large enough buffer."""
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return None
+
+    with view:
+        shape = view.shape
+        if view.nbytes < min_size or shape is None or not view.c_contiguous:
+            return None
+        try:
+            # Only formats that the worker can cast the shared bytes back to
+            _cast_buffer(view.cast("B"), view.format, shape).release()
+        except (TypeError, ValueError):
+            return None
+
+        from multiprocessing import shared_memory
+
+        shm = shared_memory.SharedMemory(create=True, size=view.nbytes)
+        _shared_buf(shm)[: view.nbytes] = view.cast("B")
+        return shm, _SharedBuffer(shm.name, view.format, shape, view.nbytes)
+
+
+def _attach(token: _SharedBuffer) -> tuple[shared_memory.SharedMemory, memoryview]:
+    from multiprocessing import shared_memory
+
+    try:
+        # Python 3.13+: the creating process owns the block
+        shm = shared_memory.SharedMemory(token.name, track=False)  # type: ignore[call-arg]
+    except TypeError:
+        shm = shared_memory.SharedMemory(token.name)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+
+            # Attaching registered the block with this process's tracker,
+            # which would unlink it again and warn about a leak on exit
+            resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    buf = _shared_buf(shm)[: token.nbytes]
+    view = _cast_buffer(buf, token.format, token.shape).toreadonly()
+    return shm, view
+
+
+# The backend of a worker process, set by `_init_worker`
+_worker_backend: Any = None
+
+
+def _init_worker(path: str) -> None:
+    global _worker_backend
+    _worker_backend = _resolve_import_path(path)
+
+
+def _ping() -> None:
+    pass
+
+
+def _call_in_worker(
+    method: Callable[..., Any],
+    state: Any,
+    args: tuple[Any, ...],
+    kwargs: dict[str, Any],
+) -> Any:
+    with contextlib.ExitStack() as stack:
+        dispatchables = method.arg_extractor(*args, **kwargs)  # type: ignore[attr-defined]
+        values = [d.value for d in dispatchables]
+        blocks = []
+        for i, value in enumerate(values):
+            if isinstance(value, _SharedBuffer):
+                shm, values[i] = _attach(value)
+                blocks.append((shm, values[i]))
+        if blocks:
+            args, kwargs = method.arg_replacer(args, kwargs, tuple(values))  # type: ignore[attr-defined]
+            del values
+
+        @stack.callback
+        def detach() -> None:
+            for shm, view in blocks:
+                try:
+                    view.release()
+                    shm.close()
+                except BufferError:
+                    # Still referenced, e.g. by the result. The block is
+                    # closed once that is garbage collected.
+                    pass
+
+        if state is not None:
+            stack.enter_context(set_state(state))
+        stack.enter_context(_SetBackendContext(_worker_backend, False, True))
+        return method(*args, **kwargs)
+
+
+class _ProcessBackend:
+    def __init__(
+        self,
+        path: str,
+        workers: int,
+        min_shared_size: int,
+        propagate_state: bool,
+        mp_context: Any,
+    ) -> None:
+        self.path = path
+        self.inner = _resolve_import_path(path)
+        self.min_shared_size = min_shared_size
+        self.propagate_state = propagate_state
+        self.__ua_domain__ = self.inner.__ua_domain__
+
+        import concurrent.futures
+
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(path,),
+        )
+
+        # Start all workers now, rather than on the first calls
+        for future in [self.executor.submit(_ping) for _ in range(workers)]:
+            future.result()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.path!r}>"
+
+    def __reduce__(self) -> Any:
+        # Within workers, e.g. in the propagated backend state, this backend
+        # stands for the backend it runs there
+        return _resolve_import_path, (self.path,)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shuts the worker processes down."""
+        self.executor.shutdown(wait=wait)
+
+    def _share_dispatchables(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+        blocks: list[shared_memory.SharedMemory],
+    ) -> tuple[tuple[Any, ...], dict[str, Any]]:
+        replacer = getattr(method, "arg_replacer", None)
+        if replacer is None:
+            return args, kwargs
+
+        dispatchables = method.arg_extractor(*args, **kwargs)  # type: ignore[attr-defined]
+        values = []
+        for d in dispatchables:
+            shared = None
+            if not isinstance(d, DispatchableSequence):
+                shared = _share(d.value, self.min_shared_size)
+            if shared is None:
+                values.append(d.value)
+                continue
+
+            shm, token = shared
+            blocks.append(shm)
+            values.append(token)
+
+        if not blocks:
+            return args, kwargs
+        return replacer(args, kwargs, tuple(values))
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        state = get_state() if self.propagate_state else None
+        blocks: list[shared_memory.SharedMemory] = []
+        try:
+            args, kwargs = self._share_dispatchables(method, args, kwargs, blocks)
+            future = self.executor.submit(_call_in_worker, method, state, args, kwargs)
+            return future.result()
+        except BackendNotImplementedError:
+            return NotImplemented
+        finally:
+            for shm in blocks:
+                shm.close()
+                shm.unlink()
+
+
+def process_backend(
+    inner: str,
+    workers: None | int = None,
+    *,
+    min_shared_size: int = 1 << 16,
+    propagate_state: bool = True,
+    mp_context: Any = None,
+) -> _ProcessBackend:
+    """
+    Returns a backend that runs multimethod calls in worker processes.
+
+    Each call is executed by ``inner`` in one of a pool of long-lived worker
+    processes, so CPU-bound pure Python backends aren't limited by the GIL.
+    The workers are started, and ``inner`` imported in them, when the
+    backend is created.
+
+    Multimethods and the backend state are pickled to be sent to the
+    workers, so they must be importable, as must the backends in the state.
+    Large buffer-protocol dispatchables are copied to shared memory instead,
+    and ``inner`` receives them as read-only :obj:`memoryview` objects with
+    the same format and shape. Results are pickled back.
+
+    Parameters
+    ----------
+    inner : str
+        The import path of the backend to run in the workers, in the form
+        ``"module:name"``, or ``"module"`` for a module backend. Its domain
+        is used for the returned backend.
+    workers : Optional[int]
+        The number of worker processes. Defaults to the number of CPUs.
+    min_shared_size : int
+        The minimum size in bytes of C-contiguous buffers to pass through
+        shared memory. Smaller values are pickled.
+    propagate_state : bool
+        Whether calls are executed with the backend state of the calling
+        thread. Within workers, this backend is replaced by ``inner`` in the
+        state.
+    mp_context : Optional[multiprocessing.context.BaseContext]
+        The multiprocessing context to start the workers with.
+
+    Returns
+    -------
+    The backend, to be used with :obj:`set_backend` and similar. Its
+    ``shutdown()`` method stops the workers.
+
+    See Also
+    --------
+    parallel : Runs calls in parallel with threads or other executors.
+
+    Examples
+    --------
+    >>> import array
+    >>> be = ua.process_backend("uarray.tests.example_helpers:SumBackend", 1)
+    >>> with ua.set_backend(be):
+    ...     ex.sum_multimethod(array.array("d", [1.0, 2.0]))
+    ...     ex.sum_multimethod(array.array("d", range(10_000)))
+    ('array', 3.0)
+    ('memoryview', 49995000.0)
+    >>> be.shutdown()
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers must be positive.")
+
+    return _ProcessBackend(inner, workers, min_shared_size, propagate_state, mp_context)
+
+
+class _BackendStub:
+    def __init__(
+        self,
+        domain: str,
+        path: str,
+        types: None | Iterable[str],
+        cache_path: None | str,
+    ) -> None:
+        self.__ua_domain__ = domain
+        self.path = path
+        self.types = None if types is None else frozenset(types)
+        self.cache_path = cache_path
+        self.backend: Any = None
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__}: {self.__ua_domain__!r}, {self.path!r}>"
+
+    def load(self) -> Any:
+        """Imports the backend, and replaces the stub with it where registered."""
+        backend = self.backend
+        if backend is not None:
+            return backend
+
+        with self._lock:
+            if self.backend is not None:
+                return self.backend
+
+            backend = _resolve_import_path(self.path)
+            types = getattr(backend, "__ua_types__", None)
+            if types is not None and self.cache_path is not None:
+                _cache_backend_types(
+                    self.cache_path, self.path, [_qualified_name(t) for t in types]
+                )
+            self.backend = backend
+
+        # Only tried once, by the thread that loaded the backend
+        try:
+            _replace_backend(self, backend)
+        except RuntimeError:
+            pass  # Frozen global backends, the stub keeps forwarding
+        return backend
+
+    def _supports(self, dispatchables: Sequence[Dispatchable[Any, Any]]) -> bool:
+        if self.types is None:
+            return True
+
+        types = self.types
+        return not dispatchables or any(
+            isinstance(d, DispatchableSequence)
+            or any(_qualified_name(t) in types for t in type(d.value).__mro__)
+            for d in dispatchables
+        )
+
+    def __ua_convert__(
+        self, dispatchables: tuple[Dispatchable[Any, Any], ...], coerce: bool
+    ) -> Any:
+        # Without any value of the declared types, the backend can't
+        # implement the call, so there is no need to import it yet
+        if self.backend is None and not self._supports(dispatchables):
+            return NotImplemented
+
+        backend = self.load()
+        if not (
+            hasattr(backend, "__ua_convert__")
+            or hasattr(backend, "__ua_convert_group__")
+        ):
+            return tuple(d.value for d in dispatchables)
+        return convert_dispatchables(backend, dispatchables, coerce)
+
+    def __ua_function__(
+        self,
+        method: Callable[..., Any],
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+    ) -> Any:
+        # The arguments were already converted by `__ua_convert__`
+        return self.load().__ua_function__(method, args, kwargs)
+
+
+def _default_cache_path(group: str) -> str:
+    directory = os.environ.get("UARRAY_CACHE_DIR") or os.path.join(
+        os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+        "uarray",
+    )
+    return os.path.join(directory, f"{group}.json")
+
+
+def _environment_key() -> list[Any]:
+    # Installing or removing distributions changes the modification time
+    # of the directory they are installed in
+    import sys
+
+    key: list[Any] = [sys.version, sys.prefix]
+    for entry in sys.path:
+        try:
+            key.append([entry, os.stat(entry or ".").st_mtime_ns])
+        except OSError:
+            key.append([entry, None])
+    return key
+
+
+def _load_backend_cache(path: str) -> None | dict[str, Any]:
+    import json
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if data.get("version") == 1 else None
+
+
+def _cache_backend_types(path: str, backend_path: str, types: list[str]) -> None:
+    data = _load_backend_cache(path)
+    if data is None:
+        return
+
+    for entry in data["backends"]:
+        if entry["path"] == backend_path:
+            entry["types"] = types
+    try:
+        _write_json(path, data)
+    except OSError:
+        pass
+
+
+def _scan_entry_points(group: str) -> list[dict[str, Any]]:
+    from importlib.metadata import entry_points
+
+    return [
+        {"domain": ep.name, "path": ep.value.replace(" ", ""), "types": None}
+        for ep in entry_points(group=group)
+    ]
+
+
+def discover_backends(
+    domain: None | str = None,
+    *,
+    group: str = "uarray.backends",
+    cache: bool | str | os.PathLike[str] = True,
+) -> list[_UABackend]:
+    """
+    Registers the backends that installed distributions declare.
+
+    Distributions declare backends as entry points in ``group``, named after
+    the domain, with the import path of the backend as the value, e.g. in
+    ``pyproject.toml``::
+
+        [project.entry-points."uarray.backends"]
+        numpy = "mypackage.backend:numpy_backend"
+
+    Rather than the backends themselves, lightweight stubs are registered,
+    like with :obj:`register_backend`. The module of a backend is only
+    imported once dispatch reaches its stub, which then replaces itself with
+    the backend in the registered backends.
+
+    A backend may list the types of values it accepts in a ``__ua_types__``
+    attribute. These types are remembered in the cache, and on later runs,
+    stubs decline calls without any dispatched value of these types, or of
+    their subclasses, without importing the backend.
+
+    Parameters
+    ----------
+    domain : Optional[str]
+        Only registers the backends declared for this domain.
+    group : str
+        The entry point group to look in.
+    cache : Union[bool, PathLike]
+        A file to cache the declared backends in, so that the entry points
+        aren't scanned again as long as no distribution is installed or
+        removed. ``True`` picks a file in the user's cache directory, which
+        can be changed by setting ``UARRAY_CACHE_DIR``. ``False`` always
+        scans the entry points.
+
+    Returns
+    -------
+    list
+        The registered stubs.
+
+    See Also
+    --------
+    register_backend : Registers a backend.
+
+    Examples
+    --------
+    >>> ua.discover_backends("ua_examples", cache=False)
+    []
+    """
+    cache_path: None | str = None
+    if cache is True:
+        cache_path = _default_cache_path(group)
+    elif cache is not False:
+        cache_path = os.fspath(cache)
+
+    key = _environment_key()
+    data = None if cache_path is None else _load_backend_cache(cache_path)
+    if data is None or data["key"] != key:
+        # Types are forgotten too, since backends may have been upgraded
+        data = {"version": 1, "key": key, "backends": _scan_entry_points(group)}
+
+        if cache_path is not None:
+            try:
+                os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+                _write_json(cache_path, data)
+            except OSError:
+                cache_path = None
+
+    stubs: list[_UABackend] = []
+    for entry in data["backends"]:
+        if domain is not None and entry["domain"] != domain:
+            continue
+        stub = _BackendStub(entry["domain"], entry["path"], entry["types"], cache_path)
+        register_backend(stub)
+        stubs.append(stub)
+    return stubs
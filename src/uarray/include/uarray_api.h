@@ -0,0 +1,123 @@
+/* C API of the uarray dispatcher
+ *
+ * Extensions can call multimethods and implement backends without going
+ * through the Python-level protocols:
+ *
+ *     const UArray_API * api = UArray_ImportAPI();
+ *     if (api == NULL)
+ *         return NULL;
+ *
+ * The API is looked up in the current interpreter, so it should be imported
+ * in the module exec function of extensions supporting subinterpreters. The
+ * directory containing this header is returned by ``uarray.get_include()``.
+ *
+ * All functions must be called with the GIL held (or attached to the
+ * interpreter, on free-threaded builds). Functions returning ``PyObject *``
+ * return a new reference, or NULL with an exception set on error. Functions
+ * returning ``int`` return 0 on success and -1 with an exception set on error.
+ */
+#ifndef UARRAY_API_H
+#define UARRAY_API_H
+
+#include <Python.h>
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+/* Version of the API declared here.
+ *
+ * New members are only ever appended to UArray_API, and come with a new
+ * version number, so code compiled against an older version keeps working.
+ */
+#define UARRAY_API_VERSION 1
+#define UARRAY_API_CAPSULE_NAME "uarray._uarray._C_API"
+
+/* Convert a dispatched value to the backend's type
+ *
+ * ``coerce`` already accounts for the coercibility of the dispatchable.
+ * Returns a new reference to the converted value, a new reference to
+ * ``Py_NotImplemented`` if the value isn't supported, or NULL on error.
+ */
+typedef PyObject * (*UArray_ConvertFunc)(
+    void * data, PyObject * value, PyObject * dispatch_type, int coerce);
+
+/* Implement ``method`` for the given (converted) arguments
+ *
+ * The arguments are in vectorcall form: ``nargs`` positional arguments
+ * followed by the values of the keyword arguments named in ``kwnames``,
+ * which is NULL without keyword arguments. Returns a new reference to the
+ * result, a new reference to ``Py_NotImplemented`` to let the next backend
+ * try, or NULL on error.
+ */
+typedef PyObject * (*UArray_FunctionFunc)(
+    void * data, PyObject * method, PyObject * const * args, Py_ssize_t nargs,
+    PyObject * kwnames);
+
+typedef struct UArray_API UArray_API;
+
+struct UArray_API {
+  /* UARRAY_API_VERSION of the loaded uarray */
+  unsigned int version;
+  /* Private to uarray */
+  void * state;
+
+  /* Call ``multimethod``, like PyObject_Vectorcall */
+  PyObject * (*call)(
+      const UArray_API * api, PyObject * multimethod, PyObject * const * args,
+      size_t nargsf, PyObject * kwnames);
+
+  /* The backend tried first for ``domain``, or ``Py_None`` if there is none
+   *
+   * Backends are considered in order, ignoring the selection mode and
+   * dispatch routes.
+   */
+  PyObject * (*get_backend)(const UArray_API * api, const char * domain);
+
+  /* Set ``backend`` in the current thread, like entering ``set_backend``
+   *
+   * Returns the frame to pass to pop_backend.
+   */
+  PyObject * (*push_backend)(
+      const UArray_API * api, PyObject * backend, int coerce, int only);
+
+  /* Undo push_backend. Frames must be popped in reverse order, and the
+   * caller still owns its reference to ``frame``. */
+  int (*pop_backend)(const UArray_API * api, PyObject * frame);
+
+  /* Create a backend calling ``convert`` and ``function`` directly
+   *
+   * ``domain`` is its ``__ua_domain__``. ``convert`` may be NULL if the
+   * backend doesn't convert dispatchables. ``data`` is passed to both hooks,
+   * and ``owner``, which may be NULL, is kept alive with the backend.
+   */
+  PyObject * (*new_backend)(
+      const UArray_API * api, PyObject * domain, UArray_ConvertFunc convert,
+      UArray_FunctionFunc function, void * data, PyObject * owner);
+
+  /* Register ``backend``, like ``uarray.register_backend`` */
+  int (*register_backend)(const UArray_API * api, PyObject * backend);
+};
+
+/* Import the uarray C API. Returns NULL with an exception set on error. */
+static inline const UArray_API * UArray_ImportAPI(void) {
+  const UArray_API * api =
+      (const UArray_API *)PyCapsule_Import(UARRAY_API_CAPSULE_NAME, 0);
+  if (api == NULL)
+    return NULL;
+
+  if (api->version < UARRAY_API_VERSION) {
+    PyErr_Format(
+        PyExc_ImportError,
+        "uarray C API version %u is older than the required version %d",
+        api->version, UARRAY_API_VERSION);
+    return NULL;
+  }
+  return api;
+}
+
+#ifdef __cplusplus
+}
+#endif
+
+#endif /* UARRAY_API_H */
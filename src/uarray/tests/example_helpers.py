@@ -44,3 +44,32 @@ call_multimethod = ua.generate_multimethod(
     lambda a, kw, d: (a, kw),
     "ua_examples",
 )
+
+
+def typed_multimethod(*a):
+    return tuple(ua.Dispatchable(x, "mark") for x in a)
+
+
+typed_multimethod = ua.generate_multimethod(
+    typed_multimethod, lambda a, kw, d: (a, kw), "ua_examples"
+)
+
+
+class _SumBackend:
+    __ua_domain__ = "ua_examples"
+
+    def __ua_function__(self, func, args, kwargs):
+        # The type shows how the value was received
+        return type(args[0]).__name__, sum(args[0])
+
+
+SumBackend = _SumBackend()
+
+
+def sum_multimethod(a):
+    return (ua.Dispatchable(a, "buffer"),)
+
+
+sum_multimethod = ua.generate_multimethod(
+    sum_multimethod, lambda a, kw, d: (d, kw), "ua_examples"
+)
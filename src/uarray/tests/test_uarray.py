@@ -1,5 +1,8 @@
 import uarray as ua
 import pickle
+import array
+import time
+import os
 
 import pytest  # type: ignore
 
@@ -578,3 +581,1542 @@ def test_default(nullary_mm):
     with ua.set_backend(be, coerce=True), pytest.raises(ua.BackendNotImplementedError):
         mm2()
     assert num_calls[0] == 1
+
+
+def test_implementations_table(nullary_mm):
+    obj = object()
+    other_mm = ua.generate_multimethod(
+        lambda: (), lambda a, kw, d: (a, kw), "ua_tests"
+    )
+
+    be = Backend()
+    be.__ua_implementations__ = {nullary_mm: lambda: obj}
+
+    # Multimethods not in the table are unsupported without __ua_function__
+    with ua.set_backend(be):
+        assert nullary_mm() is obj
+        with pytest.raises(ua.BackendNotImplementedError):
+            other_mm()
+
+    # ... or fall back to __ua_function__ if there is one
+    be.__ua_function__ = lambda f, a, kw: f
+    with ua.set_backend(be):
+        assert nullary_mm() is obj
+        assert other_mm() is other_mm
+
+
+def test_implementations_table_replaced_args():
+    def replacer(args, kwargs, dispatchables):
+        return dispatchables, kwargs
+
+    mm = ua.generate_multimethod(
+        lambda a, b=None: (ua.Dispatchable(a, int),), replacer, "ua_tests"
+    )
+
+    class ImplBackend(Backend):
+        __ua_implementations__ = {mm: lambda a, b=None: (a, b)}
+
+        def __ua_convert__(self, dispatchables, coerce):
+            return tuple(str(d.value) for d in dispatchables)
+
+    # Converted arguments are passed on, and defaults are stripped
+    with ua.set_backend(ImplBackend()):
+        assert mm(1) == ("1", None)
+        assert mm(1, b=None) == ("1", None)
+
+    # Implementations can opt out by returning NotImplemented
+    ImplBackend.__ua_implementations__ = {mm: lambda a, b=None: NotImplemented}
+    with ua.set_backend(ImplBackend()), pytest.raises(ua.BackendNotImplementedError):
+        mm(1)
+
+
+def test_vectorcall_protocol():
+    mm = ua.generate_multimethod(
+        lambda a, b=None, *, c=None: (), lambda a, kw, d: (a, kw), "ua_tests"
+    )
+
+    class VectorcallBackend(Backend):
+        __ua_vectorcall__ = True
+
+        def __ua_function__(self, method, *args, **kwargs):
+            return method, args, kwargs
+
+    with ua.set_backend(VectorcallBackend()):
+        assert mm(1, 2, c=3) == (mm, (1, 2), {"c": 3})
+        # Arguments with default values are stripped, as for __ua_function__
+        assert mm(1, None, c=None) == (mm, (1,), {})
+        assert mm(1, c=None) == (mm, (1,), {})
+        assert mm(1, None, c=3) == (mm, (1,), {"c": 3})
+
+    def replacer(args, kwargs, dispatchables):
+        return dispatchables + args[1:], kwargs
+
+    mm2 = ua.generate_multimethod(
+        lambda a, b=None: (ua.Dispatchable(a, int),), replacer, "ua_tests"
+    )
+
+    class ConvertingBackend(VectorcallBackend):
+        def __ua_convert__(self, dispatchables, coerce):
+            return tuple(d.value + 1 for d in dispatchables)
+
+    # Replaced arguments are passed in the same way
+    with ua.set_backend(ConvertingBackend()):
+        assert mm2(1, b=2) == (mm2, (2,), {"b": 2})
+
+
+def test_convert_group():
+    calls = []
+
+    class GroupBackend(Backend):
+        def __ua_convert_group__(self, values, dispatch_type, coerce):
+            calls.append((type(values[0]), dispatch_type, coerce, len(values)))
+            if dispatch_type == "unsupported":
+                return NotImplemented
+            return [(v, coerce) for v in values]
+
+        def __ua_function__(self, func, args, kwargs):
+            return args
+
+    mm = ua.generate_multimethod(
+        lambda *a: tuple(
+            ua.Dispatchable(x, "mark", coercible=not isinstance(x, str)) for x in a
+        ),
+        lambda a, kw, d: (d, kw),
+        "ua_tests",
+    )
+
+    with ua.set_backend(GroupBackend(), coerce=True):
+        result = mm(1, "a", 2, "b", 3.0)
+
+    # One call per group, and results keep the input order
+    assert calls == [
+        (int, "mark", True, 2),
+        (str, "mark", False, 2),
+        (float, "mark", True, 1),
+    ]
+    assert result == ((1, True), ("a", False), (2, True), ("b", False), (3.0, True))
+
+    calls.clear()
+    dispatchables = [ua.Dispatchable(i, "unsupported") for i in range(1000)]
+    with ua.set_backend(GroupBackend()), pytest.raises(ua.BackendNotImplementedError):
+        with ua.determine_backend_multi(dispatchables, domain="ua_tests"):
+            pass
+    assert calls == [(int, "unsupported", False, 1000)]
+
+
+def test_convert_group_length_mismatch():
+    class BadGroupBackend(Backend):
+        def __ua_convert_group__(self, values, dispatch_type, coerce):
+            return values[1:]
+
+        def __ua_function__(self, func, args, kwargs):
+            return args
+
+    mm = ua.generate_multimethod(
+        lambda a: (ua.Dispatchable(a, int),), lambda a, kw, d: (d, kw), "ua_tests"
+    )
+
+    with ua.set_backend(BadGroupBackend()), pytest.raises(ValueError):
+        mm(1)
+
+
+def _sequence_replacer(args, kwargs, dispatchables):
+    return (dispatchables[0],) + args[1:], kwargs
+
+
+_concatenate_mm = ua.generate_multimethod(
+    lambda arrays, axis=0: (ua.DispatchableSequence(arrays, "array"),),
+    _sequence_replacer,
+    "ua_tests",
+)
+
+
+def test_dispatchable_sequence_grouped():
+    calls = []
+
+    class GroupBackend(Backend):
+        def __ua_convert_group__(self, values, dispatch_type, coerce):
+            calls.append((list(values), dispatch_type))
+            return [str(v) for v in values]
+
+        def __ua_function__(self, func, args, kwargs):
+            return args
+
+    with ua.set_backend(GroupBackend()):
+        assert _concatenate_mm((1, 2, 3), 1) == (["1", "2", "3"], 1)
+
+    # The sequence is converted in a single call
+    assert calls == [([1, 2, 3], "array")]
+
+
+def test_dispatchable_sequence_single_convertor():
+    class SingleBackend(Backend):
+        @ua.wrap_single_convertor_instance
+        def __ua_convert__(self, value, dispatch_type, coerce):
+            if not isinstance(value, int):
+                return NotImplemented
+            return value + 1
+
+        def __ua_function__(self, func, args, kwargs):
+            return args
+
+    with ua.set_backend(SingleBackend()):
+        assert _concatenate_mm((1, 2, 3)) == ([2, 3, 4],)
+
+        with pytest.raises(ua.BackendNotImplementedError):
+            _concatenate_mm((1, "2"))
+
+
+class _Value:
+    def __init__(self, nbytes=0):
+        self.nbytes = nbytes
+
+
+class _CopyingBackend(Backend):
+    def __init__(self):
+        self.converted = []
+
+    @ua.wrap_single_convertor_instance
+    def __ua_convert__(self, value, dispatch_type, coerce):
+        if not coerce:
+            return NotImplemented
+        self.converted.append(value)
+        return _Value(value.nbytes)
+
+    def __ua_function__(self, func, args, kwargs):
+        return args
+
+
+_unary_mm = ua.generate_multimethod(
+    lambda a: (ua.Dispatchable(a, "value"),), lambda a, kw, d: (d, kw), "ua_tests"
+)
+
+
+@pytest.fixture()
+def conversion_cache():
+    cache = ua.ConversionCache(maxsize=2)
+    ua.set_conversion_cache(cache)
+    yield cache
+    ua.set_conversion_cache(None)
+
+
+def test_conversion_cache(conversion_cache):
+    assert ua.get_conversion_cache() is conversion_cache
+    be = _CopyingBackend()
+    x = _Value()
+
+    with ua.set_backend(be, coerce=True):
+        (first,) = _unary_mm(x)
+        (second,) = _unary_mm(x)
+        with ua.determine_backend(x, "value", domain="ua_tests", coerce=True):
+            pass
+
+    assert first is second
+    assert be.converted == [x]
+    assert (conversion_cache.hits, conversion_cache.misses) == (2, 1)
+
+    # Only coercing conversions are cached
+    with ua.set_backend(be), pytest.raises(ua.BackendNotImplementedError):
+        _unary_mm(x)
+
+    # Entries are dropped once the input is collected
+    assert len(conversion_cache) == 1
+    be.converted.clear()
+    del x
+    assert len(conversion_cache) == 0
+
+
+def test_conversion_cache_eviction(conversion_cache):
+    be = _CopyingBackend()
+    values = [_Value(), _Value(), _Value()]
+
+    with ua.set_backend(be, coerce=True):
+        for v in values:
+            _unary_mm(v)
+        _unary_mm(values[0])
+
+    # The least recently used value was evicted
+    assert len(conversion_cache) == 2
+    assert be.converted == values + [values[0]]
+
+    cache = ua.ConversionCache(maxbytes=100)
+    ua.set_conversion_cache(cache)
+    big, small = _Value(80), _Value(30)
+    with ua.set_backend(be, coerce=True):
+        _unary_mm(big)
+        _unary_mm(small)
+        _unary_mm(_Value(200))
+
+    assert len(cache) == 1
+    assert cache.nbytes == 30
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_buffer_convertor_shares_memory():
+    reports = []
+    convert = ua.BufferConvertor(
+        memoryview, format="B", writable=True, on_convert=lambda *a: reports.append(a)
+    )
+    data = bytearray(range(6))
+    view = memoryview(data).cast("B", (2, 3))
+
+    (converted,) = convert([ua.Dispatchable(view, "array")], coerce=False)
+    converted[1, 2] = 42
+    assert data[5] == 42
+    assert reports == [(view, converted, False)]
+    assert (convert.shared, convert.copied) == (1, 0)
+
+    # Instances of the target are returned unchanged
+    (converted,) = convert([ua.Dispatchable(converted, "array")], coerce=False)
+    assert converted is reports[0][1]
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        bytes(range(6)),  # read-only
+        memoryview(bytearray(range(12)))[::2],  # non-contiguous
+        array.array("b", range(6)),  # different format
+    ],
+)
+def test_buffer_convertor_copies(value):
+    expected = memoryview(value).tolist()
+    convert = ua.BufferConvertor(memoryview, format="B", writable=True)
+
+    assert convert([ua.Dispatchable(value, "array")], coerce=False) is NotImplemented
+
+    (converted,) = convert([ua.Dispatchable(value, "array")], coerce=True)
+    assert converted.format == "B"
+    assert not converted.readonly
+    assert converted.c_contiguous
+    assert converted.tolist() == expected
+    assert (convert.shared, convert.copied) == (0, 1)
+
+
+def test_buffer_convertor_backend():
+    class BufferBackend(Backend):
+        __ua_convert__ = ua.BufferConvertor(memoryview, dispatch_type="array")
+
+        def __ua_function__(self, func, args, kwargs):
+            return args
+
+    mm = ua.generate_multimethod(
+        lambda a, b: (ua.Dispatchable(a, "array"), ua.Dispatchable(b, "other")),
+        lambda a, kw, d: (d, kw),
+        "ua_tests",
+    )
+
+    be = BufferBackend()
+    data = bytearray(b"abc")
+    with ua.set_backend(be):
+        a, b = mm(data, 1)
+        assert a.obj is data
+        assert b == 1
+        with pytest.raises(ua.BackendNotImplementedError):
+            mm(object(), 1)
+
+
+class _AddBackend(Backend):
+    def __init__(self):
+        self.calls = []
+
+    def __ua_function__(self, func, args, kwargs):
+        self.calls.append(args)
+        if func is _pair_mm:
+            return args[0], args[0]
+        return sum(args)
+
+
+_add_mm = ua.generate_multimethod(
+    lambda *a: tuple(ua.Dispatchable(x, "value") for x in a),
+    lambda a, kw, d: (d, kw),
+    "ua_tests",
+)
+_pair_mm = ua.generate_multimethod(
+    lambda a: (ua.Dispatchable(a, "value"),), lambda a, kw, d: (d, kw), "ua_tests"
+)
+
+
+def test_lazy_backend():
+    be = _AddBackend()
+    lazy = ua.LazyBackend("ua_tests")
+
+    with ua.set_backend(be), ua.set_backend(lazy):
+        x = _add_mm(1, 2)
+        y = _add_mm(1, 2)
+        pair = _pair_mm(_add_mm(x, y))
+        z = _add_mm(pair[0], pair[1])
+
+        assert isinstance(z, ua.LazyValue)
+        assert z.method is _add_mm
+        assert be.calls == []
+
+        # Recorded calls are replayed without the lazy backend
+        assert ua.compute(z, x, 5) == (12, 3, 5)
+
+    assert be.calls == [(1, 2), (3, 3), (6,), (6, 6)]
+
+    # Equal but distinguishable arguments aren't merged, and arguments that
+    # can't be ordered are fine
+    import math
+
+    with ua.set_backend(be), ua.set_backend(lazy):
+        pos, neg = _pair_mm(0.0), _pair_mm(-0.0)
+        mixed = _pair_mm({1: "a", "b": 2})
+        (pos_value, _), (neg_value, _), (mixed_value, _) = ua.compute(pos, neg, mixed)
+    assert math.copysign(1, pos_value) == -math.copysign(1, neg_value)
+    assert mixed_value == {1: "a", "b": 2}
+
+
+def test_lazy_backend_rules():
+    be = _AddBackend()
+
+    def add_zero(*args):
+        nonzero = [a for a in args if not (isinstance(a, int) and a == 0)]
+        if len(nonzero) == 1:
+            return nonzero[0]
+        return NotImplemented
+
+    lazy = ua.LazyBackend("ua_tests", rules={_add_mm: add_zero})
+
+    with ua.set_backend(lazy):
+        x = _add_mm(1, 2)
+        y = _add_mm(_add_mm(x, 0), 0)
+        constant = _add_mm(0, 4)
+
+    with ua.set_backend(be):
+        assert ua.compute(y, constant) == (3, 4)
+
+    assert be.calls == [(1, 2)]
+
+
+def test_lazy_backend_executor():
+    from concurrent.futures import ThreadPoolExecutor
+
+    be = _AddBackend()
+    lazy = ua.LazyBackend("ua_tests")
+
+    with ua.set_backend(lazy):
+        branches = [_add_mm(i, i) for i in range(8)]
+        total = _add_mm(*branches)
+        failing = _add_mm(total, "a")
+
+    with ua.set_backend(be), ThreadPoolExecutor(4) as executor:
+        assert total.compute(executor=executor) == 56
+        assert len(be.calls) == 9
+
+        with pytest.raises(TypeError):
+            failing.compute(executor=executor)
+
+    with pytest.raises(TypeError):
+        iter(total)
+
+    # Calls are executed with the backends set when computing
+    with ThreadPoolExecutor(1) as executor, pytest.raises(
+        ua.BackendNotImplementedError
+    ):
+        total.compute(executor=executor)
+
+
+class _ChunkBackend(Backend):
+    def __init__(self):
+        self.chunks = []
+
+    def __ua_function__(self, func, args, kwargs):
+        self.chunks.append(args)
+        if func is _scale_mm:
+            return [v * args[1] for v in args[0]]
+        return NotImplemented
+
+
+_scale_mm = ua.generate_multimethod(
+    lambda a, factor: (ua.Dispatchable(a, "array"),),
+    lambda a, kw, d: ((d[0],) + a[1:], kw),
+    "ua_tests",
+)
+
+
+def _concat(chunks):
+    return [v for chunk in chunks for v in chunk]
+
+
+@pytest.mark.parametrize("threads", [0, 2])
+def test_chunked(threads):
+    from concurrent.futures import ThreadPoolExecutor
+
+    inner = _ChunkBackend()
+    executor = ThreadPoolExecutor(threads) if threads else None
+    be = ua.chunked(inner, 2, {_scale_mm: _concat}, executor=executor, max_in_flight=2)
+
+    with ua.set_backend(be):
+        assert _scale_mm([1, 2, 3, 4, 5], 10) == [10, 20, 30, 40, 50]
+        assert inner.chunks == [([1, 2], 10), ([3, 4], 10), ([5], 10)]
+
+        # Short inputs aren't split
+        inner.chunks.clear()
+        assert _scale_mm([1], 10) == [10]
+        assert inner.chunks == [([1], 10)]
+
+        # Multimethods that aren't declared splittable are passed through
+        with pytest.raises(ua.BackendNotImplementedError):
+            _add_mm([1, 2, 3])
+
+    if executor is not None:
+        executor.shutdown()
+
+
+def test_chunked_streaming():
+    inner = _ChunkBackend()
+    consumed = []
+
+    def first_chunk(chunks):
+        consumed.append(next(chunks))
+        return consumed[0]
+
+    be = ua.chunked(inner, 1, {_scale_mm: first_chunk})
+    with ua.set_backend(be):
+        assert _scale_mm([1, 2, 3], 2) == [2]
+
+    # Chunks are only computed as they are consumed
+    assert inner.chunks == [([1], 2)]
+
+
+def test_parallel():
+    from concurrent.futures import ThreadPoolExecutor
+
+    import threading
+
+    threads = set()
+
+    class ThreadBackend(_ChunkBackend):
+        def __ua_function__(self, func, args, kwargs):
+            threads.add(threading.get_ident())
+            return super().__ua_function__(func, args, kwargs)
+
+    inner = ThreadBackend()
+    with ThreadPoolExecutor(2) as executor:
+        be = ua.parallel(
+            inner,
+            executor,
+            {_scale_mm: "batch", _add_mm: lambda a, kw: [((x,), kw) for x in a]},
+            combine={_scale_mm: _concat},
+            parts=2,
+        )
+        with ua.set_backend(be):
+            assert _scale_mm([1, 2, 3, 4, 5], 10) == [10, 20, 30, 40, 50]
+            assert sorted(inner.chunks) == [([1, 2, 3], 10), ([4, 5], 10)]
+            assert threading.get_ident() not in threads
+
+        other_mm = ua.generate_multimethod(
+            lambda: (), lambda a, kw, d: (a, kw), "other"
+        )
+
+        class OtherBackend:
+            __ua_domain__ = "other"
+
+            def __ua_function__(self, func, args, kwargs):
+                return "other"
+
+        class NestedBackend(Backend):
+            def __ua_function__(self, func, args, kwargs):
+                return [other_mm() for _ in args]
+
+        be = ua.parallel(
+            NestedBackend(), executor, {_add_mm: lambda a, kw: [((x,), kw) for x in a]}
+        )
+
+        # Workers run with the caller's backends
+        with ua.set_backend(be), ua.set_backend(OtherBackend()):
+            assert _add_mm(1, 2, 3) == [["other"], ["other"], ["other"]]
+
+    with pytest.raises(ValueError):
+        ua.parallel(inner, executor, {}, parts=0)
+
+
+class _CostBackend(Backend):
+    def __init__(self, name, cost, types=(object,)):
+        self.name = name
+        self.cost = cost
+        self.types = types
+        self.estimates = []
+
+    def __ua_cost__(self, method, dispatchables):
+        self.estimates.append(len(dispatchables[0].value))
+        return self.cost(len(dispatchables[0].value))
+
+    def __ua_convert__(self, dispatchables, coerce):
+        if not all(isinstance(d.value, self.types) for d in dispatchables):
+            return NotImplemented
+        return [d.value for d in dispatchables]
+
+    def __ua_function__(self, func, args, kwargs):
+        return self.name
+
+
+@pytest.fixture()
+def cost_selection():
+    ua.set_selection_mode("cost")
+    yield
+    ua.set_selection_mode("order")
+
+
+def test_cost_selection(cost_selection):
+    assert ua.get_selection_mode() == "cost"
+
+    # Cheap for small inputs, but with a high overhead
+    small = _CostBackend("small", lambda n: n)
+    large = _CostBackend("large", lambda n: 100 + n / 100)
+    unknown = _CostBackend("unknown", lambda n: None)
+
+    with ua.set_backend(unknown), ua.set_backend(large), ua.set_backend(small):
+        assert _unary_mm([0] * 10) == "small"
+        assert _unary_mm([1] * 10) == "small"
+        assert _unary_mm([0] * 1000) == "large"
+
+    # Estimates are cached per size bucket
+    assert small.estimates == [10, 1000]
+    assert large.estimates == [10, 1000]
+
+    # The cheapest backend that supports the types is used
+    tuples_only = _CostBackend("tuples", lambda n: 0, types=(tuple,))
+    with ua.set_backend(large), ua.set_backend(tuples_only):
+        assert _unary_mm([0] * 10) == "large"
+        assert _unary_mm((0,) * 10) == "tuples"
+
+    # `only` still limits the candidates
+    with ua.set_backend(small), ua.set_backend(large, only=True):
+        assert _unary_mm([0] * 10) == "large"
+
+    with pytest.raises(ValueError):
+        ua.set_selection_mode("fastest")
+
+
+class _SleepBackend(Backend):
+    def __init__(self, delay, supported=True):
+        self.delay = delay
+        self.supported = supported
+        self.calls = 0
+        self.attempts = 0
+
+    def __ua_function__(self, func, args, kwargs):
+        self.attempts += 1
+        if not self.supported:
+            return NotImplemented
+        self.calls += 1
+        time.sleep(self.delay)
+        return self.delay
+
+
+def _tuned_mm(a):
+    return (ua.Dispatchable(a, "value"),)
+
+
+_tuned_mm = ua.generate_multimethod(_tuned_mm, lambda a, kw, d: (d, kw), "ua_tests")
+
+
+def test_autotune(tmp_path):
+    path = tmp_path / "tuning.json"
+    fast, slow = _SleepBackend(0), _SleepBackend(0.01)
+    unsupported = _SleepBackend(0, supported=False)
+    be = ua.autotune(
+        {"slow": slow, "fast": fast, "unsupported": unsupported}, trials=2, path=path
+    )
+
+    with ua.set_backend(be):
+        for _ in range(10):
+            _tuned_mm([0, 1])
+        _tuned_mm(list(range(1000)))
+
+    assert (fast.calls, slow.calls) == (8, 3)
+    key = (_tuned_mm.__module__ + ":" + _tuned_mm.__qualname__, ("builtins:list",), 2)
+    assert be.decisions == {key: "fast"}
+
+    # Decisions are loaded by new tuners
+    fast.calls = slow.calls = 0
+    be = ua.autotune({"slow": slow, "fast": fast}, path=path)
+    assert be.decisions == {key: "fast"}
+    with ua.set_backend(be):
+        _tuned_mm([2, 3])
+    assert (fast.calls, slow.calls) == (1, 0)
+
+    # Unless they chose a backend that isn't a candidate any more
+    be = ua.autotune({"slow": slow}, path=path)
+    assert be.decisions == {}
+    with ua.set_backend(be):
+        assert _tuned_mm([2, 3]) == 0.01
+
+    # Multimethods of lambdas are tuned separately, and not persisted
+    other_mm = ua.generate_multimethod(
+        lambda a: (ua.Dispatchable(a, "value"),), lambda a, kw, d: (d, kw), "ua_tests"
+    )
+    be = ua.autotune({"slow": slow, "fast": fast}, trials=1, path=path)
+    with ua.set_backend(be):
+        for _ in range(2):
+            _unary_mm([0, 1])
+            other_mm([0, 1])
+    assert len(be.decisions) == 3
+    assert ua.autotune({"fast": fast}, path=path).decisions == {key: "fast"}
+
+    # No candidate implements the call
+    unsupported.attempts = 0
+    be = ua.autotune({"unsupported": unsupported}, trials=2)
+    with ua.set_backend(be, only=True):
+        for _ in range(3):
+            with pytest.raises(ua.BackendNotImplementedError):
+                _unary_mm([0, 1])
+    assert be.decisions == {}
+    assert unsupported.attempts == 1
+
+
+class _ProbedBackend(Backend):
+    def __init__(self, types):
+        self.types = types
+        self.converted = 0
+
+    def __ua_convert__(self, dispatchables, coerce):
+        self.converted += 1
+        if not all(isinstance(d.value, self.types) for d in dispatchables):
+            return NotImplemented
+        return [d.value for d in dispatchables]
+
+    def __ua_function__(self, func, args, kwargs):
+        return self.types
+
+
+_int_backend = _ProbedBackend(int)
+_str_backend = _ProbedBackend(str)
+
+
+def _routed_mm(a):
+    return (ua.Dispatchable(a, "value"),)
+
+
+_routed_mm = ua.generate_multimethod(_routed_mm, lambda a, kw, d: (d, kw), "ua_tests")
+
+
+def test_dispatch_profile(tmp_path):
+    path = tmp_path / "profile.json"
+    with ua.record_dispatch(path):
+        with ua.set_backend(_int_backend), ua.set_backend(_str_backend):
+            _routed_mm(1)
+            _routed_mm("a")
+
+        # Not importable
+        with ua.set_backend(_ProbedBackend(int)):
+            _routed_mm(1)
+
+    assert ua.load_dispatch_profile(path) == 2
+    try:
+        with ua.set_backend(_int_backend), ua.set_backend(_str_backend):
+            _int_backend.converted = _str_backend.converted = 0
+            assert _routed_mm(1) is int
+            assert (_int_backend.converted, _str_backend.converted) == (1, 0)
+
+            # Unknown signatures are dispatched as usual
+            assert _routed_mm(True) is int
+            assert (_int_backend.converted, _str_backend.converted) == (2, 1)
+
+        # So are other backend stacks
+        with ua.set_backend(_int_backend), ua.set_backend(_str_backend, only=True):
+            with pytest.raises(ua.BackendNotImplementedError):
+                _routed_mm(1)
+    finally:
+        ua.clear_dispatch_profile()
+
+    # Still written when the block raises
+    path.unlink()
+    with pytest.raises(ZeroDivisionError):
+        with ua.record_dispatch(path):
+            with ua.set_backend(_int_backend), ua.set_backend(_str_backend):
+                _routed_mm(1)
+            1 / 0
+    try:
+        assert ua.load_dispatch_profile(path) == 1
+    finally:
+        ua.clear_dispatch_profile()
+
+
+def test_dispatch_extracts_once(tmp_path):
+    extracted = []
+
+    def extractor(a):
+        extracted.append(a)
+        return (ua.Dispatchable(a, "value"),)
+
+    mm = ua.generate_multimethod(extractor, lambda a, kw, d: (d, kw), "ua_tests")
+    with ua.record_dispatch(tmp_path / "profile.json"):
+        with ua.set_backend(_int_backend), ua.set_backend(_str_backend):
+            assert mm(1) is int
+    assert extracted == [1]
+
+
+def test_backend_group(nullary_mm):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    class Member(Backend):
+        def __init__(self, name, supported=True):
+            self.name = name
+            self.supported = supported
+            self.gate = None
+
+        def __ua_function__(self, func, args, kwargs):
+            if not self.supported:
+                return NotImplemented
+            if self.gate is not None:
+                self.gate.wait()
+            return self.name
+
+    a, b, c = Member("a"), Member("b"), Member("c", supported=False)
+
+    group = ua.BackendGroup([a, b, c])
+    with ua.set_backend(group):
+        # "c" never implements it, so its turn moves on to "a"
+        assert [nullary_mm() for _ in range(4)] == ["a", "b", "a", "a"]
+    assert group.outstanding == [0, 0, 0]
+
+    with pytest.raises(ValueError):
+        ua.BackendGroup([a], policy="random")
+
+    group = ua.BackendGroup([a, b], policy="least_outstanding")
+    a.gate = threading.Event()
+    with ThreadPoolExecutor(1) as executor, ua.set_backend(group):
+        state = ua.get_state()
+
+        def run():
+            with ua.set_state(state):
+                return nullary_mm()
+
+        blocked = executor.submit(run)
+        while group.outstanding != [1, 0]:
+            time.sleep(0.001)
+
+        assert nullary_mm() == "b"
+        a.gate.set()
+        assert blocked.result() == "a"
+    assert group.outstanding == [0, 0]
+
+
+def test_acall():
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    class AsyncBackend(Backend):
+        def __init__(self, name, delay=0.0):
+            self.name = name
+            self.delay = delay
+
+        async def __ua_function_async__(self, func, args, kwargs):
+            await asyncio.sleep(self.delay)
+            return self.name, args
+
+    class SyncBackend(Backend):
+        def __ua_convert__(self, dispatchables, coerce):
+            return [d.value for d in dispatchables]
+
+        def __ua_function__(self, func, args, kwargs):
+            return "sync", args
+
+    class AsyncNotImplemented(Backend):
+        async def __ua_function_async__(self, func, args, kwargs):
+            return NotImplemented
+
+    def mm(a):
+        return (ua.Dispatchable(a, int),)
+
+    mm = ua.generate_multimethod(mm, lambda a, kw, d: (d, kw), "ua_tests")
+
+    async def concurrently():
+        # Each call keeps the backends set when it was made
+        with ua.set_backend(AsyncBackend("slow", 0.01)):
+            slow = mm.acall(1)
+        with ua.set_backend(AsyncBackend("fast")):
+            fast = mm.acall(2)
+        return await asyncio.gather(slow, fast)
+
+    assert asyncio.run(concurrently()) == [("slow", (1,)), ("fast", (2,))]
+
+    class CountingAsync(AsyncBackend):
+        converted = 0
+
+        def __ua_convert__(self, dispatchables, coerce):
+            self.converted += 1
+            return [d.value for d in dispatchables]
+
+    # Backends after the one serving the call don't convert its arguments
+    later = CountingAsync("later")
+    with ua.set_backend(later), ua.set_backend(CountingAsync("first")):
+        assert asyncio.run(mm.acall(5)) == ("first", (5,))
+    assert later.converted == 0
+
+    with ThreadPoolExecutor(1) as executor:
+        ua.set_async_executor(executor)
+        try:
+            assert ua.get_async_executor() is executor
+            with ua.set_backend(SyncBackend()), ua.set_backend(AsyncNotImplemented()):
+                assert asyncio.run(mm.acall(3)) == ("sync", (3,))
+        finally:
+            ua.set_async_executor(None)
+
+    with ua.set_backend(AsyncNotImplemented(), only=True):
+        with pytest.raises(ua.BackendNotImplementedError):
+            asyncio.run(mm.acall(4))
+
+
+def test_process_backend():
+    from .example_helpers import sum_multimethod
+
+    be = ua.process_backend(
+        "uarray.tests.example_helpers:SumBackend", 2, min_shared_size=16
+    )
+    try:
+        # Workers are started up front
+        assert len(be.executor._processes) == 2
+
+        with ua.set_backend(be):
+            assert sum_multimethod(array.array("i", [1, 2])) == ("array", 3)
+            assert sum_multimethod(array.array("i", range(8))) == ("memoryview", 28)
+            assert sum_multimethod([1, 2, 3]) == ("list", 6)
+
+            with pytest.raises(TypeError):
+                sum_multimethod(1)
+    finally:
+        be.shutdown()
+
+    with pytest.raises(ValueError):
+        ua.process_backend("uarray.tests.example_helpers:SumBackend", 0)
+
+
+def test_process_backend_shared_memory_tracking():
+    import subprocess
+    import sys
+
+    # Resource trackers only report at exit, so this runs in another process
+    code = """
+import array
+import uarray as ua
+from uarray.tests.example_helpers import sum_multimethod
+
+path = "uarray.tests.example_helpers:SumBackend"
+be = ua.process_backend(path, 1, min_shared_size=16)
+with ua.set_backend(be):
+    assert sum_multimethod(array.array("i", range(8))) == ("memoryview", 28)
+be.shutdown()
+"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ua.__file__)))
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    assert "shared_memory" not in result.stderr
+
+
+def test_subinterpreter():
+    import importlib
+
+    try:
+        interpreters = importlib.import_module("_interpreters")
+    except ImportError:
+        # Python 3.12 and earlier
+        interpreters = pytest.importorskip("_xxsubinterpreters")
+    code = f"""
+import sys
+sys.path.insert(0, {os.path.dirname(os.path.dirname(ua.__file__))!r})
+import uarray as ua
+
+class Backend:
+    __ua_domain__ = "ua_tests"
+    __ua_function__ = staticmethod(lambda method, args, kwargs: "sub")
+
+mm = ua.generate_multimethod(lambda: (), lambda a, kw, d: (a, kw), "ua_tests")
+ua.set_global_backend(Backend())
+assert mm() == "sub"
+"""
+    interp = interpreters.create()
+    try:
+        # `_interpreters` returns a description of failures instead of raising
+        assert interpreters.run_string(interp, code) is None
+    finally:
+        interpreters.destroy(interp)
+
+    # The global backend of the subinterpreter isn't visible here
+    mm = ua.generate_multimethod(lambda: (), lambda a, kw, d: (a, kw), "ua_tests")
+    with pytest.raises(ua.BackendNotImplementedError):
+        mm()
+
+
+def test_c_api():
+    import ctypes
+    from uarray import _uarray
+
+    convert_func = ctypes.PYFUNCTYPE(
+        ctypes.py_object,
+        ctypes.c_void_p,
+        ctypes.py_object,
+        ctypes.py_object,
+        ctypes.c_int,
+    )
+    function_func = ctypes.PYFUNCTYPE(
+        ctypes.py_object,
+        ctypes.c_void_p,
+        ctypes.py_object,
+        ctypes.POINTER(ctypes.py_object),
+        ctypes.c_ssize_t,
+        ctypes.c_void_p,
+    )
+
+    class API(ctypes.Structure):
+        _fields_ = [
+            ("version", ctypes.c_uint),
+            ("state", ctypes.c_void_p),
+            (
+                "call",
+                ctypes.PYFUNCTYPE(
+                    ctypes.py_object,
+                    ctypes.c_void_p,
+                    ctypes.py_object,
+                    ctypes.POINTER(ctypes.py_object),
+                    ctypes.c_size_t,
+                    ctypes.c_void_p,
+                ),
+            ),
+            (
+                "get_backend",
+                ctypes.PYFUNCTYPE(ctypes.py_object, ctypes.c_void_p, ctypes.c_char_p),
+            ),
+            (
+                "push_backend",
+                ctypes.PYFUNCTYPE(
+                    ctypes.py_object,
+                    ctypes.c_void_p,
+                    ctypes.py_object,
+                    ctypes.c_int,
+                    ctypes.c_int,
+                ),
+            ),
+            (
+                "pop_backend",
+                ctypes.PYFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.py_object),
+            ),
+            (
+                "new_backend",
+                ctypes.PYFUNCTYPE(
+                    ctypes.py_object,
+                    ctypes.c_void_p,
+                    ctypes.py_object,
+                    convert_func,
+                    function_func,
+                    ctypes.c_void_p,
+                    ctypes.py_object,
+                ),
+            ),
+            (
+                "register_backend",
+                ctypes.PYFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.py_object),
+            ),
+        ]
+
+    get_pointer = ctypes.pythonapi.PyCapsule_GetPointer
+    get_pointer.restype = ctypes.c_void_p
+    get_pointer.argtypes = [ctypes.py_object, ctypes.c_char_p]
+    ptr = get_pointer(_uarray._C_API, b"uarray._uarray._C_API")
+    api = API.from_address(ptr)
+    assert api.version == 1
+
+    @convert_func
+    def convert(data, value, dispatch_type, coerce):
+        return str(value) if coerce else value
+
+    @function_func
+    def function(data, method, args, nargs, kwnames):
+        assert kwnames is None
+        return "native", tuple(args[i] for i in range(nargs))
+
+    mm = ua.generate_multimethod(
+        lambda a: (ua.Dispatchable(a, int),),
+        lambda a, kw, d: (d, kw),
+        "ua_tests",
+    )
+    # The owner keeps the callbacks alive
+    owner = (convert, function)
+    be = api.new_backend(ptr, "ua_tests", convert, function, None, owner)
+    assert be.__ua_domain__ == "ua_tests"
+
+    with ua.set_backend(be):
+        assert mm(1) == ("native", (1,))
+    with ua.set_backend(be, coerce=True):
+        assert mm(1) == ("native", ("1",))
+
+    # The Python protocol goes through the same hooks
+    assert be.__ua_function__(mm, (2,), {}) == ("native", (2,))
+    assert tuple(be.__ua_convert__((ua.Dispatchable(2, int),), True)) == ("2",)
+
+    assert api.get_backend(ptr, b"ua_tests") is None
+    frame = api.push_backend(ptr, be, 0, 1)
+    try:
+        assert api.get_backend(ptr, b"ua_tests") is be
+        args = (ctypes.py_object * 1)(3)
+        assert api.call(ptr, mm, args, 1, None) == ("native", (3,))
+    finally:
+        assert api.pop_backend(ptr, frame) == 0
+    assert api.get_backend(ptr, b"ua_tests") is None
+
+    assert api.register_backend(ptr, be) == 0
+    assert mm(4) == ("native", (4,))
+
+
+def test_import_is_lazy():
+    import subprocess
+    import sys
+
+    code = """
+import sys
+before = set(sys.modules)
+import uarray
+print(" ".join(sorted(set(sys.modules) - before)))
+"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ua.__file__)))
+    imported = set(
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+    )
+
+    heavy = {
+        "asyncio",
+        "concurrent.futures",
+        "inspect",
+        "json",
+        "multiprocessing",
+        "pickle",
+        "tempfile",
+    }
+    assert not imported & heavy
+
+
+def test_generate_multimethods(monkeypatch):
+    import sys
+    import types
+    import uarray._backend
+
+    calls = []
+    get_defaults = uarray._backend.get_defaults
+
+    def counting_get_defaults(f):
+        calls.append(f)
+        return get_defaults(f)
+
+    monkeypatch.setattr(uarray._backend, "get_defaults", counting_get_defaults)
+
+    def replacer(args, kwargs, dispatchables):
+        return dispatchables + args[1:], kwargs
+
+    # Same parameters and defaults, different functions
+    table = {
+        "first": (lambda a, b=None: (ua.Dispatchable(a, int),), replacer),
+        "second": (lambda a, b=None: (ua.Dispatchable(a, int),), replacer),
+        "third": (lambda a, *, c=1: (ua.Dispatchable(a, int),), replacer, str),
+    }
+
+    module = types.ModuleType("ua_tests_generated")
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    mms = ua.generate_multimethods(table, "ua_tests", namespace=vars(module))
+    assert len(calls) == 2
+    assert vars(module)["first"] is mms["first"]
+    assert module.second.__name__ == "second"
+    assert module.third(1) == "1"
+    assert pickle.loads(pickle.dumps(module.first)) is module.first
+
+    be = Backend()
+    be.__ua_function__ = lambda f, a, kw: (f.__name__, a)
+    with ua.set_backend(be):
+        # Default arguments are still dropped
+        assert module.first(1, None) == ("first", (1,))
+
+    lazy_module = types.ModuleType("ua_tests_lazy")
+    monkeypatch.setitem(sys.modules, lazy_module.__name__, lazy_module)
+    lazy_module.__getattr__ = lambda name: name.upper()
+    lazy_module.__dir__ = lambda: ["extra"]
+    del calls[:]
+    lazy = ua.generate_multimethods(
+        table, "ua_tests", namespace=vars(lazy_module), lazy=True
+    )
+    assert calls == [] and "first" not in vars(lazy_module)
+    assert {"first", "extra"} <= set(dir(lazy_module))
+    assert lazy_module.first is lazy["first"] is vars(lazy_module)["first"]
+    assert len(calls) == 1
+    assert pickle.loads(pickle.dumps(lazy["second"])) is lazy_module.second
+    assert lazy_module.other == "OTHER"
+    with pytest.raises(KeyError):
+        lazy["other"]
+
+    # Neither the namespace nor the extractor give a module
+    def extractor(a):
+        return (ua.Dispatchable(a, int),)
+
+    extractor.__module__ = None
+    (nameless,) = ua.generate_multimethods(
+        {"nameless": (extractor, replacer)}, "ua_tests"
+    ).values()
+    assert nameless.__module__ == "builtins"
+
+
+def test_discover_backends(tmp_path, monkeypatch):
+    import sys
+    import importlib.metadata
+
+    site = tmp_path / "site"
+    dist_info = site / "ua_fake_backend-1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text("Name: ua_fake_backend\nVersion: 1.0\n")
+    (dist_info / "entry_points.txt").write_text(
+        "[uarray.backends]\nua_tests = ua_fake_backend:backend\n"
+    )
+    (site / "ua_fake_backend.py").write_text(
+        "class Backend:\n"
+        "    __ua_domain__ = 'ua_tests'\n"
+        "    __ua_types__ = (int,)\n"
+        "    def __ua_convert__(self, dispatchables, coerce):\n"
+        "        if any(type(d.value) is not int for d in dispatchables):\n"
+        "            return NotImplemented\n"
+        "        return tuple(d.value for d in dispatchables)\n"
+        "    def __ua_function__(self, method, args, kwargs):\n"
+        "        return 'fake', args\n"
+        "backend = Backend()\n"
+    )
+    monkeypatch.syspath_prepend(str(site))
+    monkeypatch.delitem(sys.modules, "ua_fake_backend", raising=False)
+    cache = tmp_path / "backends.json"
+
+    mm = ua.generate_multimethod(
+        lambda x: (ua.Dispatchable(x, int),),
+        lambda a, kw, d: (d, kw),
+        "ua_tests",
+        default=lambda x: "default",
+    )
+
+    (stub,) = ua.discover_backends(cache=cache)
+    assert ua.discover_backends("other_domain", cache=cache) == []
+    assert "ua_fake_backend" not in sys.modules
+    with ua.determine_backend(1, int, domain="ua_tests"):
+        assert "ua_fake_backend" in sys.modules
+        assert mm(1) == ("fake", (1,))
+    assert stub.backend is sys.modules["ua_fake_backend"].backend
+    assert mm(2) == ("fake", (2,))
+
+    # The second discovery doesn't scan, and knows the supported types
+    def fail(**kwargs):
+        raise AssertionError("entry points scanned")
+
+    monkeypatch.setattr(importlib.metadata, "entry_points", fail)
+    monkeypatch.delitem(sys.modules, "ua_fake_backend")
+    with ua.reset_state():
+        ua.clear_backends("ua_tests", registered=True)
+        (stub,) = ua.discover_backends(cache=cache)
+        assert stub.types == {"builtins:int"}
+        assert mm("x") == "default"
+        with pytest.raises(ua.BackendNotImplementedError):
+            ua.determine_backend("x", int, domain="ua_tests", cache=True)
+        assert "ua_fake_backend" not in sys.modules
+        # Subclasses of the declared types load the backend too
+        assert mm(True) == "default"
+        assert "ua_fake_backend" in sys.modules
+        assert mm(3) == ("fake", (3,))
+
+
+def test_memory_stats():
+    import threading
+
+    class NotImplementedBackend:
+        def __init__(self, domain):
+            self.__ua_domain__ = domain
+
+        def __ua_function__(self, method, args, kwargs):
+            return NotImplemented
+
+    empty = {"domains": 0, "backends": 0, "capacity": 0}
+    assert ua.memory_stats()["thread"] == empty
+
+    # Dynamically created domains don't leave entries behind, including
+    # those created to call defaults
+    for i in range(50):
+        domain = f"ua_tests_dynamic{i}"
+        mm = ua.generate_multimethod(
+            lambda: (), lambda a, kw, d: (a, kw), domain, default=lambda: "default"
+        )
+        be = NotImplementedBackend(domain)
+        with ua.set_backend(be), ua.skip_backend(Backend()):
+            assert ua.memory_stats()["thread"]["domains"] == 2
+            assert mm() == "default"
+        ua.register_backend(be)
+        assert mm() == "default"
+    assert ua.memory_stats()["thread"] == empty
+
+    # Contexts apply to the state of the thread entering them, even if it
+    # was replaced in between
+    ctx = ua.set_backend(Backend())
+    with ua.reset_state():
+        with ctx:
+            assert ua.memory_stats()["thread"]["backends"] == 1
+    assert ua.memory_stats()["thread"] == empty
+
+    stats = []
+    t = threading.Thread(target=lambda: stats.append(ua.memory_stats()))
+    t.start()
+    t.join()
+    assert stats[0]["threads"] == ua.memory_stats()["threads"] + 1
+    assert stats[0]["thread"] == empty
+
+
+def test_determine_backend_cache():
+    class ConvertingBackend:
+        __ua_domain__ = "ua_tests"
+
+        def __init__(self, accepted):
+            self.accepted = accepted
+            self.converts = 0
+
+        def __ua_convert__(self, dispatchables, coerce):
+            self.converts += 1
+            if not all(isinstance(d.value, self.accepted) for d in dispatchables):
+                return NotImplemented
+            return tuple(d.value for d in dispatchables)
+
+    be_int = ConvertingBackend(int)
+    be_str = ConvertingBackend(str)
+    ua.register_backend(be_int)
+
+    def determine(value):
+        ctx = ua.determine_backend(value, int, domain="ua_tests", cache=True)
+        return ctx._pickle()
+
+    assert determine(1) == (be_int, False, True)
+    # Each call gets its own context, as contexts can't be shared by threads
+    ctx = ua.determine_backend(2, int, domain="ua_tests", cache=True)
+    assert ctx is not ua.determine_backend(2, int, domain="ua_tests", cache=True)
+    assert ctx._pickle() == (be_int, False, True)
+    assert be_int.converts == 1
+
+    with ua.set_backend(be_str):
+        # Different backends are set
+        with ua.determine_backend("a", int, domain="ua_tests", cache=True):
+            pass
+        assert determine("b") == (be_str, False, True)
+        assert be_str.converts == 1
+        assert determine(1) == (be_int, False, True)
+        assert be_str.converts == 2
+
+    # The state is the same again after exiting
+    assert determine(3) == (be_int, False, True)
+    assert be_int.converts == 2
+
+    ua.register_backend(be_str)
+    ua.determine_backend_multi([1, 2], dispatch_type=int, domain="ua_tests", cache=True)
+    assert be_int.converts == 3
+    with pytest.raises(ua.BackendNotImplementedError):
+        ua.determine_backend(1.0, int, domain="ua_tests", cache=True)
+
+
+def test_state_version_shared_context():
+    import threading
+    from uarray import _uarray
+
+    ctx = ua.set_backend(Backend())
+    before = _uarray.get_state_version()
+    versions = []
+
+    def enter_in_thread():
+        versions.append(_uarray.get_state_version())
+        with ctx:
+            pass
+        versions.append(_uarray.get_state_version())
+
+    # Each thread restores its own version when leaving the shared context
+    with ctx:
+        t = threading.Thread(target=enter_in_thread)
+        t.start()
+        t.join()
+    assert versions[0] == versions[1]
+    assert _uarray.get_state_version() == before
+
+
+def test_type_dispatcher():
+    import collections.abc
+
+    mm = ua.generate_multimethod(
+        lambda x, y=None: (), lambda a, kw, d: (a, kw), "ua_tests"
+    )
+    dispatch = ua.TypeDispatcher()
+
+    @dispatch.register(mm, object)
+    def _(x, y=None):
+        return "object"
+
+    @dispatch.register(mm, int, int)
+    def _(x, y=None):
+        return "int, int"
+
+    @dispatch.register(mm, collections.abc.Sequence)
+    def _(x, y=None):
+        return "sequence"
+
+    be = Backend()
+    be.__ua_function__ = dispatch
+    with ua.set_backend(be):
+        assert mm(1) == "object"
+        assert mm(True, 2) == "int, int"
+        assert mm(1, "a") == "object"
+        assert mm("abc") == "sequence"
+        assert mm(range(3)) == "sequence"
+
+        @dispatch.register(mm, bool)
+        def _(x, y=None):
+            return "bool"
+
+        # The cache is cleared when registering
+        assert mm(True, 2) == "bool"
+        assert mm(1, 2) == "int, int"
+
+    assert dispatch.resolve(mm, (bool,)) is dispatch.resolve(mm, (bool, str))
+
+    # A match of all arguments beats an equal match of the first ones only
+    @dispatch.register(mm, str)
+    def _(x, y=None):
+        return "str"
+
+    @dispatch.register(mm, str, str)
+    def _(x, y=None):
+        return "str, str"
+
+    with ua.set_backend(be):
+        assert mm("a", "b") == "str, str"
+        assert mm("a", 1) == "str"
+    other = ua.generate_multimethod(lambda: (), lambda a, kw, d: (a, kw), "ua_tests")
+    assert dispatch.resolve(other, ()) is None
+    with ua.set_backend(be), pytest.raises(ua.BackendNotImplementedError):
+        other()
+
+
+def test_freeze_backends():
+    import subprocess
+    import sys
+
+    # Freezing can't be undone, so it's tested in another process
+    code = """
+import threading
+import warnings
+import pytest
+import uarray as ua
+from uarray import _wrappers
+
+warnings.simplefilter("ignore", DeprecationWarning)
+
+class Backend:
+    def __init__(self, name, domain="ua_frozen"):
+        self.name = name
+        self.__ua_domain__ = domain
+
+    def __ua_function__(self, method, args, kwargs):
+        return self.name
+
+mm = ua.generate_multimethod(lambda: (), lambda a, kw, d: (a, kw), "ua_frozen.sub")
+ua.set_global_backend(Backend("global"), try_last=True)
+registered = Backend("registered")
+ua.register_backend(registered)
+assert mm() == "registered"
+stubbed = Backend("stubbed", "ua_frozen_stub")
+stub_mm = ua.generate_multimethod(lambda: (), lambda a, kw, d: (a, kw), "ua_frozen_stub")
+stub = _wrappers._BackendStub("ua_frozen_stub", "__main__:stubbed", None, None)
+ua.register_backend(stub)
+barrier = threading.Barrier(4)
+def freeze():
+    barrier.wait()
+    ua.freeze_backends()
+threads = [threading.Thread(target=freeze) for _ in range(4)]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+ua.freeze_backends()
+assert mm() == "registered"
+
+# A stub tries to replace itself once, rather than on every call
+replaced = []
+real_replace = _wrappers._replace_backend
+def replace_backend(old, new):
+    replaced.append(old)
+    return real_replace(old, new)
+_wrappers._replace_backend = replace_backend
+assert stub_mm() == stub_mm() == "stubbed"
+assert len(replaced) == 1
+
+for f, args in [
+    (ua.set_global_backend, (Backend("other"),)),
+    (ua.register_backend, (Backend("other"),)),
+    (ua.clear_backends, ("ua_frozen",)),
+]:
+    with pytest.raises(RuntimeError, match="frozen"):
+        f(*args)
+
+with ua.set_backend(Backend("local", "ua_frozen.sub")):
+    assert mm() == "local"
+with ua.skip_backend(registered):
+    assert mm() == "global"
+
+results = []
+t = threading.Thread(target=lambda: results.append(mm()))
+t.start()
+t.join()
+assert results == ["registered"]
+
+# A copy of the global backends can still be changed
+with ua.reset_state():
+    ua.clear_backends("ua_frozen", registered=True)
+    assert mm() == "global"
+assert mm() == "registered"
+"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(ua.__file__)))
+    subprocess.run([sys.executable, "-c", code], env=env, check=True)
+
+
+@pytest.mark.parametrize("drop", ["clear", "replace"])
+def test_backend_dropped_during_dispatch(drop):
+    import weakref
+
+    freed = []
+
+    class DroppingBackend:
+        __ua_domain__ = "ua_tests"
+
+        def __ua_convert__(self, dispatchables, coerce):
+            # Drops the only reference held by the state
+            if drop == "clear":
+                ua.clear_backends("ua_tests", registered=True)
+            else:
+                ua._uarray._replace_backend(self, Backend())
+            return tuple(d.value for d in dispatchables)
+
+        def __ua_function__(self, method, args, kwargs):
+            assert not freed
+            return "ok"
+
+    be = DroppingBackend()
+    weakref.finalize(be, freed.append, True)
+    ua.register_backend(be)
+    del be
+
+    mm = ua.generate_multimethod(
+        lambda x: (ua.Dispatchable(x, int),), lambda a, kw, d: (d, kw), "ua_tests"
+    )
+    assert mm(1) == "ok"
+    assert freed
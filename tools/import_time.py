@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Measure the time ``import uarray`` takes, using ``python -X importtime``.
+
+Each run imports uarray in a fresh interpreter; the median of the cumulative
+import times is reported, along with the slowest modules imported on the way.
+With ``--budget``, the script fails if the median exceeds the budget, so it
+can guard against import time regressions in CI.
+
+Usage: ``python tools/import_time.py [--runs N] [--budget MS]``
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+
+def import_times():
+    """The cumulative import time of each module, in microseconds."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import uarray"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget", type=float, help="in milliseconds")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    # The first run may compile bytecode, so it isn't counted
+    import_times()
+    runs = [import_times() for _ in range(args.runs)]
+    median = statistics.median(run["uarray"] for run in runs) / 1000
+
+    print(f"import uarray: {median:.1f} ms (median of {args.runs} runs)")
+    slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[1 : args.top + 1]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if args.budget is not None and median > args.budget:
+        print(f"over the budget of {args.budget:.1f} ms", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
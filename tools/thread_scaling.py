@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Measure how multimethod calls scale with the number of threads.
+
+Every thread calls the same multimethod with the same backend, which is the
+worst case for reference count contention. On a free-threaded build, the
+throughput should grow close to linearly with the number of threads, up to
+the number of cores. With the GIL, it stays flat.
+
+With ``--freeze``, the global backends are frozen first, as in production
+setups, so dispatch borrows the backend instead of taking references to it.
+
+Usage: ``python tools/thread_scaling.py [--calls N] [--threads 1,2,4,8] [--freeze]``
+"""
+
+import argparse
+import sys
+import sysconfig
+import threading
+import time
+
+import uarray as ua
+
+
+class Backend:
+    __ua_domain__ = "ua_bench"
+
+    @staticmethod
+    def __ua_convert__(dispatchables, coerce):
+        return tuple(d.value for d in dispatchables)
+
+    @staticmethod
+    def __ua_function__(method, args, kwargs):
+        return args[0]
+
+
+multimethod = ua.generate_multimethod(
+    lambda x: (ua.Dispatchable(x, int),),
+    lambda args, kwargs, dispatchables: (dispatchables, kwargs),
+    "ua_bench",
+)
+
+
+def worker(calls, barrier):
+    barrier.wait()
+    for i in range(calls):
+        multimethod(i)
+
+
+def run(nthreads, calls):
+    barrier = threading.Barrier(nthreads + 1)
+    threads = [
+        threading.Thread(target=worker, args=(calls, barrier)) for _ in range(nthreads)
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    return nthreads * calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--threads", default="1,2,4,8")
+    parser.add_argument("--freeze", action="store_true")
+    args = parser.parse_args()
+
+    free_threaded = bool(sysconfig.get_config_var("Py_GIL_DISABLED"))
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"free-threaded build: {free_threaded}, GIL enabled: {gil_enabled}")
+
+    # A global backend is shared by all threads
+    ua.set_global_backend(Backend())
+    if args.freeze:
+        ua.freeze_backends()
+
+    base = None
+    for nthreads in map(int, args.threads.split(",")):
+        rate = run(nthreads, args.calls)
+        base = base or rate / nthreads
+        print(
+            f"{nthreads:3d} threads: {rate:12,.0f} calls/s, "
+            f"speedup {rate / base:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()